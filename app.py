@@ -1,21 +1,26 @@
 import streamlit as st
 import time
-from backend import cria_chain_conversa, folder_files
+from backend import (
+    AULAS_EXEMPLO, URL_RELATORIOS, anexar_aula_exemplo, cache_respostas, cria_chain_conversa, enviar_relatorio,
+    fila_relatorios, folder_files, obter_quiz, preparar_quiz, responder_usuario_stream, sincronizar_indice
+)
 from pathlib import Path
+from urllib.parse import quote
+from utils.clientes import metricas_pool
 import uuid
 import random
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-import os
 from flask import Flask, send_file
-from datetime import datetime
 import webbrowser
-from utils.avaliador import analisar_desempenho_ia
 
 
 
 
 
+# 🧩 Turnos que o fragmento do chat acumula antes de um rerun completo da página
+TURNOS_POR_FRAGMENTO = 5
+
 # Configurações de página
 st.set_page_config(
     page_title="ChatPDF",
@@ -76,37 +81,108 @@ def chat_window():
     st.markdown("---")
 
     if 'chain' not in st.session_state:
-        st.warning("📄 Insira arquivo na barra lateral para iniciar")
+        if "erro_chat" in st.session_state:
+            st.error(st.session_state["erro_chat"])
+        else:
+            st.warning("📄 Insira arquivo na barra lateral para iniciar")
         st.stop()
 
-    chain = st.session_state["chain"]
-    memory = chain.memory
-    mensagens = memory.load_memory_variables({})["chat_history"]
-
-    with st.container():
-        for mensagem in mensagens:
-            with st.chat_message(mensagem.type):
-                st.markdown(mensagem.content)
-
-        nova_mensagem = st.chat_input("💬 Faça sua pergunta")
-        if nova_mensagem:
-            with st.chat_message("human"):
-                st.markdown(nova_mensagem)
-
-            with st.chat_message("ai"):
-                st.image("pdfs/loading.gif", width=50)
-
-                resposta = chain.invoke({"question": nova_mensagem})  # Guarda a resposta
-
-                if isinstance(resposta, dict) and "answer" in resposta:
-                    resposta_texto = resposta["answer"]
-                else:
-                    resposta_texto = str(resposta)
+    # Indexação dos PDFs ainda em andamento: o chat já responde com o que foi indexado
+    indice = st.session_state.get("indice_sessao")
+    if indice is not None and indice.erro_ingestao is not None:
+        st.error(f"❌ Erro ao indexar o material: {indice.erro_ingestao}. O chat responde só com o que já foi indexado.")
+    elif indice is not None and indice.indexando:
+        st.caption(f"⏳ Indexando o material... {indice.paginas_indexadas} páginas prontas")
+
+    # Histórico (papel, texto): o rerun completo desenha o que já existia e os
+    # turnos novos ficam a cargo do fragmento, que roda sozinho a cada pergunta
+    historico = st.session_state.setdefault("historico_chat", [])
+    st.session_state["historico_renderizado"] = len(historico)
+    renderizar_mensagens(historico)
+
+    conversa()
+
+
+def renderizar_mensagens(mensagens):
+    for papel, texto in mensagens:
+        with st.chat_message(papel):
+            st.markdown(texto)
+
+
+# 🧩 Fragmento do chat: enviar uma pergunta reexecuta só este trecho, sem refazer
+# main() (CSS, glob de files/, barra lateral) nem redesenhar o histórico do rerun
+# completo. A saída do fragmento é refeita a cada rerun, então ele redesenha os
+# poucos pares que ele mesmo já mostrou (no máximo TURNOS_POR_FRAGMENTO - 1)
+@st.fragment
+def conversa():
+    historico = st.session_state["historico_chat"]
+    area_mensagens = st.container()
+    nova_mensagem = st.chat_input("💬 Faça sua pergunta")
+
+    with area_mensagens:
+        renderizar_mensagens(historico[st.session_state["historico_renderizado"]:])
+        if not nova_mensagem:
+            return
+
+        with st.chat_message("human"):
+            st.markdown(nova_mensagem)
+
+        with st.chat_message("ai"):
+            carregando = st.empty()
+            carregando.image("pdfs/loading.gif", width=50)
+
+            # Mostra os tokens no balão conforme chegam; o gif some no primeiro token
+            def tokens():
+                for i, pedaco in enumerate(responder_usuario_stream(nova_mensagem)):
+                    if i == 0:
+                        carregando.empty()
+                    yield pedaco
+
+            resposta_texto = st.write_stream(tokens())
+
+    historico.append(("human", nova_mensagem))
+    historico.append(("ai", resposta_texto))
+
+    # Com muitos pares no fragmento, um rerun completo os passa para o histórico de main()
+    if len(historico) - st.session_state["historico_renderizado"] >= 2 * TURNOS_POR_FRAGMENTO:
+        st.rerun()
+
+
+# 📊 Métricas do chat na barra lateral: último turno, tokens por turno, cache de respostas
+# e pool de conexões do processo
+def painel_metricas():
+    turnos = st.session_state.get("metricas_turnos")
+    if not turnos:
+        return
+
+    with st.expander("📊 Desempenho do chat"):
+        ultimo = turnos[-1]
+        origem = " (cache)" if ultimo["cache"] else ""
+        st.caption(f"Último turno{origem}: 1º token em {ultimo['ttft']:.2f}s, resposta em {ultimo['latencia_total']:.2f}s")
+
+        # Tokens do prompt (contexto + histórico + pergunta) e só do histórico, por turno
+        st.caption(f"Tokens do prompt: {ultimo['tokens_prompt']} (histórico: {ultimo['tokens_historico']})")
+        st.line_chart(
+            {"prompt": [t["tokens_prompt"] for t in turnos], "histórico": [t["tokens_historico"] for t in turnos]},
+            height=150
+        )
+
+        cache = cache_respostas().metricas()
+        st.caption(
+            f"Cache de respostas: {cache['acertos']} acertos, {cache['faltas']} faltas "
+            f"({cache['taxa_acerto']:.0%}), {cache['tempo_economizado_s']:.1f}s economizados"
+        )
+
+        # Reuso das conexões do pool HTTP com a OpenAI (quanto mais perto de 100%, menos handshakes)
+        for url, pool in metricas_pool().items():
+            if not pool["requisicoes"]:
+                continue
+            st.caption(
+                f"Conexões com {url}: {pool['requisicoes']} requisições em {pool['conexoes_criadas']} conexões "
+                f"({pool['taxa_reuso']:.0%} de reuso)"
+            )
 
-                # Exibe a resposta antes de recarregar
-                st.markdown(resposta_texto)
 
-            st.rerun()
 def display_existing_files(folder):
     session_id = st.session_state.get("session_id", "")
 
@@ -137,16 +213,22 @@ def excluir_arquivo(arquivo):
         st.error(f"❌ Erro ao excluir o arquivo {arquivo.name}: {str(e)}")
 
 
-def quiz_window(perguntas_raw):
+def quiz_window(quiz):
     st.markdown("## 🧠 Quiz para testar seu conhecimento")
 
+    if "erro_quiz" in st.session_state:
+        st.error(st.session_state["erro_quiz"])
+    if not quiz:
+        st.warning("⚠️ Não foi possível gerar perguntas sobre o material. Gere o quiz novamente.")
+        return
+
     # Controle de sessão
     if "matricula" not in st.session_state:
         st.session_state["matricula"] = ""
     if "acertos" not in st.session_state:
         st.session_state["acertos"] = 0
     if "respostas_usuario" not in st.session_state:
-        st.session_state["respostas_usuario"] = []
+        st.session_state["respostas_usuario"] = {}
 
     # Input de matrícula
     matricula = st.text_input("Ola aluno, Informe seu nome e pressione ENTER", value=st.session_state["matricula"])
@@ -156,147 +238,105 @@ def quiz_window(perguntas_raw):
         st.warning("⚠️ Por favor, digite sua matrícula para continuar.")
         return  # Interrompe a execução até matrícula ser preenchida
 
-    # Processa as perguntas
-    perguntas_brutas = perguntas_raw.strip().split("\n\nPergunta:")
-    if perguntas_brutas[0].startswith("Pergunta:"):
-        perguntas_brutas[0] = perguntas_brutas[0][len("Pergunta:"):]
-
+    # Respostas indexadas pela posição da pergunta
     respostas_usuario = st.session_state["respostas_usuario"]
 
-    for idx, pergunta_raw in enumerate(perguntas_brutas):
-        linhas = pergunta_raw.strip().split("\n")
-
-        if len(linhas) < 7:
-            st.warning(f"⚠️ Verifique o conteúdo da pergunta {idx+1}. Está incompleto.")
-            continue
+    for idx, pergunta in enumerate(quiz):
+        st.markdown(f"**Pergunta {idx + 1}:** {pergunta.texto}")
+        # O número do quiz na chave: uma pergunta sorteada de novo chega sem resposta marcada
+        chave_radio = f"resposta_{st.session_state.get('quiz_id', 0)}_{idx}"
 
-        pergunta_texto = linhas[0]
-        opcoes = linhas[1:5]
-        resposta_certa = linhas[5].split(":")[-1].strip().upper()[0]
-        explicacao = linhas[6].split(":", 1)[-1].strip()
-
-        st.markdown(f"**Pergunta {idx + 1}:** {pergunta_texto}")
-        chave_radio = f"resposta_{idx}_{pergunta_texto}"
-
-        if f"resposta_mostrada_{idx}" in st.session_state and st.session_state[f"resposta_mostrada_{idx}"]:
-            escolha = st.radio("Escolha uma opção:", opcoes, index=None, disabled=True, key=chave_radio)
-        else:
-            escolha = st.radio("Escolha uma opção:", opcoes, index=None, key=chave_radio)
+        escolha = st.radio("Escolha uma opção:", pergunta.opcoes, index=None, disabled=idx in respostas_usuario, key=chave_radio)
 
         if escolha:
             letra_escolhida = escolha[0].upper()
-            correta = (letra_escolhida == resposta_certa)
+            correta = (letra_escolhida == pergunta.resposta)
 
-            if not st.session_state.get(f"resposta_mostrada_{idx}", False):
-                st.session_state[f"resposta_mostrada_{idx}"] = True
+            if idx not in respostas_usuario:
+                respostas_usuario[idx] = {
+                    "pergunta": pergunta.texto,
+                    "resposta_usuario": letra_escolhida,
+                    "texto_resposta_usuario": escolha,
+                    "resposta_correta": pergunta.resposta,
+                    "correta": correta,
+                    "explicacao": pergunta.explicacao
+                }
                 if correta:
                     st.session_state["acertos"] += 1
 
-            index_resposta_certa = ord(resposta_certa) - ord("A")
-            texto_resposta = opcoes[index_resposta_certa][3:].strip()
-
             if correta:
-                st.success(f"✅ Resposta correta! {resposta_certa}) {texto_resposta}")
+                st.success(f"✅ Resposta correta! {pergunta.resposta}) {pergunta.texto_resposta}")
             else:
-                st.error(f"❌ Resposta incorreta. A correta é **{resposta_certa}**) {texto_resposta}")
+                st.error(f"❌ Resposta incorreta. A correta é **{pergunta.resposta}**) {pergunta.texto_resposta}")
 
-            st.markdown(f"🧠 **Explicação:** {explicacao}")
+            st.markdown(f"🧠 **Explicação:** {pergunta.explicacao}")
             st.markdown("________________________________")
 
-            if not any(r["pergunta"] == pergunta_texto for r in respostas_usuario):
-                respostas_usuario.append({
-                    "pergunta": pergunta_texto,
-                    "resposta_usuario": letra_escolhida,
-                    "texto_resposta_usuario": escolha,
-                    "resposta_correta": resposta_certa,
-                    "correta": correta,
-                    "explicacao": explicacao
-                })
-                
-
     # Verifica se todas as perguntas foram respondidas
-    if len(respostas_usuario) == len(perguntas_brutas):
-        if st.button("Ao concluir salve o simulado", use_container_width=True):
-            st.info("🔧 Aguarde enquanto geramos o relatório...")
-
-            data_hora = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            os.makedirs("relatorioQuiz", exist_ok=True)
-            caminho_html = f"relatorioQuiz/{matricula}_{st.session_state['first_uploaded_file_name']}_relatorio_{data_hora}.html"
-
-            feedback_ia = analisar_desempenho_ia(respostas_usuario)
-
-            html_content = f"""
-            <!DOCTYPE html>
-            <html lang="pt-BR">
-            <head>
-                <meta charset="UTF-8">
-                <title>Relatório do Quiz - {data_hora}</title>
-                <style>
-                    body {{
-                        font-family: 'Segoe UI', sans-serif;
-                        background-color: #f4f6f9;
-                        color: #333;
-                        padding: 30px;
-                        line-height: 1.6;
-                    }}
-                    h1, h2 {{ color: #2c3e50; }}
-                    .card {{
-                        background: #fff;
-                        padding: 20px;
-                        margin-bottom: 20px;
-                        border-radius: 10px;
-                        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                    }}
-                    .correta {{ color: green; }}
-                    .incorreta {{ color: red; }}
-                </style>
-            </head>
-            <body>
-                <h1>📊 Relatório do Quiz - {data_hora}</h1>
-                <div class="card">
-                <p><strong>✅ Matricula:</strong> {st.session_state['matricula']}</p>
-                    <p><strong>✅ Acertos:</strong> {st.session_state['acertos']}</p>
-                </div>
-                <div class="card">
-                    <h2>🧠 Análise do Desempenho (IA)</h2>
-                    {''.join(f'<p>{par}</p>' for par in feedback_ia.split('\\n\\n'))}
-                </div>
-            """
-
-            for i, r in enumerate(respostas_usuario):
-                html_content += f"""
-                <div class="card">
-                    <p><strong>Pergunta {i+1}:</strong> {r['pergunta']}</p>
-                    <p><strong>Sua resposta:</strong> {r['resposta_usuario']}) {r.get('texto_resposta_usuario', '')}</p>
-                    <p><strong>Resposta correta:</strong> {r['resposta_correta']}</p>
-                    <p><strong>Resultado:</strong> <span class="{ 'correta' if r['correta'] else 'incorreta' }">
-                        {"Correta" if r['correta'] else 'Incorreta'}
-                    </span></p>
-                    <p><strong>Explicação:</strong> {r['explicacao']}</p>
-                </div>
-                """
-
-            html_content += "</body></html>"
-
-            with open(caminho_html, "w", encoding="utf-8") as f:
-                f.write(html_content)
-
-            st.success("✅ Relatório salvo com sucesso!")
-            st.markdown(
-                f'<a href="http://127.0.0.1:5000/relatorio/{matricula}_{st.session_state['first_uploaded_file_name']}_relatorio_{data_hora}.html" target="_blank">'
-                f'<button style="width:100%;padding:10px;font-size:16px;background-color:#4CAF50;color:white;border:none;border-radius:5px;">'
-                f'📖 Veja o relatório</button></a>',
-                unsafe_allow_html=True
+    if len(respostas_usuario) == len(quiz):
+        if st.button("Ao concluir salve o simulado", use_container_width=True, disabled="relatorio_job" in st.session_state):
+            # O relatório é gerado em segundo plano: a tela recebe o id do job e só acompanha
+            st.session_state["relatorio_job"], st.session_state["relatorio_nome"] = enviar_relatorio(
+                matricula, st.session_state["first_uploaded_file_name"], st.session_state["acertos"],
+                list(respostas_usuario.values())
             )
+
+        if "relatorio_job" in st.session_state:
+            job = fila_relatorios().status(st.session_state["relatorio_job"])
+            if job and job["estado"] in ("na_fila", "gerando"):
+                acompanhar_relatorio()
+            elif job and job["estado"] == "concluido":
+                st.success("✅ Relatório salvo com sucesso!")
+                st.markdown(
+                    f'<a href="{URL_RELATORIOS}/relatorio/{quote(st.session_state["relatorio_nome"])}" target="_blank">'
+                    f'<button style="width:100%;padding:10px;font-size:16px;background-color:#4CAF50;color:white;border:none;border-radius:5px;">'
+                    f'📖 Veja o relatório</button></a>',
+                    unsafe_allow_html=True
+                )
+            elif job:
+                st.error(f"❌ Não foi possível gerar o relatório: {job['erro']}")
+
+# ⏳ Consulta o job do relatório a cada 2s sem rodar a página inteira; ao terminar, redesenha com o link
+@st.fragment(run_every=2)
+def acompanhar_relatorio():
+    fila = fila_relatorios()
+    job = fila.status(st.session_state["relatorio_job"])
+    if not job or job["estado"] not in ("na_fila", "gerando"):
+        st.rerun()
+
+    metricas = fila.metricas()
+    if job["estado"] == "na_fila":
+        st.info(f"🔧 Relatório na fila ({metricas['na_fila']} aguardando)...")
+    else:
+        tentativa = f" (tentativa {job['tentativas']})" if job["tentativas"] > 1 else ""
+        st.info(f"🔧 Aguarde enquanto geramos o relatório{tentativa}...")
+    if metricas["concluidos"]:
+        st.caption(f"Tempo típico de geração: {metricas['latencia_p50_s']:.0f}s")
+
 def save_uploaded_files(uploaded_files, folder):
-    # Apaga arquivos antigos da sessão
+    # Retorna True se algum arquivo da sessão foi incluído, alterado ou removido
+    alterado = False
+    desejados = {
+        file.name.replace(".pdf", f"_{st.session_state['session_id']}.pdf"): file
+        for file in uploaded_files
+    }
+
+    # Apaga apenas os arquivos que saíram do upload
     for file in folder.glob(f"*_{st.session_state['session_id']}.pdf"):
-        file.unlink()
+        if file.name not in desejados:
+            file.unlink()
+            alterado = True
+
+    # Salva com o ID da sessão só os arquivos novos ou com conteúdo diferente
+    for filename, file in desejados.items():
+        destino = folder / filename
+        conteudo = file.getvalue()
+        if destino.exists() and destino.stat().st_size == len(conteudo) and destino.read_bytes() == conteudo:
+            continue
+        destino.write_bytes(conteudo)
+        alterado = True
 
-    # Salva novos arquivos com o ID da sessão
-    for file in uploaded_files:
-        filename = file.name.replace(".pdf", f"_{st.session_state['session_id']}.pdf")
-        (folder / filename).write_bytes(file.read())
+    return alterado
 
 
 def main():
@@ -342,7 +382,10 @@ def main():
         
 
         if uploaded_pdfs:
-            save_uploaded_files(uploaded_pdfs, folder_files)
+            # Atualiza o índice do chat só com o que mudou (inclui/remove os PDFs afetados)
+            if save_uploaded_files(uploaded_pdfs, folder_files) and "chain" in st.session_state:
+                sincronizar_indice()
+                preparar_quiz()
             st.success(f"✅ {len(uploaded_pdfs)} arquivo(s) salvo(s) com sucesso!")
             
             
@@ -362,7 +405,12 @@ def main():
         display_existing_files(folder_files)
 
         # Só mostra os botões se houver pelo menos 1 PDF
-        if len(arquivos_existentes) > 0:
+        if len(arquivos_existentes) > 0 or st.session_state.get("aula_exemplo"):
+                if "chain" not in st.session_state:
+                    with st.spinner("🔧 Inicializando o Chatbot..."):
+                        cria_chain_conversa()
+                    # Já deixa as perguntas do quiz sendo geradas em segundo plano
+                    preparar_quiz()
            # arq = st.text_input(arquivos_existentes[1].name)
            
             # label_botao = "▶️ Inicializar Chatbot com a matétia" if "chain" not in st.session_state else "🔄 Atualizar Chatbot"
@@ -379,11 +427,11 @@ def main():
                 if st.button("🧪 Gerar perguntas sobre a matéria", use_container_width=True, key="botao_quiz"):
                     
                     st.info("🔧 gerando perguntas...")
-                    from backend import importar_documentos, dividir_documentos, gerar_perguntas_quiz
-                    documentos = importar_documentos()
-                    documentos = dividir_documentos(documentos)
-                    st.session_state["quiz"] = gerar_perguntas_quiz(documentos)
+                    st.session_state["quiz"] = obter_quiz()
+                    st.session_state["quiz_id"] = st.session_state.get("quiz_id", 0) + 1
                     st.session_state["acertos"] = 0
+                    st.session_state["respostas_usuario"] = {}
+                    st.session_state.pop("relatorio_job", None)
                     st.session_state["quiz_index"] = 0
                     st.rerun()
 
@@ -399,30 +447,22 @@ def main():
     index=0
     )
 
-    if resposta == "Aula de leitura dinâmica":
-            from shutil import copyfile
-
-            session_id = st.session_state["session_id"]
-            origem = Path("files/LIVRO LEITURA DINÂMICA_617127.pdf")
-            destino = folder_files / f"LIVRO LEITURA DINÂMICA_{session_id}.pdf"
-
-            if not destino.exists():  # Evita duplicação
-                copyfile(origem, destino)
-                st.success("✅ Arquivo de exemplo carregado com sucesso!")
-                st.rerun()
-
+        painel_metricas()
 
-    if resposta == "Aula de Marketing de vendas":
-            from shutil import copyfile
-
-            session_id = st.session_state["session_id"]
-            origem = Path("files/5ca0e9_424413178c6f4e218770dc8a08208fef_826388.pdf")
-            destino = folder_files / f"5ca0e9_424413178c6f4e218770dc8a08208fef_{session_id}.pdf"
-
-            if not destino.exists():  # Evita duplicação
-                copyfile(origem, destino)
-                st.success("✅ Arquivo de exemplo carregado com sucesso!")
-                st.rerun()
+    # Aulas de exemplo usam um índice compartilhado entre sessões: nada é copiado para files/
+    aula_escolhida = resposta if resposta in AULAS_EXEMPLO else None
+    if aula_escolhida != st.session_state.get("aula_exemplo"):
+        if aula_escolhida and not AULAS_EXEMPLO[aula_escolhida].exists():
+            st.error("❌ O material desta aula de exemplo não está disponível no servidor.")
+            st.session_state["aula_exemplo"] = None
+        else:
+            st.session_state["aula_exemplo"] = aula_escolhida
+            if aula_escolhida:
+                st.session_state.setdefault("first_uploaded_file_name", AULAS_EXEMPLO[aula_escolhida].name)
+            if "chain" in st.session_state:
+                anexar_aula_exemplo(aula_escolhida)
+                preparar_quiz()
+            st.rerun()
 
     # Botão para pesquisa de usuário
     st.markdown("""
@@ -1,18 +1,38 @@
+from datetime import datetime
 from pathlib import Path
 import random
 import os
+import time
 
 import streamlit as st
 from dotenv import load_dotenv, find_dotenv
 
-from langchain_community.document_loaders.pdf import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores.faiss import FAISS
-from langchain_openai.chat_models import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
-from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain
+from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain, _get_chat_history
+
+from utils.banco_perguntas import BancoPerguntas
+from utils.cache_embeddings import CacheEmbeddings
+from utils.busca_lexica import IndiceLexico
+from utils.cache_indices import CacheIndices, chave_indice
+from utils.cache_paginas import hash_pdf
+from utils.cache_respostas import CacheRespostas, digital_documentos
+from utils.catalogo_relatorios import CatalogoRelatorios
+from utils.clientes import chat_openai, embeddings_openai
+from utils.contexto import empacotar_contexto
+from utils.divisao import DivisorEstrutural
+from utils.extracao import extrair_documentos, iterar_paginas
+from utils.fabrica_indices import otimizar_vector_store
+from utils.falsos import EmbeddingsFalso, chat_falso
+from utils.fila_relatorios import FilaRelatorios
+from utils.indice_sessao import IndiceSessao
+from utils.ingestao import IngestaoIncremental, RetrieverIncremental
+from utils.memoria import MemoriaResumida
+from utils.quiz import Pergunta, gerar_em_paralelo, ler_perguntas_json
+from utils.reformulacao import precisa_reformular
+from utils.relatorio import nome_relatorio
+from utils.tokens import contar_tokens
 
 # 🔐 Carrega variáveis de ambiente
 _ = load_dotenv(find_dotenv())
@@ -20,26 +40,72 @@ _ = load_dotenv(find_dotenv())
 # 📁 Diretório onde os PDFs serão armazenados
 folder_files = Path(__file__).parent / "files"
 model_name = "gpt-3.5-turbo-0125"
+embedding_model_name = "text-embedding-ada-002"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 50
+SEPARADORES = ["\n\n", "\n", ".", " ", ""]
+# ✂️ "caracteres" (RecursiveCharacterTextSplitter) ou "tokens" (trechos medidos em tokens,
+# sem atravessar páginas nem títulos, com a página e a seção nos metadados)
+MODO_DIVISAO = os.getenv("MODO_DIVISAO", "caracteres")
+TOKENS_POR_TRECHO = int(os.getenv("TOKENS_POR_TRECHO", "256"))
+SOBREPOSICAO_TOKENS = int(os.getenv("SOBREPOSICAO_TOKENS", "32"))
 DEBUG = False  # Ativa logs no console do Streamlit para debug
-
-# 📄 Função para importar documentos
-def importar_documentos() -> list:
-    documentos = []
+# Orçamento de tokens do histórico do chat e turnos mantidos na íntegra
+MEMORIA_TOKENS = int(os.getenv("MEMORIA_TOKENS", "1500"))
+MEMORIA_TURNOS = int(os.getenv("MEMORIA_TURNOS", "4"))
+# Trechos recuperados por pergunta e orçamento de tokens do contexto montado a partir deles
+TRECHOS_RECUPERADOS = int(os.getenv("TRECHOS_RECUPERADOS", "6"))
+ORCAMENTO_CONTEXTO_TOKENS = int(os.getenv("ORCAMENTO_CONTEXTO_TOKENS", "1200"))
+# Similaridade mínima (cosseno) para reaproveitar a resposta de uma pergunta parecida
+LIMIAR_CACHE_RESPOSTAS = float(os.getenv("LIMIAR_CACHE_RESPOSTAS", "0.95"))
+# Processos usados para extrair o texto dos PDFs (1 = extração sequencial)
+WORKERS_EXTRACAO = int(os.getenv("WORKERS_EXTRACAO", os.cpu_count() or 1))
+# Perguntas pedidas em cada geração paralela do quiz (uma geração por trecho)
+PERGUNTAS_POR_TRECHO = int(os.getenv("PERGUNTAS_POR_TRECHO", "1"))
+# Endereço público do servidor de relatórios (flask_server)
+URL_RELATORIOS = os.getenv("URL_RELATORIOS", "http://127.0.0.1:5000").rstrip("/")
+# 🧪 1 = modelos falsos (utils/falsos.py) no chat e nos embeddings, para testar sem a OpenAI
+MODELOS_FALSOS = os.getenv("MODELOS_FALSOS", "0") == "1"
+RESPOSTA_FALSA = "Resposta de teste: o material explica o assunto passo a passo."
+
+# 📚 Aulas de exemplo: indexadas uma vez por processo e compartilhadas por todas as sessões
+AULAS_EXEMPLO = {
+    "Aula de leitura dinâmica": folder_files / "LIVRO LEITURA DINÂMICA_617127.pdf",
+    "Aula de Marketing de vendas": folder_files / "5ca0e9_424413178c6f4e218770dc8a08208fef_826388.pdf",
+}
+
+# 💾 Índices FAISS já construídos, reaproveitados entre sessões pelo hash do PDF
+cache_indices = CacheIndices()
+
+# 📂 Lista os PDFs da sessão atual
+def arquivos_sessao() -> list:
     session_id = st.session_state.get("session_id", "")
+    return sorted(folder_files.glob(f"*_{session_id}.pdf"))
 
-    for arquivo in folder_files.glob(f"*_{session_id}.pdf"):
-        loader = PyPDFLoader(str(arquivo))
-        documentos.extend(loader.load())
+# 📂 PDFs da sessão mais a aula de exemplo escolhida (lida direto de files/, sem cópia)
+def arquivos_material() -> list:
+    arquivos = arquivos_sessao()
+    aula = st.session_state.get("aula_exemplo")
+    if aula in AULAS_EXEMPLO and AULAS_EXEMPLO[aula].exists():
+        arquivos.append(AULAS_EXEMPLO[aula])
+    return arquivos
 
-    return documentos
+# 📄 Função para importar documentos
+def importar_documentos() -> list:
+    return extrair_documentos(arquivos_material(), workers=WORKERS_EXTRACAO)
 
 # ✂️ Função para dividir documentos
-def dividir_documentos(documentos: list) -> list:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=50,
-        separators=["\n\n", "\n", ".", " ", ""]
+def criar_splitter():
+    if MODO_DIVISAO == "tokens":
+        return DivisorEstrutural(TOKENS_POR_TRECHO, SOBREPOSICAO_TOKENS)
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=SEPARADORES
     )
+
+def dividir_documentos(documentos: list) -> list:
+    splitter = criar_splitter()
     documentos_divididos = splitter.split_documents(documentos)
 
     for i, doc in enumerate(documentos_divididos):
@@ -60,7 +126,7 @@ def criar_vector_store(documentos):
             st.error(f"❌ Documento na posição {i} não possui texto válido.")
             return None
 
-    embedding_model = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+    embedding_model = criar_embeddings()
 
     # Criação segura do vector store
     try:
@@ -72,34 +138,225 @@ def criar_vector_store(documentos):
         st.error("❌ Erro ao criar o índice FAISS. Verifique se os documentos têm conteúdo válido.")
         return None
 
-    return vector_store
+    # Aula grande demais para a busca exata: usa o índice aproximado da fábrica
+    return otimizar_vector_store(vector_store)
+
+# 🧬 Embeddings da OpenAI com cache por trecho (evita vetorizar o mesmo texto de novo),
+# um por processo para que as sessões compartilhem também as consultas recentes
+@st.cache_resource
+def criar_embeddings():
+    if MODELOS_FALSOS:
+        return EmbeddingsFalso()
+    return CacheEmbeddings(
+        embeddings_openai(embedding_model_name),
+        modelo=embedding_model_name
+    )
+
+# 💬 Modelo de chat da conversa: o da OpenAI (pool compartilhado) ou o falso
+def criar_chat():
+    if MODELOS_FALSOS:
+        return chat_falso([RESPOSTA_FALSA])
+    return chat_openai(model_name)
+
+# 🔑 Parâmetros que influenciam o índice (entram na chave do cache)
+def parametros_indice() -> dict:
+    if MODO_DIVISAO == "tokens":
+        divisao = {"modo_divisao": MODO_DIVISAO, "tokens": TOKENS_POR_TRECHO, "sobreposicao": SOBREPOSICAO_TOKENS}
+    else:
+        divisao = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP, "separators": SEPARADORES}
+    return {
+        **divisao,
+        "embeddings": "falso" if MODELOS_FALSOS else embedding_model_name,
+    }
+
+# 🔑 Chave do índice de uma aula de exemplo no cache (o hash do PDF é memorizado)
+def chave_aula_exemplo(nome: str) -> str:
+    return chave_indice(hash_pdf(AULAS_EXEMPLO[nome]), parametros_indice())
+
+# 📚 Índice somente leitura de uma aula de exemplo, carregado uma vez por processo
+@st.cache_resource(show_spinner="🔧 Preparando a aula de exemplo...")
+def indice_aula_exemplo(nome: str):
+    arquivo = AULAS_EXEMPLO[nome]
+    if not arquivo.exists():
+        return None
+
+    embedding_model = criar_embeddings()
+    chave = chave_aula_exemplo(nome)
+    if not cache_indices.contem(chave):
+        indice = criar_vector_store(dividir_documentos(extrair_documentos([arquivo], workers=WORKERS_EXTRACAO)))
+        if indice is None:
+            return None
+        cache_indices.salvar(chave, indice)
+
+    return cache_indices.carregar_mmap(chave, embedding_model)
+
+# 🔤 Índice léxico (BM25) da aula de exemplo, também um por processo. Se não estiver
+# no cache de índices, é refeito a partir do índice compartilhado (nunca guarda None)
+@st.cache_resource
+def lexico_aula_exemplo(nome: str) -> IndiceLexico:
+    lexico = cache_indices.carregar_lexico(chave_aula_exemplo(nome))
+    if lexico is None:
+        lexico = IndiceLexico.do_vector_store(indice_aula_exemplo(nome))
+    return lexico
+
+# 🔗 Liga (ou desliga, com None) a aula de exemplo ao índice da sessão, sem copiar arquivo nem vetores
+def anexar_aula_exemplo(nome=None) -> bool:
+    indice = obter_indice_sessao()
+    indice.compartilhados = {}
+    indice.lexicos_compartilhados = {}
+    if nome is None:
+        return True
+
+    compartilhado = indice_aula_exemplo(nome)
+    if compartilhado is None:
+        return False
+    chave = chave_aula_exemplo(nome)
+    indice.compartilhados[chave] = compartilhado
+    indice.lexicos_compartilhados[chave] = lexico_aula_exemplo(nome)
+    return True
+
+def obter_indice_sessao() -> IndiceSessao:
+    if "indice_sessao" not in st.session_state:
+        st.session_state["indice_sessao"] = IndiceSessao(criar_embeddings())
+    return st.session_state["indice_sessao"]
+
+# 🗑️ Tira o arquivo do índice da sessão e as respostas em cache que dependiam dele
+def remover_arquivo(indice: IndiceSessao, nome: str) -> None:
+    info = indice.arquivos.get(nome)
+    indice.remover(nome)
+    if info is not None:
+        cache_respostas().invalidar_documento(info["chave"])
+
+# 🔄 Sincroniza o índice da sessão com os PDFs atuais: remove os vetores dos
+# arquivos que saíram, reaproveita índices do cache e indexa em segundo plano
+# (extração → divisão → embeddings em lotes) só os PDFs realmente novos
+def sincronizar_indice(arquivos=None) -> IndiceSessao:
+    indice = obter_indice_sessao()
+    arquivos = arquivos_sessao() if arquivos is None else arquivos
+    parametros = parametros_indice()
+    atuais = {arquivo.name: chave_indice(hash_pdf(arquivo), parametros) for arquivo in arquivos}
+
+    # Ingestões encerradas saem da lista; os arquivos que uma delas não terminou
+    # (erro) saem do índice, com os trechos parciais, para serem indexados de novo.
+    # As que ainda rodam (ex.: upload anterior) continuam valendo para completo/erro
+    for ingestao in [i for i in indice.ingestoes if i.concluido.is_set()]:
+        if ingestao.erro is not None:
+            for nome in ingestao.arquivos_pendentes():
+                if indice.arquivos.get(nome, {}).get("chave") == ingestao.chaves[nome]:
+                    remover_arquivo(indice, nome)
+        indice.ingestoes.remove(ingestao)
+
+    for nome, info in list(indice.arquivos.items()):
+        if atuais.get(nome) != info["chave"]:
+            remover_arquivo(indice, nome)
+
+    pendentes = {}  # nome do arquivo -> chave no cache
+    for nome, chave in atuais.items():
+        if nome in indice.arquivos:
+            continue
+        indice.registrar(nome, chave)
+        cacheado = cache_indices.carregar(chave, indice.embeddings)
+        if cacheado is None:
+            pendentes[nome] = chave
+        else:
+            # Sem índice léxico no cache (None), os termos são contados de novo a partir do texto
+            indice.adicionar_indice(nome, chave, cacheado, cache_indices.carregar_lexico(chave))
+
+    if pendentes:
+        paginas = iterar_paginas(
+            [arquivo for arquivo in arquivos if arquivo.name in pendentes],
+            workers=WORKERS_EXTRACAO
+        )
+        ingestao = IngestaoIncremental(
+            paginas,
+            criar_splitter(),
+            indice.embeddings,
+            destino=indice,
+            chaves=pendentes,
+            ao_concluir_arquivo=lambda nome, chave, indice_arquivo, lexico: cache_indices.salvar(chave, indice_arquivo, lexico)
+        )
+        indice.ingestoes.append(ingestao.iniciar())
+        # O chat é liberado assim que as primeiras páginas estiverem indexadas
+        ingestao.aguardar_pronto()
 
+    return indice
 
-# 🎯 Gera perguntas de quiz (não alterado)
-def gerar_perguntas_quiz(documentos, qtd_perguntas=10):
-    chat = ChatOpenAI(model=model_name)
-    random.shuffle(documentos)
-    trechos_selecionados = documentos[:min(qtd_perguntas, len(documentos))]
-    texto_base = "\n".join([doc.page_content for doc in trechos_selecionados])
+
+# 🎯 Gera as perguntas de quiz de um trecho (uma chamada ao modelo, saída em JSON)
+def gerar_perguntas_trecho(texto_base, qtd_perguntas=1) -> list:
+    # Saída em JSON: cada geração é pequena e validada isoladamente
+    chat = chat_openai(model_name).bind(response_format={"type": "json_object"})
 
     prompt = f"""
-    A partir do texto abaixo, gere {qtd_perguntas} perguntas de múltipla escolha com 4 alternativas cada.
+    A partir do texto abaixo, gere {qtd_perguntas} pergunta(s) de múltipla escolha com 4 alternativas cada.
 
-    Para cada pergunta, siga este formato:
-    Pergunta: [texto da pergunta]
-    A) [opção 1]
-    B) [opção 2]
-    C) [opção 3]
-    D) [opção 4]
-    Resposta: [letra da opção correta]
-    Explicação: [breve explicação de por que essa é a resposta correta]
+    Responda somente com um JSON neste formato:
+    {{"perguntas": [{{"pergunta": "texto da pergunta", "opcoes": ["A) opção 1", "B) opção 2", "C) opção 3", "D) opção 4"], "resposta": "letra da opção correta", "explicacao": "breve explicação de por que essa é a resposta correta"}}]}}
 
     Texto base:
     {texto_base}
     """
 
     resposta = chat.invoke(prompt)
-    return resposta.content
+    return ler_perguntas_json(resposta.content)[:qtd_perguntas]
+
+# ⚡ Uma geração por trecho sorteado, em paralelo (limitado por MAX_GERACOES_PARALELAS)
+def gerar_perguntas_quiz(documentos, qtd_perguntas=10) -> list:
+    random.shuffle(documentos)
+    qtd_trechos = -(-qtd_perguntas // PERGUNTAS_POR_TRECHO)
+    trechos = [doc.page_content for doc in documentos[:qtd_trechos]]
+    return gerar_em_paralelo(trechos, gerar_perguntas_trecho, qtd_perguntas, PERGUNTAS_POR_TRECHO)
+
+# 🧪 Gera perguntas novas de um único PDF (usado para abastecer o banco de perguntas)
+def gerar_perguntas_documento(arquivo, qtd_perguntas=10) -> list:
+    documentos = dividir_documentos(extrair_documentos([arquivo], workers=WORKERS_EXTRACAO))
+    if not documentos:
+        return []
+    return gerar_perguntas_quiz(documentos, qtd_perguntas)
+
+# 🏦 Bancos de perguntas por hash de documento, compartilhados pelo processo
+@st.cache_resource
+def banco_perguntas() -> BancoPerguntas:
+    return BancoPerguntas(gerar_perguntas_documento)
+
+# 🔄 Abastece em segundo plano os bancos dos documentos que ainda têm poucas perguntas
+def preparar_quiz(arquivos=None) -> list:
+    banco = banco_perguntas()
+    arquivos = arquivos_material() if arquivos is None else arquivos
+    return [banco.reabastecer(hash_pdf(arquivo), arquivo) for arquivo in arquivos]
+
+# 🎲 Monta um quiz sorteando do banco; só espera geração se o banco ainda não tem perguntas suficientes
+def obter_quiz(qtd_perguntas=10) -> list:
+    banco = banco_perguntas()
+    arquivos = arquivos_material()
+    chaves = [hash_pdf(arquivo) for arquivo in arquivos]
+    st.session_state.pop("erro_quiz", None)
+
+    if sum(len(banco.perguntas(chave)) for chave in chaves) < qtd_perguntas:
+        futuros = [futuro for futuro in preparar_quiz(arquivos) if futuro is not None]
+        # Sorteia assim que houver perguntas para este quiz; o resto do reabastecimento segue em segundo plano
+        if banco.aguardar(chaves, qtd_perguntas) < qtd_perguntas:
+            for futuro in futuros:
+                try:
+                    futuro.result()
+                except Exception as e:
+                    # O erro aparece na tela do quiz, que usa as perguntas que já estiverem no banco
+                    st.session_state.erro_quiz = f"❌ Erro ao gerar as perguntas do quiz: {e}"
+
+    return [Pergunta.de_dict(pergunta) for pergunta in banco.sortear(chaves, qtd_perguntas)]
+
+# 📨 Fila de relatórios do quiz, compartilhada pelo processo
+@st.cache_resource
+def fila_relatorios() -> FilaRelatorios:
+    # Import tardio: o avaliador cria o cliente da OpenAI ao ser importado (depois do .env carregado)
+    from utils.avaliador import gerar_feedback_ia
+    return FilaRelatorios(gerar_feedback_ia, ao_salvar=CatalogoRelatorios().registrar)
+
+# 📥 Enfileira o relatório do quiz e devolve (id do job, nome do arquivo HTML)
+def enviar_relatorio(matricula, arquivo, acertos, respostas_usuario) -> tuple:
+    data_hora = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    nome = nome_relatorio(matricula, arquivo, data_hora)
+    return fila_relatorios().enviar(nome, data_hora, matricula, arquivo, acertos, respostas_usuario), nome
 
 # 🔥 Função para gerar o prompt dinamicamente
 def gerar_prompt_dinamico():
@@ -152,32 +409,37 @@ Agora responda:
 
 # 🚀 Função principal para criar o chain
 def cria_chain_conversa():
-    documentos = importar_documentos()
+    arquivos = arquivos_sessao()
+    aula = st.session_state.get("aula_exemplo")
 
-    if not documentos:
+    if not arquivos and not aula:
         st.session_state.erro_chat = "❌ Nenhum arquivo encontrado para inicializar o chat. Por favor, carregue um arquivo PDF."
         return None
 
-    documentos = dividir_documentos(documentos)
-    vector_store = criar_vector_store(documentos)
+    indice = sincronizar_indice(arquivos)
+    anexar_aula_exemplo(aula)
 
-    if vector_store is None:
-        st.session_state.erro_chat = "❌ Não foi possível criar o vector store. Verifique os documentos."
+    if indice.vazio:
+        # Falha na indexação em segundo plano: mostra o erro real em vez da mensagem genérica
+        if indice.erro_ingestao is not None:
+            st.session_state.erro_chat = f"❌ Erro ao indexar os documentos: {indice.erro_ingestao}"
+        else:
+            st.session_state.erro_chat = "❌ Não foi possível criar o vector store. Verifique os documentos."
         return None
 
-    chat_model = ChatOpenAI(model=model_name)
+    chat_model = criar_chat()
 
-    memory = ConversationBufferMemory(
+    # Histórico limitado: turnos antigos viram um resumo, o prompt para de crescer
+    memory = MemoriaResumida(
+        llm=chat_model,
+        max_token_limit=MEMORIA_TOKENS,
+        turnos_recentes=MEMORIA_TURNOS,
         return_messages=True,
         memory_key="chat_history",
         output_key="answer"
     )
 
-    try:
-        retriever = vector_store.as_retriever()
-    except AttributeError:
-        st.session_state.erro_chat = "❌ O vector store não possui o método 'as_retriever'. Verifique a criação do vector store."
-        return None
+    retriever = RetrieverIncremental(indice=indice, k=TRECHOS_RECUPERADOS)
 
     # Limpa mensagens de erro anteriores, se houve sucesso até aqui
     st.session_state.pop("erro_chat", None)
@@ -205,17 +467,88 @@ def cria_chain_conversa():
 
     return chain
 
-# 🗨️ Função para interagir com o usuário (com atualização dinâmica do prompt)
-def responder_usuario(pergunta_usuario):
-    # Gera novo prompt dinâmico a cada interação
-    prompt_template = gerar_prompt_dinamico()
+# 💡 Cache semântico de respostas, compartilhado por todas as sessões do processo
+@st.cache_resource
+def cache_respostas() -> CacheRespostas:
+    return CacheRespostas(criar_embeddings(), limiar=LIMIAR_CACHE_RESPOSTAS)
 
-    # Atualiza o prompt do chain em runtime
-    st.session_state["chain"].combine_docs_chain.llm_chain.prompt = prompt_template
+# 🗨️ Responde em streaming: devolve os tokens da resposta conforme o modelo os gera.
+# Segue os mesmos passos do ConversationalRetrievalChain (reformula a pergunta com
+# o histórico, busca os trechos, monta o prompt) e grava o turno na memória ao final
+def responder_usuario_stream(pergunta_usuario):
+    chain = st.session_state["chain"]
+    inicio = time.perf_counter()
 
-    resposta = st.session_state["chain"].invoke({"question": pergunta_usuario})
+    # Gera novo prompt dinâmico a cada interação
+    prompt_template = gerar_prompt_dinamico()
+    chain.combine_docs_chain.llm_chain.prompt = prompt_template
+
+    historico = chain.memory.load_memory_variables({})[chain.memory.memory_key]
+    historico_str = (chain.get_chat_history or _get_chat_history)(historico)
+
+    metricas = {"cache": False, "chamadas_llm": 0, "tokens_prompt": 0, "tokens_economizados": 0,
+                "tokens_historico": contar_tokens(historico_str)}
+    resposta = None
+    ttft = None
+
+    # Sem histórico a resposta depende só da pergunta e dos documentos: tenta o cache,
+    # desde que o material esteja todo indexado (um índice parcial daria outra resposta)
+    usar_cache = not historico_str and obter_indice_sessao().completo
+    if usar_cache:
+        cache = cache_respostas()
+        chaves_documentos = obter_indice_sessao().chaves_documentos()
+        digital = digital_documentos(chaves_documentos)
+        vetor_pergunta = cache.vetorizar(pergunta_usuario)
+        resposta = cache.buscar(digital, vetor_pergunta)
+        if resposta is not None:
+            metricas["cache"] = True
+            ttft = time.perf_counter() - inicio
+            yield resposta
+
+    if resposta is None:
+        # Só reescreve a pergunta com o histórico quando ela depende dele
+        # (ex.: "e o TCP?"); perguntas autônomas vão direto para a busca
+        pergunta = pergunta_usuario
+        if precisa_reformular(pergunta_usuario, historico_str):
+            pergunta = chain.question_generator.invoke(
+                {"question": pergunta_usuario, "chat_history": historico_str}
+            )[chain.question_generator.output_key]
+            metricas["chamadas_llm"] += 1
+
+        documentos = chain.retriever.invoke(pergunta)
+        # Funde trechos vizinhos, tira os quase repetidos e respeita o orçamento de tokens
+        documentos, empacotamento = empacotar_contexto(documentos, ORCAMENTO_CONTEXTO_TOKENS)
+        metricas.update(empacotamento)
+        entradas = chain.combine_docs_chain._get_inputs(documentos, question=pergunta, chat_history=historico_str)
+        prompt = prompt_template.format(**{k: entradas[k] for k in prompt_template.input_variables})
+        metricas["tokens_prompt"] = contar_tokens(prompt)
+
+        partes = []
+        for pedaco in chain.combine_docs_chain.llm_chain.llm.stream(prompt):
+            if not pedaco.content:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - inicio
+            partes.append(pedaco.content)
+            yield pedaco.content
+
+        resposta = "".join(partes)
+        metricas["chamadas_llm"] += 1
+        if usar_cache:
+            cache.guardar(digital, chaves_documentos, vetor_pergunta, resposta, time.perf_counter() - inicio)
+
+    resumos_antes = chain.memory.resumos_gerados
+    chain.memory.save_context({"question": pergunta_usuario}, {"answer": resposta})
+    metricas["chamadas_llm"] += chain.memory.resumos_gerados - resumos_antes
+
+    # 📊 Tempo até o primeiro token, latência total, tamanho do prompt e chamadas ao modelo de cada turno
+    metricas["ttft"] = ttft if ttft is not None else time.perf_counter() - inicio
+    metricas["latencia_total"] = time.perf_counter() - inicio
+    st.session_state.setdefault("metricas_turnos", []).append(metricas)
 
     # Atualiza contador total de interações
     st.session_state.num_interacoes += 1
 
-    return resposta["answer"]
+# 🗨️ Função para interagir com o usuário (com atualização dinâmica do prompt)
+def responder_usuario(pergunta_usuario):
+    return "".join(responder_usuario_stream(pergunta_usuario))
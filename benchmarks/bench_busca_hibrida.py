@@ -0,0 +1,110 @@
+"""
+Recall@k e latência da busca só por vetores (FAISS) contra a busca híbrida
+(FAISS + BM25 fundidos por RRF) nos PDFs de redes da pasta files/.
+
+As consultas são trechos curtos em torno de um termo técnico (sigla ou número,
+como "TCP" ou "443") com algumas palavras removidas; o acerto é recuperar um
+trecho que contém a frase original. Sem a opção "openai", os vetores vêm de um
+modelo local de n-gramas de caracteres (substituto offline dos embeddings).
+
+Uso: python benchmarks/bench_busca_hibrida.py [consultas] [k] [openai]
+"""
+import hashlib
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.cache_indices import hash_arquivo  # noqa: E402
+from utils.extracao import extrair_documentos  # noqa: E402
+from utils.indice_sessao import IndiceSessao  # noqa: E402
+
+PASTA_FILES = Path(__file__).parent.parent / "files"
+RE_TERMO = re.compile(r"\b(?:[A-Z]{2,}[0-9]?|\d{2,})\b")
+
+
+class EmbeddingsNgramas(Embeddings):
+    """Vetores por hashing de n-gramas de 3 a 5 caracteres, normalizados."""
+
+    def __init__(self, dimensao=384):
+        self.dimensao = dimensao
+
+    def _vetor(self, texto: str) -> list:
+        texto = f" {texto.lower()} "
+        vetor = np.zeros(self.dimensao, dtype=np.float32)
+        for n in (3, 4, 5):
+            for i in range(len(texto) - n + 1):
+                digest = hashlib.blake2b(texto[i:i + n].encode("utf-8"), digest_size=4).digest()
+                vetor[int.from_bytes(digest, "little") % self.dimensao] += 1
+        return (vetor / (np.linalg.norm(vetor) or 1.0)).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._vetor(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._vetor(text)
+
+
+def montar_consultas(trechos: list, quantidade: int, aleatorio: random.Random) -> list:
+    consultas = []
+    while len(consultas) < quantidade:
+        texto = aleatorio.choice(trechos)
+        termos = list(RE_TERMO.finditer(texto))
+        if not termos:
+            continue
+        palavras = texto[:termos[0].start()].split()[-4:] + texto[termos[0].start():].split()[:5]
+        frase = " ".join(palavras)
+        # Tira algumas palavras (menos o termo técnico) para a consulta não ser cópia literal
+        consulta = " ".join(p for i, p in enumerate(palavras) if i % 3 != 1 or RE_TERMO.search(p))
+        relevantes = {i for i, t in enumerate(trechos) if frase in " ".join(t.split())}
+        if relevantes:
+            consultas.append((consulta, relevantes))
+    return consultas
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    usar_openai = "openai" in sys.argv[3:]
+
+    # PDFs de redes sem repetição (a pasta guarda cópias do mesmo arquivo com sufixos diferentes)
+    arquivos = list({hash_arquivo(a): a for a in sorted(PASTA_FILES.glob("redes*.pdf"))}.values())
+    paginas = extrair_documentos(arquivos)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=50, separators=["\n\n", "\n", ".", " ", ""])
+    trechos = [t.page_content for t in splitter.split_documents(paginas)]
+
+    if usar_openai:
+        from utils.clientes import embeddings_openai
+        embeddings = embeddings_openai("text-embedding-ada-002")
+    else:
+        embeddings = EmbeddingsNgramas()
+
+    inicio = time.perf_counter()
+    vetores = embeddings.embed_documents(trechos)
+    indice = IndiceSessao(embeddings)
+    indice.registrar("redes", "redes")
+    indice.adicionar("redes", "redes", trechos, vetores, [{"posicao": i} for i in range(len(trechos))])
+    print(f"PDFs: {len(arquivos)} | trechos: {len(trechos)} | indexação: {time.perf_counter() - inicio:.1f}s "
+          f"| embeddings: {'OpenAI' if usar_openai else 'n-gramas locais'}")
+
+    consultas = montar_consultas(trechos, quantidade, random.Random(42))
+    print(f"Consultas: {len(consultas)} | k={k}")
+    print(f"{'busca':10s} {'recall@k':>9} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for rotulo, hibrida in (("vetorial", False), ("híbrida", True)):
+        acertos, tempos = 0, []
+        for consulta, relevantes in consultas:
+            comeco = time.perf_counter()
+            documentos = indice.buscar(consulta, k=k, hibrida=hibrida)
+            tempos.append(time.perf_counter() - comeco)
+            acertos += any(d.metadata["posicao"] in relevantes for d in documentos)
+        tempos.sort()
+        print(f"{rotulo:10s} {acertos / len(consultas):>9.2%} {statistics.median(tempos) * 1000:>9.2f} "
+              f"{tempos[int(0.95 * len(tempos))] * 1000:>9.2f}")
@@ -0,0 +1,53 @@
+"""
+Primeira e segunda leitura dos PDFs da pasta files/ com o cache de páginas
+(extração pelo pypdf e gravação no cache, depois leitura do arquivo mapeado
+em memória) e o acesso a uma única página sem decodificar as demais.
+
+Uso: python benchmarks/bench_cache_paginas.py [workers]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ["CACHE_PAGINAS_DIR"] = tempfile.mkdtemp()
+
+from utils.cache_paginas import cache_paginas  # noqa: E402
+from utils.extracao import extrair_documentos  # noqa: E402
+
+PASTA_FILES = Path(__file__).parent.parent / "files"
+
+
+def medir(arquivos, workers) -> tuple:
+    inicio = time.perf_counter()
+    documentos = extrair_documentos(arquivos, workers=workers)
+    return time.perf_counter() - inicio, documentos
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    arquivos = sorted(PASTA_FILES.glob("*.pdf"))
+
+    tempo_primeira, primeira = medir(arquivos, workers)
+    tempo_segunda, segunda = medir(arquivos, workers)
+    assert [d.page_content for d in primeira] == [d.page_content for d in segunda], "texto do cache divergiu"
+
+    aleatorio = random.Random(0)
+    tempos = []
+    for _ in range(200):
+        documento = aleatorio.choice(primeira)
+        inicio = time.perf_counter()
+        texto = cache_paginas().pagina(documento.metadata["source"], documento.metadata["page"])
+        tempos.append(time.perf_counter() - inicio)
+        assert texto == documento.page_content
+
+    tamanho = sum(p.stat().st_size for p in Path(os.environ["CACHE_PAGINAS_DIR"]).glob("*.pag"))
+    print(f"Arquivos: {len(arquivos)} | Páginas: {len(primeira)} | cache em disco: {tamanho / 1024:.0f} KB")
+    print(f"1ª leitura (pypdf + gravação): {tempo_primeira * 1000:8.1f} ms")
+    print(f"2ª leitura (cache):            {tempo_segunda * 1000:8.1f} ms  ({tempo_primeira / tempo_segunda:.0f}x)")
+    print(f"Uma página (p50):              {statistics.median(tempos) * 1000:8.3f} ms")
@@ -0,0 +1,75 @@
+"""
+Busca de relatórios com 100 mil arquivos em relatorioQuiz/: listagem da pasta
+com busca por substring a cada requisição (versão anterior) versus o catálogo
+SQLite com busca por prefixo, paginação e ordenação.
+
+Uso: python benchmarks/bench_catalogo.py [quantidade]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.catalogo_relatorios import CatalogoRelatorios  # noqa: E402
+from utils.relatorio import nome_relatorio  # noqa: E402
+
+CONSULTAS = 50
+PDFS = ["redes.pdf", "redes2.pdf", "seguranca.pdf", "banco_dados.pdf", "marketing.pdf"]
+
+
+def busca_antiga(pasta, matricula):
+    return [arq for arq in os.listdir(pasta) if matricula in arq]
+
+
+def medir(funcao, argumentos) -> float:
+    tempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        funcao(argumento)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    aleatorio = random.Random(42)
+    matriculas = [f"{aleatorio.randint(2020000, 2025999)}" for _ in range(quantidade // 20)]
+    inicio_semestre = datetime(2023, 2, 1)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        print(f"Criando {quantidade} relatórios vazios...")
+        for i in range(quantidade):
+            data_hora = (inicio_semestre + timedelta(minutes=7 * i)).strftime("%Y-%m-%d_%H-%M-%S")
+            Path(pasta, nome_relatorio(aleatorio.choice(matriculas), aleatorio.choice(PDFS), data_hora)).touch()
+
+        catalogo = CatalogoRelatorios(caminho=Path(pasta) / "catalogo.sqlite", pasta=pasta)
+        inicio = time.perf_counter()
+        catalogo.sincronizar()
+        print(f"Sincronização inicial do catálogo: {time.perf_counter() - inicio:.2f}s")
+
+        inicio = time.perf_counter()
+        for i in range(1000):
+            catalogo.registrar(nome_relatorio("9999999", "redes.pdf", f"2030-01-01_00-{i // 60:02d}-{i % 60:02d}"))
+        print(f"Registro pelo gancho: {(time.perf_counter() - inicio) / 1000 * 1000:.2f} ms/relatório")
+
+        alvos = [aleatorio.choice(matriculas) for _ in range(CONSULTAS)]
+        prefixos = [m[:5] for m in alvos]
+
+        antiga = medir(lambda m: busca_antiga(pasta, m), alvos)
+        exata = medir(lambda m: catalogo.buscar(m), alvos)
+        prefixo = medir(lambda m: catalogo.buscar(m), prefixos)
+        pagina_funda = medir(lambda m: catalogo.buscar(m, pagina=20, ordem="arquivo"), prefixos)
+        sem_filtro = medir(lambda m: catalogo.buscar("", pagina=100, ordem="recentes"), alvos)
+
+        print(f"{'consulta':45s} {'mediana (ms)':>12}")
+        print(f"{'listdir + substring (anterior)':45s} {antiga * 1000:>12.2f}")
+        print(f"{'catálogo: matrícula completa, página 1':45s} {exata * 1000:>12.2f}")
+        print(f"{'catálogo: prefixo de 5 dígitos, página 1':45s} {prefixo * 1000:>12.2f}")
+        print(f"{'catálogo: prefixo, página 20, por arquivo':45s} {pagina_funda * 1000:>12.2f}")
+        print(f"{'catálogo: sem filtro, página 100, recentes':45s} {sem_filtro * 1000:>12.2f}")
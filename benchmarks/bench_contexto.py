@@ -0,0 +1,70 @@
+"""
+Tokens de contexto por pergunta antes e depois do empacotamento (fusão de
+trechos vizinhos, remoção de quase repetidos e orçamento de tokens), nos PDFs
+de redes da pasta files/ (incluindo as cópias repetidas de um mesmo PDF, como
+acontece quando o aluno envia o arquivo duas vezes), com a busca híbrida.
+
+Uso: python benchmarks/bench_contexto.py [consultas] [k] [orcamento_tokens]
+"""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_busca_hibrida import EmbeddingsNgramas, montar_consultas  # noqa: E402
+
+from utils.contexto import empacotar_contexto  # noqa: E402
+from utils.extracao import extrair_documentos  # noqa: E402
+from utils.indice_sessao import IndiceSessao  # noqa: E402
+from utils.ingestao import iterar_trechos  # noqa: E402
+from utils.tokens import contar_tokens  # noqa: E402
+
+PASTA_FILES = Path(__file__).parent.parent / "files"
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    orcamento = int(sys.argv[3]) if len(sys.argv) > 3 else 1200
+
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=50, separators=["\n\n", "\n", ".", " ", ""])
+    arquivos = sorted(PASTA_FILES.glob("redes*.pdf"))
+    trechos = list(iterar_trechos(extrair_documentos(arquivos), splitter))
+
+    embeddings = EmbeddingsNgramas()
+    indice = IndiceSessao(embeddings)
+    for arquivo in arquivos:
+        indice.registrar(arquivo.name, arquivo.name)
+    for trecho in trechos:
+        trecho.metadata["posicao"] = len(indice.lexico)
+        indice.adicionar(trecho.metadata["source"], trecho.metadata["source"], [trecho.page_content],
+                         embeddings.embed_documents([trecho.page_content]), [trecho.metadata])
+
+    textos = [t.page_content for t in trechos]
+    consultas = montar_consultas(textos, quantidade, random.Random(7))
+    antes, depois, tempos, mantidos_antes, mantidos_depois = [], [], [], 0, 0
+    totais = {}
+    for consulta, relevantes in consultas:
+        documentos = indice.buscar(consulta, k=k)
+        antes.append(sum(contar_tokens(d.page_content) for d in documentos))
+        relevantes_texto = {textos[i] for i in relevantes}
+        mantidos_antes += any(d.page_content in relevantes_texto for d in documentos)
+
+        inicio = time.perf_counter()
+        empacotados, estatisticas = empacotar_contexto(documentos, orcamento)
+        tempos.append(time.perf_counter() - inicio)
+        depois.append(estatisticas["tokens_contexto"])
+        mantidos_depois += any(any(r in d.page_content for r in relevantes_texto) for d in empacotados)
+        for chave in ("trechos_mesclados", "trechos_duplicados", "trechos_fora_orcamento"):
+            totais[chave] = totais.get(chave, 0) + estatisticas[chave]
+
+    print(f"PDFs: {len(arquivos)} | trechos: {len(trechos)} | consultas: {len(consultas)} | k={k} | orçamento: {orcamento} tokens")
+    print(f"tokens de contexto por pergunta: {statistics.mean(antes):.0f} -> {statistics.mean(depois):.0f} "
+          f"({1 - sum(depois) / sum(antes):.1%} economizados)")
+    print(f"trecho relevante no contexto: {mantidos_antes / len(consultas):.1%} -> {mantidos_depois / len(consultas):.1%}")
+    print("por pergunta: " + ", ".join(f"{c} {v / len(consultas):.2f}" for c, v in totais.items()))
+    print(f"empacotamento: p50 {statistics.median(tempos) * 1000:.2f} ms")
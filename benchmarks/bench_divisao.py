@@ -0,0 +1,46 @@
+"""
+Vazão (MB/s de texto) e regularidade do tamanho dos trechos em tokens na
+divisão por caracteres (RecursiveCharacterTextSplitter) e na divisão por
+tokens com estrutura (DivisorEstrutural), sobre os PDFs da pasta files/.
+A extração do texto é feita uma vez, antes das medições.
+
+Uso: python benchmarks/bench_divisao.py [repeticoes]
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.divisao import DivisorEstrutural  # noqa: E402
+from utils.extracao import extrair_documentos  # noqa: E402
+from utils.tokens import _codificador, contar_tokens  # noqa: E402
+
+PASTA_FILES = Path(__file__).parent.parent / "files"
+
+if __name__ == "__main__":
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    paginas = extrair_documentos(sorted(PASTA_FILES.glob("*.pdf")))
+    megabytes = sum(len(p.page_content.encode("utf-8")) for p in paginas) / 1024 / 1024
+
+    modos = [
+        ("caracteres (1000/50)", lambda: RecursiveCharacterTextSplitter(
+            chunk_size=1000, chunk_overlap=50, separators=["\n\n", "\n", ".", " ", ""])),
+        ("tokens (256/32)", lambda: DivisorEstrutural(256, 32)),
+    ]
+    contagem = "tiktoken" if _codificador() is not None else "estimativa de 4 caracteres/token (tiktoken offline)"
+    print(f"Páginas: {len(paginas)} | texto: {megabytes:.2f} MB | repetições: {repeticoes} | tokens: {contagem}")
+    print(f"{'modo':22s} {'MB/s':>7} {'trechos':>8} {'tokens média':>13} {'desvio':>7} {'p5':>5} {'p95':>5} {'máx':>5}")
+    for rotulo, criar in modos:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            trechos = criar().split_documents(paginas)
+            tempos.append(time.perf_counter() - inicio)
+        tamanhos = sorted(contar_tokens(t.page_content) for t in trechos)
+        print(f"{rotulo:22s} {megabytes / statistics.median(tempos):>7.1f} {len(trechos):>8} "
+              f"{statistics.mean(tamanhos):>13.0f} {statistics.pstdev(tamanhos):>7.0f} "
+              f"{tamanhos[len(tamanhos) // 20]:>5} {tamanhos[len(tamanhos) * 19 // 20]:>5} {tamanhos[-1]:>5}")
@@ -0,0 +1,80 @@
+"""
+Recall@10, latência por consulta, memória e tempo de construção dos índices
+criados pela fábrica (Flat, IVF, HNSW e variantes quantizadas) em coleções
+sintéticas com agrupamentos, como os trechos de vários cursos. O nprobe /
+efSearch de cada índice é o escolhido pelo ajuste automático.
+
+Uso: python benchmarks/bench_indices_ann.py [dimensao] [tamanhos...]
+     python benchmarks/bench_indices_ann.py 128 10000 100000 1000000
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.fabrica_indices import criar_indice, descricao_indice  # noqa: E402
+
+CONSULTAS = 200
+K = 10
+CONFIGURACOES = [
+    ("Flat (exato)", None, ""),
+    ("IVF", "ivf", ""),
+    ("IVF + SQ8", "ivf", "sq8"),
+    ("IVF + PQ", "ivf", "pq"),
+    ("HNSW", "hnsw", ""),
+    ("HNSW + SQ8", "hnsw", "sq8"),
+]
+
+
+# 🎲 Vetores normalizados em torno de centros aleatórios (temas), como embeddings de texto
+def colecao(total: int, dimensao: int, aleatorio) -> np.ndarray:
+    temas = aleatorio.standard_normal((max(10, total // 1000), dimensao)).astype(np.float32)
+    vetores = temas[aleatorio.integers(0, len(temas), total)]
+    vetores += 0.6 * aleatorio.standard_normal((total, dimensao)).astype(np.float32)
+    return vetores / np.linalg.norm(vetores, axis=1, keepdims=True)
+
+
+def parametro(indice) -> str:
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is not None:
+        return f"nprobe={ivf.nprobe}"
+    if hasattr(indice, "hnsw"):
+        return f"efSearch={indice.hnsw.efSearch}"
+    return "-"
+
+
+if __name__ == "__main__":
+    dimensao = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    tamanhos = [int(t) for t in sys.argv[2:]] or [10_000, 100_000]
+    faiss.omp_set_num_threads(1)  # latência de uma consulta por vez, como no chat
+
+    for total in tamanhos:
+        aleatorio = np.random.default_rng(total)
+        dados = colecao(total + CONSULTAS, dimensao, aleatorio)
+        vetores, consultas = dados[:total], dados[total:]
+        _, exatos = faiss.knn(consultas, vetores, K)
+
+        print(f"\nTrechos: {total} | dimensão: {dimensao} | consultas: {CONSULTAS}")
+        print(f"{'índice':14s} {'descrição':16s} {'ajuste':>13} {'construção (s)':>15} {'memória (MB)':>13} "
+              f"{'recall@10':>10} {'p50 (ms)':>9}")
+        for rotulo, tipo, quantizacao in CONFIGURACOES:
+            limiar = total + 1 if tipo is None else 0
+            inicio = time.perf_counter()
+            indice = criar_indice(vetores, tipo or "ivf", quantizacao, limiar)
+            construcao = time.perf_counter() - inicio
+            memoria = faiss.serialize_index(indice).nbytes / 1024 / 1024
+
+            tempos, acertos = [], 0
+            for consulta, exato in zip(consultas, exatos):
+                comeco = time.perf_counter()
+                _, encontrados = indice.search(consulta[None, :], K)
+                tempos.append(time.perf_counter() - comeco)
+                acertos += len(set(encontrados[0]) & set(exato))
+            descricao = descricao_indice(total, dimensao, tipo or "ivf", quantizacao, limiar)
+            print(f"{rotulo:14s} {descricao:16s} {parametro(indice):>13} {construcao:>15.1f} {memoria:>13.1f} "
+                  f"{acertos / (K * CONSULTAS):>10.2%} {statistics.median(tempos) * 1000:>9.3f}")
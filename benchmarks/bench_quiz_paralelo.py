@@ -0,0 +1,121 @@
+"""
+Compara a latência (p50/p95) da geração do quiz numa única chamada ao modelo
+com a geração dividida por trechos em chamadas paralelas, usando o servidor
+falso da OpenAI com atraso proporcional ao tamanho da resposta.
+
+Uso: python benchmarks/bench_quiz_paralelo.py [repeticoes] [atraso_por_caractere] [falha_a_cada]
+"""
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from utils.servidor_falso import iniciar_servidor_falso  # noqa: E402
+
+QTD_PERGUNTAS = 10
+ATRASO_FIXO = 0.05  # fila + tempo até o primeiro token
+
+
+def _pergunta(i: int) -> dict:
+    return {
+        "pergunta": f"Qual é a função da camada {i} no modelo de referência estudado?",
+        "opcoes": [f"A) Alternativa {i}.1", f"B) Alternativa {i}.2", f"C) Alternativa {i}.3", f"D) Alternativa {i}.4"],
+        "resposta": "B",
+        "explicacao": f"A camada {i} é responsável pela etapa descrita no texto base.",
+    }
+
+
+def criar_responder(falha_a_cada: int):
+    contador = {"chamadas": 0}
+
+    def responder(mensagens: list) -> str:
+        prompt = mensagens[-1]["content"]
+        quantidade = int(re.search(r"gere (\d+)", prompt).group(1))
+        contador["chamadas"] += 1
+        inicio = contador["chamadas"] * 100
+        perguntas = [_pergunta(inicio + i) for i in range(quantidade)]
+
+        if "JSON" in prompt:
+            if falha_a_cada and contador["chamadas"] % falha_a_cada == 0:
+                return '{"perguntas": [{"pergunta": "incompleta"'
+            return json.dumps({"perguntas": perguntas}, ensure_ascii=False)
+        return "\n\n".join(
+            f"Pergunta: {p['pergunta']}\n" + "\n".join(p["opcoes"])
+            + f"\nResposta: {p['resposta']}\nExplicação: {p['explicacao']}"
+            for p in perguntas
+        )
+
+    return responder
+
+
+# 🧩 Lê a saída em texto livre da chamada única (no formato devolvido por criar_responder)
+def separar_perguntas(texto: str) -> list:
+    perguntas = []
+    for bloco in texto.strip().split("\n\n"):
+        linhas = bloco.strip().split("\n")
+        if len(linhas) != 7 or not linhas[0].startswith("Pergunta:"):
+            continue
+        perguntas.append({
+            "pergunta": linhas[0][len("Pergunta:"):].strip(),
+            "opcoes": linhas[1:5],
+            "resposta": linhas[5].split(":")[-1].strip()[:1],
+            "explicacao": linhas[6].split(":", 1)[-1].strip(),
+        })
+    return perguntas
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+if __name__ == "__main__":
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    atraso_por_caractere = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0005
+    falha_a_cada = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    servidor, url = iniciar_servidor_falso(
+        atraso=ATRASO_FIXO, atraso_por_caractere=atraso_por_caractere, responder=criar_responder(falha_a_cada)
+    )
+    os.environ["OPENAI_BASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "chave-falsa")
+
+    import backend  # noqa: E402
+    from utils.clientes import chat_openai  # noqa: E402
+    from utils.quiz import MAX_GERACOES_PARALELAS  # noqa: E402
+
+    documentos = [Document(page_content=f"Trecho {i} sobre redes de computadores. " * 20) for i in range(40)]
+
+    # Abordagem anterior: todas as perguntas num único prompt com saída em texto livre
+    def chamada_unica():
+        texto_base = "\n".join(doc.page_content for doc in documentos[:QTD_PERGUNTAS])
+        prompt = f"""
+        A partir do texto abaixo, gere {QTD_PERGUNTAS} perguntas de múltipla escolha com 4 alternativas cada.
+        Texto base:
+        {texto_base}
+        """
+        return separar_perguntas(chat_openai(backend.model_name).invoke(prompt).content)
+
+    def paralela():
+        return backend.gerar_perguntas_quiz(list(documentos), QTD_PERGUNTAS)
+
+    print(f"Perguntas: {QTD_PERGUNTAS} | Repetições: {repeticoes} | Gerações simultâneas: {MAX_GERACOES_PARALELAS} "
+          f"| Perguntas por trecho: {backend.PERGUNTAS_POR_TRECHO}")
+    for nome, gerar in (("Chamada única", chamada_unica), ("Paralela por trecho", paralela)):
+        gerar()  # aquece o pool de conexões
+        tempos, obtidas = [], []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            obtidas.append(len(gerar()))
+            tempos.append(time.perf_counter() - inicio)
+        print(f"{nome:20s} p50={percentil(tempos, 50):.3f}s p95={percentil(tempos, 95):.3f}s "
+              f"perguntas/quiz={statistics.mean(obtidas):.1f}")
+
+    servidor.shutdown()
@@ -0,0 +1,95 @@
+"""
+Vazão do flask_server servindo um relatório sob carga concorrente local:
+HTML sem compressão via send_from_directory (versão anterior), variante gzip
+pré-comprimida com ETag e revalidação condicional (304).
+
+Uso: python benchmarks/bench_relatorios_http.py [clientes] [requisicoes]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from werkzeug.serving import make_server
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pasta = tempfile.mkdtemp()
+os.environ["CATALOGO_RELATORIOS"] = os.path.join(pasta, "catalogo.sqlite")
+sys.path.insert(0, str(Path(__file__).parent.parent / "flask_server"))
+
+import server  # noqa: E402
+from flask import send_from_directory  # noqa: E402
+
+from utils.relatorio import montar_relatorio, nome_relatorio, salvar_relatorio  # noqa: E402
+
+server.RELATORIO_DIR = pasta
+
+
+# Rota como era antes: arquivo sem compressão e sem validadores
+@server.app.route("/antigo/<nome_arquivo>")
+def relatorio_antigo(nome_arquivo):
+    return send_from_directory(pasta, nome_arquivo)
+
+
+def carga(url, clientes, requisicoes, cabecalhos) -> tuple:
+    por_cliente = requisicoes // clientes
+    bytes_recebidos = []
+
+    def cliente(_):
+        total = 0
+        with httpx.Client(headers=cabecalhos) as http:
+            for _ in range(por_cliente):
+                resposta = http.get(url)
+                assert resposta.status_code in (200, 304), resposta.status_code
+                total += resposta.num_bytes_downloaded  # bytes na rede (antes de descomprimir)
+        bytes_recebidos.append(total)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(clientes) as executor:
+        list(executor.map(cliente, range(clientes)))
+    duracao = time.perf_counter() - inicio
+    return por_cliente * clientes / duracao, sum(bytes_recebidos) / (por_cliente * clientes)
+
+
+if __name__ == "__main__":
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    respostas = [
+        {
+            "pergunta": f"Qual é a função da camada {i} no modelo de referência estudado?",
+            "resposta_usuario": "A", "texto_resposta_usuario": f"A) Opção {i}", "resposta_correta": "B",
+            "correta": i % 2 == 0, "explicacao": f"A camada {i} cuida da etapa descrita no material da aula.",
+        }
+        for i in range(10)
+    ]
+    feedback = "\n\n".join(["Você demonstrou bom entendimento dos conceitos de redes. " * 8] * 12)
+    nome = nome_relatorio("2023001", "redes.pdf", "2025-05-02_11-10-09")
+    salvar_relatorio(nome, montar_relatorio("2025-05-02_11-10-09", "2023001", 5, feedback, respostas), pasta)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    servidor = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_port}"
+
+    etag = httpx.get(f"{base}/relatorio/{nome}", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    cenarios = [
+        ("sem compressão (anterior)", f"{base}/antigo/{nome}", {"Accept-Encoding": "identity"}),
+        ("gzip pré-comprimido", f"{base}/relatorio/{nome}", {"Accept-Encoding": "gzip"}),
+        ("revalidação 304", f"{base}/relatorio/{nome}", {"Accept-Encoding": "gzip", "If-None-Match": etag}),
+    ]
+
+    print(f"Clientes: {clientes} | Requisições por cenário: {requisicoes}")
+    print(f"{'cenário':28s} {'req/s':>8} {'bytes/resposta':>15}")
+    for rotulo, url, cabecalhos in cenarios:
+        carga(url, clientes, clientes * 5, cabecalhos)  # aquecimento
+        vazao, tamanho = carga(url, clientes, requisicoes, cabecalhos)
+        print(f"{rotulo:28s} {vazao:>8.0f} {tamanho:>15.0f}")
+
+    servidor.shutdown()
@@ -0,0 +1,94 @@
+"""
+Tempo de execução do script Streamlit por pergunta enviada, conforme o
+histórico cresce, rodando o app de verdade no AppTest: rerun completo de
+app.main() (como o st.rerun() antigo, que refazia o CSS, a barra lateral, o
+glob de files/ e todo o histórico) versus o rerun só do fragmento
+app.conversa, como o navegador pede ao enviar o chat_input de dentro dele.
+O fragmento é medido logo após um rerun completo e com pares acumulados de
+perguntas anteriores (que ele redesenha até o próximo rerun completo).
+
+A resposta do modelo é falsa e instantânea (igual nas medições), para que o
+tempo medido seja só o da renderização.
+
+Uso: python benchmarks/bench_render_chat.py 2>/dev/null
+"""
+import functools
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+os.chdir(RAIZ)  # o app abre pdfs/ e files/ por caminho relativo
+os.environ.setdefault("OPENAI_API_KEY", "chave-falsa")
+
+import app  # noqa: E402
+
+REPETICOES = 5
+RESPOSTA = "Resposta didática sobre o conteúdo da aula. " * 30
+PARES_ACUMULADOS = app.TURNOS_POR_FRAGMENTO - 2  # o próximo turno ainda não força o rerun completo
+
+
+def responder_falso(pergunta):
+    for palavra in RESPOSTA.split(" "):
+        yield palavra + " "
+
+
+# 🧩 Rerun só dos fragmentos já registrados (o AppTest sempre roda o script inteiro)
+def rodar_fragmento(teste: AppTest) -> AppTest:
+    ids = list(teste._fragment_storage._fragments)
+    original = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(original, fragment_id_queue=ids)
+    try:
+        return teste.run()
+    finally:
+        local_script_runner.RerunData = original
+
+
+def roteiro():
+    import app
+
+    app.main()
+
+
+def gerar_historico(turnos: int, inicio: int = 0) -> list:
+    historico = []
+    for i in range(inicio, inicio + turnos):
+        historico.append(("human", f"Pergunta {i} sobre o material da aula?"))
+        historico.append(("ai", f"Resposta {i}. " + "Explicação didática do conteúdo. " * 30))
+    return historico
+
+
+def medir(historico, fragmento: bool, acumulados: int = 0) -> float:
+    teste = AppTest.from_function(roteiro, default_timeout=30)
+    teste.session_state["session_id"] = "bench"
+    teste.session_state["chain"] = object()  # só precisa existir: a resposta vem de responder_falso
+    teste.session_state["historico_chat"] = list(historico)
+    teste.run()  # aquecimento: compila o roteiro, inicia a sessão e registra o fragmento
+
+    tempos = []
+    for i in range(REPETICOES):
+        teste.session_state["historico_chat"] = list(historico) + gerar_historico(acumulados, len(historico))
+        teste.session_state["historico_renderizado"] = len(historico)
+        teste.chat_input[0].set_value(f"Pergunta nova {i}?")
+        inicio = time.perf_counter()
+        rodar_fragmento(teste) if fragmento else teste.run()
+        tempos.append(time.perf_counter() - inicio)
+        assert not teste.exception, teste.exception
+    return statistics.median(tempos)
+
+
+if __name__ == "__main__":
+    app.responder_usuario_stream = responder_falso
+
+    print(f"{'turnos':>8} {'rerun completo (ms)':>20} {'fragmento (ms)':>16} {f'fragmento +{PARES_ACUMULADOS} pares (ms)':>26}")
+    for turnos in (5, 25, 50, 100, 200):
+        historico = gerar_historico(turnos)
+        completo = medir(historico, fragmento=False)
+        fragmento = medir(historico, fragmento=True)
+        acumulado = medir(historico, fragmento=True, acumulados=PARES_ACUMULADOS)
+        print(f"{turnos:>8} {completo * 1000:>20.1f} {fragmento * 1000:>16.1f} {acumulado * 1000:>26.1f}")
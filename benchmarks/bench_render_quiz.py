@@ -0,0 +1,140 @@
+"""
+Custo de um rerun do quiz (cada clique num rádio) com todas as perguntas
+respondidas: texto bruto re-separado e re-interpretado a cada rerun, com a
+busca linear nas respostas (versão anterior), versus as perguntas já
+estruturadas na sessão com as respostas indexadas por posição.
+
+A coluna "só dados" mede apenas a interpretação e a busca das respostas,
+sem os widgets do Streamlit (que custam o mesmo nas duas versões e dominam
+o tempo do rerun completo).
+
+Uso: python benchmarks/bench_render_quiz.py 2>/dev/null
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.quiz import Pergunta  # noqa: E402
+
+REPETICOES = 15
+
+
+# 📝 Texto bruto no formato guardado pela versão anterior do quiz
+def formatar_perguntas(perguntas: list) -> str:
+    return "\n\n".join(
+        f"Pergunta: {p['pergunta']}\n"
+        + "\n".join(p["opcoes"])
+        + f"\nResposta: {p['resposta']}\nExplicação: {p['explicacao']}"
+        for p in perguntas
+    )
+
+
+def dados_antigo(perguntas_raw, respostas_usuario):
+    perguntas_brutas = perguntas_raw.strip().split("\n\nPergunta:")
+    if perguntas_brutas[0].startswith("Pergunta:"):
+        perguntas_brutas[0] = perguntas_brutas[0][len("Pergunta:"):]
+    vistos = 0
+    for pergunta_raw in perguntas_brutas:
+        linhas = pergunta_raw.strip().split("\n")
+        pergunta_texto = linhas[0]
+        linhas[5].split(":")[-1].strip().upper()[0]
+        linhas[6].split(":", 1)[-1].strip()
+        vistos += any(r["pergunta"] == pergunta_texto for r in respostas_usuario)
+    return vistos
+
+
+def dados_novo(quiz, respostas_usuario):
+    return sum(idx in respostas_usuario for idx, _ in enumerate(quiz))
+
+
+def rerun_antigo():
+    import streamlit as st
+
+    perguntas_raw = st.session_state["quiz"]
+    perguntas_brutas = perguntas_raw.strip().split("\n\nPergunta:")
+    if perguntas_brutas[0].startswith("Pergunta:"):
+        perguntas_brutas[0] = perguntas_brutas[0][len("Pergunta:"):]
+    respostas_usuario = st.session_state["respostas_usuario"]
+
+    for idx, pergunta_raw in enumerate(perguntas_brutas):
+        linhas = pergunta_raw.strip().split("\n")
+        pergunta_texto = linhas[0]
+        opcoes = linhas[1:5]
+        resposta_certa = linhas[5].split(":")[-1].strip().upper()[0]
+        explicacao = linhas[6].split(":", 1)[-1].strip()
+
+        st.markdown(f"**Pergunta {idx + 1}:** {pergunta_texto}")
+        escolha = st.radio("Escolha uma opção:", opcoes, index=0, key=f"resposta_{idx}")
+        if escolha:
+            st.success(f"✅ Resposta correta! {resposta_certa}")
+            st.markdown(f"🧠 **Explicação:** {explicacao}")
+            respondida = any(r["pergunta"] == pergunta_texto for r in respostas_usuario)  # noqa: F841
+
+
+def rerun_novo():
+    import streamlit as st
+
+    respostas_usuario = st.session_state["respostas_usuario"]
+    for idx, pergunta in enumerate(st.session_state["quiz"]):
+        st.markdown(f"**Pergunta {idx + 1}:** {pergunta.texto}")
+        escolha = st.radio("Escolha uma opção:", pergunta.opcoes, index=0, key=f"resposta_{idx}")
+        if escolha:
+            st.success(f"✅ Resposta correta! {pergunta.resposta}")
+            st.markdown(f"🧠 **Explicação:** {pergunta.explicacao}")
+            respondida = idx in respostas_usuario  # noqa: F841
+
+
+def medir_apps(roteiros) -> list:
+    apps = []
+    for roteiro, quiz, respostas in roteiros:
+        app = AppTest.from_function(roteiro)
+        app.session_state["quiz"] = quiz
+        app.session_state["respostas_usuario"] = respostas
+        app.run()  # aquecimento: compila o roteiro e inicia a sessão
+        apps.append(app)
+
+    # Execuções intercaladas, para que ruído de GC/CPU afete as duas versões igualmente
+    tempos = [[] for _ in apps]
+    for _ in range(REPETICOES):
+        for app, lista in zip(apps, tempos):
+            inicio = time.perf_counter()
+            app.run()
+            lista.append(time.perf_counter() - inicio)
+    return [statistics.median(lista) for lista in tempos]
+
+
+def medir_dados(funcao, *args) -> float:
+    tempos = []
+    for _ in range(50):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+if __name__ == "__main__":
+    print(f"{'perguntas':>10} {'antigo (ms)':>12} {'novo (ms)':>10} {'só dados antigo (µs)':>21} {'só dados novo (µs)':>19}")
+    for quantidade in (10, 50, 200):
+        perguntas = [
+            {
+                "pergunta": f"Qual é a função da camada {i} no modelo estudado?",
+                "opcoes": [f"A) Opção {i}.1", f"B) Opção {i}.2", f"C) Opção {i}.3", f"D) Opção {i}.4"],
+                "resposta": "A",
+                "explicacao": f"A camada {i} cuida da etapa descrita no material.",
+            }
+            for i in range(quantidade)
+        ]
+        texto = formatar_perguntas(perguntas)
+        quiz = [Pergunta.de_dict(p) for p in perguntas]
+        respostas_lista = [{"pergunta": p.texto, "correta": True} for p in quiz]
+        respostas_dict = dict(enumerate(respostas_lista))
+
+        antigo, novo = medir_apps([(rerun_antigo, texto, respostas_lista), (rerun_novo, quiz, respostas_dict)])
+        dados_a = medir_dados(dados_antigo, texto, respostas_lista)
+        dados_n = medir_dados(dados_novo, quiz, respostas_dict)
+        print(f"{quantidade:>10} {antigo * 1000:>12.1f} {novo * 1000:>10.1f} {dados_a * 1e6:>21.1f} {dados_n * 1e6:>19.1f}")
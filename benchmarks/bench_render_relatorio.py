@@ -0,0 +1,116 @@
+"""
+Geração de relatórios grandes (200 perguntas): concatenação de f-strings com
+CSS embutido e salvamento do texto montado (versão anterior) contra o template
+Jinja2 compilado, gerado em partes direto para o arquivo e as variantes comprimidas.
+
+Uso: python benchmarks/bench_render_relatorio.py [perguntas] [repeticoes]
+"""
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.relatorio import gerar_relatorio, salvar_relatorio  # noqa: E402
+
+
+# Montagem como era antes: CSS em cada arquivo e += a cada pergunta (sem escapar o conteúdo)
+def montar_antigo(data_hora, matricula, acertos, feedback_ia, respostas_usuario) -> str:
+    paragrafos = "".join(f"<p>{par}</p>" for par in feedback_ia.split("\n\n"))
+    html_content = f"""
+            <!DOCTYPE html>
+            <html lang="pt-BR">
+            <head>
+                <meta charset="UTF-8">
+                <title>Relatório do Quiz - {data_hora}</title>
+                <style>
+                    body {{
+                        font-family: 'Segoe UI', sans-serif;
+                        background-color: #f4f6f9;
+                        color: #333;
+                        padding: 30px;
+                        line-height: 1.6;
+                    }}
+                    h1, h2 {{ color: #2c3e50; }}
+                    .card {{
+                        background: #fff;
+                        padding: 20px;
+                        margin-bottom: 20px;
+                        border-radius: 10px;
+                        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+                    }}
+                    .correta {{ color: green; }}
+                    .incorreta {{ color: red; }}
+                </style>
+            </head>
+            <body>
+                <h1>📊 Relatório do Quiz - {data_hora}</h1>
+                <div class="card">
+                <p><strong>✅ Matricula:</strong> {matricula}</p>
+                    <p><strong>✅ Acertos:</strong> {acertos}</p>
+                </div>
+                <div class="card">
+                    <h2>🧠 Análise do Desempenho (IA)</h2>
+                    {paragrafos}
+                </div>
+            """
+    for i, r in enumerate(respostas_usuario):
+        html_content += f"""
+                <div class="card">
+                    <p><strong>Pergunta {i+1}:</strong> {r['pergunta']}</p>
+                    <p><strong>Sua resposta:</strong> {r['resposta_usuario']}) {r.get('texto_resposta_usuario', '')}</p>
+                    <p><strong>Resposta correta:</strong> {r['resposta_correta']}</p>
+                    <p><strong>Resultado:</strong> <span class="{ 'correta' if r['correta'] else 'incorreta' }">
+                        {"Correta" if r['correta'] else 'Incorreta'}
+                    </span></p>
+                    <p><strong>Explicação:</strong> {r['explicacao']}</p>
+                </div>
+                """
+    html_content += "</body></html>"
+    return html_content
+
+
+def medir(funcao, repeticoes) -> tuple:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(tempos) * 1000, pico
+
+
+if __name__ == "__main__":
+    perguntas = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    respostas = [
+        {
+            "pergunta": f"Qual é a função da camada {i} no modelo de referência estudado na aula de redes?",
+            "resposta_usuario": "A", "texto_resposta_usuario": f"A) Opção {i} sobre encapsulamento",
+            "resposta_correta": "B", "correta": i % 2 == 0,
+            "explicacao": f"A camada {i} cuida da etapa descrita no material da aula, como visto no capítulo 3.",
+        }
+        for i in range(perguntas)
+    ]
+    feedback = "\n\n".join(["Você demonstrou bom entendimento dos conceitos de redes. " * 8] * 12)
+    argumentos = ("2025-05-02_11-10-09", "2023001", perguntas // 2, feedback, respostas)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        cenarios = [
+            ("f-strings + CSS embutido", lambda: salvar_relatorio("antigo.html", montar_antigo(*argumentos), pasta)),
+            ("Jinja2 em partes", lambda: salvar_relatorio("novo.html", gerar_relatorio(*argumentos), pasta)),
+        ]
+        print(f"Perguntas: {perguntas} | Repetições: {repeticoes} (gravação inclui as variantes comprimidas)")
+        print(f"{'cenário':26s} {'p50 (ms)':>9} {'pico memória (KB)':>18} {'HTML (bytes)':>13} {'gzip (bytes)':>13}")
+        for (rotulo, funcao), nome in zip(cenarios, ["antigo.html", "novo.html"]):
+            tempo, pico = medir(funcao, repeticoes)
+            html = Path(pasta, nome).stat().st_size
+            gz = Path(pasta, nome + ".gz").stat().st_size
+            print(f"{rotulo:26s} {tempo:>9.1f} {pico / 1024:>18.0f} {html:>13} {gz:>13}")
@@ -0,0 +1,123 @@
+"""
+Teste de carga do servidor de relatórios em modo produção (gunicorn gthread):
+sobe o servidor com 1, 2 e 4 workers, dispara requisições concorrentes
+(80% relatórios gzip, 20% buscas) a partir de vários processos e mostra
+req/s, latência vista pelo cliente e o histograma de /metricas.
+
+Uso: python benchmarks/carga_relatorios.py [segundos] [processos_cliente] [threads_por_processo] [workers...]
+"""
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+import httpx
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from utils.relatorio import montar_relatorio, nome_relatorio, salvar_relatorio  # noqa: E402
+
+THREADS_SERVIDOR = 4
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cliente(argumentos) -> list:
+    base, nomes, segundos, threads = argumentos
+    latencias, trava = [], threading.Lock()
+    fim = time.perf_counter() + segundos
+
+    def laco():
+        aleatorio = random.Random()
+        locais = []
+        with httpx.Client(base_url=base, headers={"Accept-Encoding": "gzip"}) as http:
+            while time.perf_counter() < fim:
+                if aleatorio.random() < 0.8:
+                    url = f"/relatorio/{aleatorio.choice(nomes)}"
+                else:
+                    url = f"/resultado?matricula={aleatorio.randint(20230, 20239)}"
+                inicio = time.perf_counter()
+                resposta = http.get(url)
+                resposta.read()
+                locais.append(time.perf_counter() - inicio)
+        with trava:
+            latencias.extend(locais)
+
+    linhas = [threading.Thread(target=laco) for _ in range(threads)]
+    for linha in linhas:
+        linha.start()
+    for linha in linhas:
+        linha.join()
+    return latencias
+
+
+def subir_servidor(workers: int, ambiente: dict) -> tuple:
+    porta = porta_livre()
+    ambiente = {**ambiente, "RELATORIOS_BIND": f"127.0.0.1:{porta}", "RELATORIOS_WORKERS": str(workers),
+                "RELATORIOS_THREADS": str(THREADS_SERVIDOR), "RELATORIOS_LOGLEVEL": "warning"}
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", str(RAIZ / "flask_server" / "gunicorn.conf.py")], env=ambiente
+    )
+    base = f"http://127.0.0.1:{porta}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/metricas")
+            return processo, base
+        except httpx.TransportError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("o servidor não subiu")
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    processos_cliente = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    threads_cliente = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    lista_workers = [int(w) for w in sys.argv[4:]] or [1, 2, 4]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        respostas = [
+            {"pergunta": f"Pergunta {i}?", "resposta_usuario": "A", "texto_resposta_usuario": "A) Opção",
+             "resposta_correta": "B", "correta": i % 2 == 0, "explicacao": "Explicação da resposta."}
+            for i in range(10)
+        ]
+        nomes = []
+        for i in range(200):
+            nome = nome_relatorio(f"2023{i % 10}{i:03d}", "redes.pdf", f"2025-05-02_11-{i // 60:02d}-{i % 60:02d}")
+            salvar_relatorio(nome, montar_relatorio("2025-05-02", "x", 5, "Feedback do desempenho. " * 200, respostas), pasta)
+            nomes.append(nome)
+
+        ambiente = {**os.environ, "RELATORIOS_DIR": pasta, "CATALOGO_RELATORIOS": os.path.join(pasta, "catalogo.sqlite")}
+        print(f"CPUs: {os.cpu_count()} | clientes: {processos_cliente} processos x {threads_cliente} threads "
+              f"| threads por worker: {THREADS_SERVIDOR} | {segundos:.0f}s por rodada")
+        print(f"{'workers':>8} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}   servidor p95 (/metricas)")
+
+        for workers in lista_workers:
+            processo, base = subir_servidor(workers, ambiente)
+            try:
+                with Pool(processos_cliente) as pool:
+                    resultados = pool.map(cliente, [(base, nomes, segundos, threads_cliente)] * processos_cliente)
+                latencias = sorted(t for r in resultados for t in r)
+                metricas = httpx.get(f"{base}/metricas").json()["rotas"]
+            finally:
+                processo.terminate()  # SIGTERM: desligamento gracioso
+                processo.wait(timeout=60)
+
+            def p(q):
+                return latencias[min(len(latencias) - 1, int(q / 100 * len(latencias)))] * 1000
+
+            servidor = ", ".join(f"{rota} {m['p95_ms']}ms" for rota, m in metricas.items() if rota != "metricas")
+            print(f"{workers:>8} {len(latencias) / segundos:>8.0f} {p(50):>9.1f} {p(95):>9.1f} {p(99):>9.1f}   {servidor}")
+            print(f"{'':>8} mediana={statistics.median(latencias) * 1000:.1f}ms requisições={len(latencias)}")
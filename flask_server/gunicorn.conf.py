@@ -0,0 +1,55 @@
+"""
+Configuração de produção do servidor de relatórios (gunicorn, workers gthread).
+
+Uso: gunicorn -c flask_server/gunicorn.conf.py
+     RELATORIOS_BIND=0.0.0.0:8080 RELATORIOS_WORKERS=4 gunicorn -c flask_server/gunicorn.conf.py
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+# 📁 Roda a partir de flask_server/ para importar server:app
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "server:app"
+
+# ⚙️ Endereço, processos e threads (variáveis de ambiente). Por padrão só aceita conexões
+# locais (atrás de um proxy reverso); expor em outras interfaces exige RELATORIOS_BIND
+bind = os.getenv("RELATORIOS_BIND", "127.0.0.1:5000").split(",")
+workers = int(os.getenv("RELATORIOS_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("RELATORIOS_THREADS", "4"))
+worker_class = "gthread"
+backlog = int(os.getenv("RELATORIOS_BACKLOG", "2048"))
+
+# Conexões keep-alive e limites de tempo
+keepalive = int(os.getenv("RELATORIOS_KEEPALIVE_S", "5"))
+timeout = int(os.getenv("RELATORIOS_TIMEOUT_S", "30"))
+# SIGTERM: para de aceitar conexões e espera as requisições em andamento por até N segundos
+graceful_timeout = int(os.getenv("RELATORIOS_GRACEFUL_S", "30"))
+
+# Recicla workers aos poucos (evita acúmulo de memória), com jitter para não reiniciar todos juntos
+max_requests = int(os.getenv("RELATORIOS_MAX_REQUISICOES", "10000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("RELATORIOS_ACCESSLOG") or None
+errorlog = "-"
+loglevel = os.getenv("RELATORIOS_LOGLEVEL", "info")
+proc_name = "relatorios_quiz"
+
+
+def on_starting(server):
+    # Histogramas dos workers num diretório novo a cada início (lido por /metricas)
+    pasta = tempfile.mkdtemp(prefix="metricas_relatorios_")
+    os.environ["METRICAS_HTTP_DIR"] = pasta
+    server.pasta_metricas = pasta
+
+    # Reconcilia o catálogo uma única vez, antes dos workers existirem
+    sys.path.insert(0, os.path.join(chdir, ".."))
+    from utils.catalogo_relatorios import CatalogoRelatorios
+    CatalogoRelatorios().sincronizar()
+    os.environ["SINCRONIZAR_CATALOGO"] = "0"
+
+
+def on_exit(server):
+    shutil.rmtree(getattr(server, "pasta_metricas", ""), ignore_errors=True)
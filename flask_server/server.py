@@ -1,10 +1,99 @@
+import hashlib
+import mimetypes
 import os
-from flask import Flask, send_from_directory, render_template_string, request
+import sys
+import time
+from functools import lru_cache
+from urllib.parse import urlencode
+
+from flask import Flask, abort, g, jsonify, render_template, request, send_file
+from markupsafe import escape
+from werkzeug.security import safe_join
+
+# Permite importar utils/ ao rodar "python flask_server/server.py"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.catalogo_relatorios import ORDENACOES, CatalogoRelatorios  # noqa: E402
+from utils.metricas_http import HistogramaLatencia  # noqa: E402
+from utils.relatorio import PASTA_RELATORIOS, codificacoes, comprimir_relatorio, url_css  # noqa: E402
 
 app = Flask(__name__)
+# O CSS compartilhado é referenciado com ?v=<hash do conteúdo>: pode ficar em cache por um ano
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000
+# Mesmas opções de espaço em branco do gerador de relatórios (utils/relatorio.py)
+app.jinja_env.trim_blocks = True
+app.jinja_env.lstrip_blocks = True
+
+
+@app.context_processor
+def variaveis_templates():
+    return {'url_css': url_css()}
+
 
 # Diretório onde os relatórios são salvos
-RELATORIO_DIR = os.path.join(os.path.dirname(__file__), '..', 'relatorioQuiz')
+RELATORIO_DIR = str(PASTA_RELATORIOS)
+# Relatórios por página na busca
+POR_PAGINA = 20
+
+# Catálogo indexado dos relatórios; reconcilia com a pasta ao subir o servidor
+# (no gunicorn, o processo principal sincroniza uma única vez antes de criar os workers)
+catalogo = CatalogoRelatorios(pasta=RELATORIO_DIR)
+if os.getenv("SINCRONIZAR_CATALOGO", "1") == "1":
+    catalogo.sincronizar()
+
+# Histograma de latência por rota, somado entre os workers
+latencias = HistogramaLatencia(["ver_relatorio", "index", "resultado", "metricas"])
+
+
+@app.before_request
+def iniciar_cronometro():
+    g.inicio = time.perf_counter()
+
+
+@app.after_request
+def registrar_latencia(resposta):
+    if "inicio" in g:
+        latencias.observar(request.endpoint or "outras", time.perf_counter() - g.inicio)
+    return resposta
+
+
+@app.route('/metricas')
+def metricas():
+    """
+    Latência por rota (contagem, média, p50/p95/p99 e baldes acumulados em ms) de todos os workers.
+    """
+    return jsonify(pid=os.getpid(), rotas=latencias.resumo())
+
+# Relatórios não mudam depois de gravados: navegador e proxies podem guardá-los por um ano
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@lru_cache(maxsize=4096)
+def _hash_arquivo(caminho, mtime_ns, tamanho):
+    with open(caminho, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:32]
+
+
+def _etag(caminho):
+    info = os.stat(caminho)
+    return _hash_arquivo(caminho, info.st_mtime_ns, info.st_size)
+
+
+def _escolher_variante(caminho):
+    """
+    Escolhe a variante pré-comprimida aceita pelo navegador (br, depois gzip).
+    :return: (caminho servido, Content-Encoding ou None)
+    """
+    if caminho.endswith('.html'):
+        try:
+            comprimir_relatorio(caminho)  # relatórios antigos, gravados antes das variantes
+        except OSError:
+            pass
+    for codificacao, extensao in codificacoes().items():
+        if request.accept_encodings[codificacao] and os.path.isfile(caminho + extensao):
+            return caminho + extensao, codificacao
+    return caminho, None
+
 
 # Rota para servir o relatório
 @app.route('/relatorio/<nome_arquivo>')
@@ -13,63 +102,32 @@ def ver_relatorio(nome_arquivo):
     Rota para acessar o relatório HTML gerado.
     :param nome_arquivo: Nome do arquivo HTML gerado
     """
-    return send_from_directory(RELATORIO_DIR, nome_arquivo)
+    caminho = safe_join(RELATORIO_DIR, nome_arquivo)
+    if caminho is None or not os.path.isfile(caminho):
+        abort(404)
+
+    servido, codificacao = _escolher_variante(caminho)
+    etag = _etag(servido)
+
+    if request.if_none_match.contains_weak(etag):
+        resposta = app.response_class(status=304)
+    else:
+        mimetype = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        resposta = send_file(
+            servido, mimetype=mimetype, download_name=nome_arquivo, conditional=False, etag=False, max_age=None
+        )
+        if codificacao:
+            resposta.headers['Content-Encoding'] = codificacao
+
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = CACHE_CONTROL
+    resposta.headers['Vary'] = 'Accept-Encoding'
+    return resposta
 
 
 @app.route('/buscar', methods=['GET', 'POST'])
 def index():
-    html = """
-    <!DOCTYPE html>
-    <html lang="pt-BR">
-    <head>
-        <meta charset="UTF-8">
-        <title>Buscar Relatório</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                background-color: #f9f9f9;
-                padding: 30px;
-            }
-            .container {
-                max-width: 400px;
-                margin: auto;
-                background: white;
-                padding: 20px;
-                border-radius: 8px;
-                box-shadow: 0 0 10px rgba(0,0,0,0.1);
-                text-align: center;
-            }
-            input[type="text"] {
-                width: 100%;
-                padding: 10px;
-                margin-bottom: 15px;
-                border: 1px solid #ccc;
-                border-radius: 4px;
-            }
-            button {
-                background-color: #4CAF50;
-                color: white;
-                padding: 10px 20px;
-                border: none;
-                border-radius: 4px;
-                cursor: pointer;
-                width: 100%;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>🔎 Buscar Atividades</h2>
-            <h4> Digite o nome do arquivo ou do aluno</h4>
-           <form action="/resultado" method="get">
-                <input type="text" name="matricula" placeholder="Digite a matrícula" required>
-                <button type="submit">Buscar</button>
-            </form>
-        </div>
-    </body>
-    </html>
-    """
-    return render_template_string(html)
+    return render_template('buscar.html')
 
 @app.route('/resultado')
 def resultado():
@@ -78,76 +136,36 @@ def resultado():
         return "Matrícula não informada."
 
     try:
-        arquivos = os.listdir(RELATORIO_DIR)
-    except FileNotFoundError:
-        return "Diretório de relatórios não encontrado."
-
-    encontrados = [arq for arq in arquivos if matricula in arq]
-
-    if not encontrados:
-        return f"Nenhum relatório encontrado para a matrícula: {matricula}"
-
-    links = "".join(
-        f'<li><a href="/relatorio/{arq}" target="_blank">{arq}</a></li>' for arq in encontrados
+        pagina = max(1, int(request.args.get('pagina', 1)))
+    except ValueError:
+        pagina = 1
+    ordem = request.args.get('ordem', 'recentes')
+    if ordem not in ORDENACOES:
+        ordem = 'recentes'
+
+    # Busca por prefixo da matrícula ou do PDF no catálogo (índices do SQLite, sem listar a pasta)
+    encontrados, total = catalogo.buscar(matricula, pagina=pagina, por_pagina=POR_PAGINA, ordem=ordem)
+
+    if not total:
+        return f"Nenhum relatório encontrado para a matrícula: {escape(matricula)}"
+
+    def url(**mudancas):
+        parametros = {'matricula': matricula, 'pagina': pagina, 'ordem': ordem, **mudancas}
+        return f"/resultado?{urlencode(parametros)}"
+
+    return render_template(
+        'resultado.html',
+        matricula=matricula,
+        encontrados=encontrados,
+        total=total,
+        pagina=pagina,
+        paginas=-(-total // POR_PAGINA),
+        ordem=ordem,
+        ordenacoes=ORDENACOES,
+        url=url,
     )
 
-    return f'''
-    <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    background-color: #f4f4f4;
-                    padding: 30px;
-                    color: #333;
-                }}
-                h2 {{
-                    color: #005ca9;
-                }}
-                ul {{
-                    list-style-type: none;
-                    padding: 0;
-                }}
-                li {{
-                    margin: 10px 0;
-                }}
-                a {{
-                    text-decoration: none;
-                    color: #ff8c00;
-                    font-weight: bold;
-                }}
-                a:hover {{
-                    text-decoration: underline;
-                }}
-                .back {{
-                    display: inline-block;
-                    margin-top: 20px;
-                    padding: 10px 15px;
-                    background-color: #005ca9;
-                    color: white;
-                    border-radius: 5px;
-                    text-decoration: none;
-                }}
-                .back:hover {{
-                    background-color: #003f73;
-                }}
-            </style>
-        </head>
-        <body>
-            <h2>Atividades Encontradas: {matricula}</h2>
-            <ul>{links}</ul>
-            <a class="back" href="/buscar">Voltar</a>
-        </body>
-    </html>
-    '''
-
-
-
-
-
-
-
-
-# Executar a aplicação
+
+# Executar a aplicação (desenvolvimento; em produção: gunicorn -c flask_server/gunicorn.conf.py)
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+# Os clientes da OpenAI exigem uma chave ao serem criados; os testes nunca chamam a API
+os.environ.setdefault("OPENAI_API_KEY", "teste")
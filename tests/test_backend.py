@@ -0,0 +1,398 @@
+import functools
+import threading
+import time
+
+import pytest
+import streamlit as st
+from bench_render_chat import rodar_fragmento
+from reportlab.lib.pagesizes import letter
+from langchain_core.documents import Document
+from reportlab.pdfgen import canvas
+from streamlit.testing.v1 import AppTest
+
+import app
+import backend
+from utils import cache_paginas
+from utils.banco_perguntas import BancoPerguntas
+from utils.cache_indices import CacheIndices
+from utils.contexto import empacotar_contexto
+from utils.divisao import DivisorEstrutural, eh_titulo
+from utils.falsos import EmbeddingsFalso
+from utils.fila_relatorios import FilaRelatorios
+from utils.indice_sessao import IndiceSessao
+from utils.ingestao import IngestaoIncremental
+from utils.quiz import Pergunta
+from utils.tokens import contar_tokens
+
+
+class EmbeddingsTravadas(EmbeddingsFalso):
+    """Segura o texto marcado até ser liberada e então falha uma vez, como uma queda da API."""
+
+    def __init__(self, marcador: str):
+        super().__init__()
+        self.marcador = marcador
+        self.liberar = threading.Event()
+        self.falhou = False
+
+    def embed_documents(self, texts: list) -> list:
+        if not self.falhou and any(self.marcador in t for t in texts):
+            self.liberar.wait(10)
+            self.falhou = True
+            raise RuntimeError("API indisponível")
+        return super().embed_documents(texts)
+
+
+def criar_pdf(caminho, paginas: int, assunto="roteamento de pacotes entre redes") -> None:
+    pdf = canvas.Canvas(str(caminho), pagesize=letter)
+    for i in range(paginas):
+        pdf.drawString(72, 720, f"Capítulo {i}: {assunto}.")
+        pdf.drawString(72, 700, "O roteador escolhe o próximo salto pela tabela de rotas.")
+        pdf.showPage()
+    pdf.save()
+
+
+def aguardar_indexacao(timeout=10) -> bool:
+    return all(ingestao.concluido.wait(timeout) for ingestao in backend.obter_indice_sessao().ingestoes)
+
+
+@pytest.fixture
+def sessao(monkeypatch, tmp_path):
+    # Modelos falsos e caches em disco isolados na pasta temporária
+    monkeypatch.setattr(backend, "MODELOS_FALSOS", True)
+    monkeypatch.setattr(backend, "WORKERS_EXTRACAO", 1)
+    monkeypatch.setattr(backend, "folder_files", tmp_path)
+    monkeypatch.setattr(backend, "cache_indices", CacheIndices(tmp_path / "indices"))
+    monkeypatch.setattr(cache_paginas, "cache_paginas", lambda: cache_paginas.CachePaginas(tmp_path / "paginas"))
+    backend.criar_embeddings.clear()
+    backend.cache_respostas.clear()
+    st.session_state.clear()
+
+    st.session_state["session_id"] = "123456"
+    criar_pdf(tmp_path / "aula_123456.pdf", paginas=3)
+    yield st.session_state
+
+    st.session_state.clear()
+    backend.criar_embeddings.clear()
+    backend.cache_respostas.clear()
+
+
+def test_resposta_em_streaming_com_modelo_falso(sessao):
+    assert backend.cria_chain_conversa() is not None
+    assert aguardar_indexacao()
+
+    pedacos = list(backend.responder_usuario_stream("Como o roteador escolhe o próximo salto?"))
+    assert len(pedacos) > 1
+    assert "".join(pedacos) == backend.RESPOSTA_FALSA
+
+    metricas = sessao["metricas_turnos"][-1]
+    assert not metricas["cache"]
+    assert metricas["chamadas_llm"] == 1
+    assert metricas["tokens_prompt"] > metricas["tokens_contexto"] > 0
+
+
+def test_pergunta_repetida_sai_do_cache_de_respostas(sessao):
+    backend.cria_chain_conversa()
+    assert aguardar_indexacao()
+    pergunta = "Como o roteador escolhe o próximo salto?"
+    list(backend.responder_usuario_stream(pergunta))
+
+    # Nova conversa (sem histórico) sobre o mesmo material: a resposta vem do cache
+    backend.cria_chain_conversa()
+    assert backend.responder_usuario(pergunta) == backend.RESPOSTA_FALSA
+    metricas = sessao["metricas_turnos"][-1]
+    assert metricas["cache"]
+    assert metricas["chamadas_llm"] == 0
+    assert backend.cache_respostas().metricas()["acertos"] == 1
+
+
+def test_arquivo_trocado_descarta_as_respostas_em_cache(sessao, tmp_path):
+    backend.cria_chain_conversa()
+    assert aguardar_indexacao()
+    list(backend.responder_usuario_stream("Como o roteador escolhe o próximo salto?"))
+    cache = backend.cache_respostas()
+    assert cache.metricas()["itens"] == 1
+
+    # Mesmo nome, conteúdo novo: as respostas baseadas no PDF antigo saem do cache
+    criar_pdf(tmp_path / "aula_123456.pdf", paginas=3, assunto="camada de enlace e quadros")
+    backend.cria_chain_conversa()
+    assert cache.metricas()["itens"] == 0
+
+
+def test_upload_durante_a_indexacao_nao_esconde_a_falha_anterior(sessao, monkeypatch, tmp_path):
+    # Lotes de um trecho e chat liberado na primeira página: a ingestão segue rodando
+    monkeypatch.setattr(backend, "IngestaoIncremental",
+                        functools.partial(IngestaoIncremental, paginas_iniciais=1, tamanho_lote=1))
+    embeddings = EmbeddingsTravadas("Capítulo 1: sub-redes")
+    sessao["indice_sessao"] = indice = IndiceSessao(embeddings)
+    primeiro, segundo = tmp_path / "sub_123456.pdf", tmp_path / "aula_123456.pdf"
+    criar_pdf(primeiro, paginas=3, assunto="sub-redes e máscaras")
+
+    backend.sincronizar_indice([primeiro])
+    assert indice.indexando
+    # Segundo upload com a primeira ingestão ainda travada, que depois falha
+    backend.sincronizar_indice([primeiro, segundo])
+    embeddings.liberar.set()
+    assert aguardar_indexacao()
+    assert not indice.completo
+    assert isinstance(indice.erro_ingestao, RuntimeError)
+
+    # A sincronização seguinte indexa de novo o que a ingestão com erro não terminou
+    backend.sincronizar_indice([primeiro, segundo])
+    assert aguardar_indexacao()
+    assert indice.completo and indice.erro_ingestao is None
+    assert len(indice.arquivos[primeiro.name]["ids"]) == len(indice.arquivos[segundo.name]["ids"]) == 3
+
+
+def test_falha_na_geracao_do_quiz_vira_mensagem(sessao, monkeypatch, tmp_path):
+    def gerar_com_falha(arquivo, qtd_perguntas=10):
+        raise RuntimeError("API indisponível")
+
+    banco = BancoPerguntas(gerar_com_falha, pasta=tmp_path / "bancos")
+    monkeypatch.setattr(backend, "banco_perguntas", lambda: banco)
+
+    assert backend.obter_quiz() == []
+    assert "API indisponível" in sessao["erro_quiz"]
+
+
+def perguntas_falsas(inicio: int, quantidade: int) -> list:
+    return [
+        {"pergunta": f"Pergunta {i} sobre roteamento?", "opcoes": ["A) um", "B) dois", "C) três", "D) quatro"],
+         "resposta": "A", "explicacao": "Explicação."}
+        for i in range(inicio, inicio + quantidade)
+    ]
+
+
+def test_banco_descarta_perguntas_repetidas_e_sorteia_entre_documentos(tmp_path):
+    geracoes = []
+
+    def gerar(arquivo):
+        geracoes.append(arquivo)
+        return perguntas_falsas(0, 4)
+
+    banco = BancoPerguntas(gerar, pasta=tmp_path, minimo=4)
+    assert banco.adicionar("a", perguntas_falsas(0, 3)) == 3
+    # Mesma pergunta com outra caixa, acentos e pontuação não entra de novo
+    repetida = dict(perguntas_falsas(1, 1)[0], pergunta="PERGUNTA 1 SOBRE ROTEAMENTO!!")
+    assert banco.adicionar("a", [repetida, *perguntas_falsas(2, 2)]) == 4
+    assert banco.adicionar("b", [dict(p, pergunta=f"Questão {i}?") for i, p in enumerate(perguntas_falsas(0, 2))]) == 2
+
+    # Banco no mínimo: nada a gerar; abaixo dele, um único job por documento
+    assert banco.reabastecer("a", "a.pdf") is None
+    futuro = banco.reabastecer("b", "b.pdf")
+    futuro.result(10)
+    assert geracoes == ["b.pdf"] and len(banco.perguntas("b")) == 6
+
+    # "Pergunta 0..3" está nos dois bancos, mas sai no máximo uma vez por quiz
+    textos = [p["pergunta"] for p in banco.sortear(["a", "b"], 6)]
+    assert sorted(textos) == sorted([f"Pergunta {i} sobre roteamento?" for i in range(4)] + ["Questão 0?", "Questão 1?"])
+    # Pedido maior que os bancos: devolve tudo o que há, uma vez cada
+    assert len(banco.sortear(["a", "b", "a"], 50)) == 6
+    assert banco.sortear(["sem-banco"], 5) == []
+
+
+def test_quiz_sai_antes_do_fim_do_reabastecimento(sessao, monkeypatch, tmp_path):
+    liberar = threading.Event()
+    rodadas = []
+
+    def gerar_devagar(arquivo):
+        # A primeira rodada já basta para o quiz; as seguintes esperam ser liberadas
+        if rodadas:
+            liberar.wait(10)
+        rodadas.append(arquivo)
+        return perguntas_falsas(10 * len(rodadas), 10)
+
+    banco = BancoPerguntas(gerar_devagar, pasta=tmp_path / "bancos", minimo=30)
+    monkeypatch.setattr(backend, "banco_perguntas", lambda: banco)
+
+    quiz = backend.obter_quiz(qtd_perguntas=10)
+    assert len(quiz) == 10 and "erro_quiz" not in sessao
+    futuro = banco.reabastecer(backend.hash_pdf(tmp_path / "aula_123456.pdf"), None)
+    assert futuro is not None and not futuro.done()
+
+    liberar.set()
+    futuro.result(10)
+    assert len(rodadas) == 3
+
+
+def aguardar_job(fila, id_job: str, timeout=10) -> dict:
+    limite = time.monotonic() + timeout
+    while fila.status(id_job)["estado"] not in ("concluido", "falhou") and time.monotonic() < limite:
+        time.sleep(0.01)
+    return fila.status(id_job)
+
+
+RESPOSTAS_QUIZ = [{"pergunta": "O que é TCP?", "resposta_usuario": "A", "texto_resposta_usuario": "A) Transporte",
+                   "resposta_correta": "A", "correta": True, "explicacao": "Protocolo de transporte."}]
+
+
+def test_fila_de_relatorios_tenta_de_novo_e_grava_em_segundo_plano(tmp_path):
+    chamadas, salvos = [], []
+    liberar = threading.Event()
+
+    def gerar_feedback(respostas):
+        chamadas.append(respostas)
+        liberar.wait(10)
+        if len(chamadas) == 1:
+            raise RuntimeError("limite de requisições")
+        return "Bom trabalho."
+
+    fila = FilaRelatorios(gerar_feedback, pasta=tmp_path, workers=1, tentativas=2, espera_base_s=0,
+                          ao_salvar=lambda *dados: salvos.append(dados))
+    respostas = [dict(r) for r in RESPOSTAS_QUIZ]
+    id_job = fila.enviar("aluno_aula_relatorio.html", "2024-01-01_10-00-00", "aluno", "aula", 1, respostas)
+    # O id volta na hora; o job só termina depois do modelo responder
+    assert fila.status(id_job)["estado"] in ("na_fila", "gerando")
+    respostas[0]["correta"] = False  # o job trabalha com uma cópia das respostas
+    liberar.set()
+
+    job = aguardar_job(fila, id_job)
+    assert job["estado"] == "concluido" and job["tentativas"] == 2 and job["erro"] is None
+    assert chamadas[0][0]["correta"] is True
+    assert "Bom trabalho." in (tmp_path / "aluno_aula_relatorio.html").read_text(encoding="utf-8")
+    assert salvos == [("aluno_aula_relatorio.html", "aluno", "aula", "2024-01-01_10-00-00")]
+    metricas = fila.metricas()
+    assert metricas["concluidos"] == 1 and metricas["novas_tentativas"] == 1 and metricas["falhas_ia"] == 0
+
+    # Todas as tentativas falhando: o relatório sai com a mensagem de erro no lugar do feedback
+    fila = FilaRelatorios(lambda respostas: 1 / 0, pasta=tmp_path, workers=1, tentativas=2, espera_base_s=0)
+    job = aguardar_job(fila, fila.enviar("falha.html", "2024-01-01_10-00-00", "aluno", "aula", 0, RESPOSTAS_QUIZ))
+    assert job["estado"] == "concluido" and "division by zero" in job["erro"]
+    assert "Ocorreu um erro ao gerar o feedback" in (tmp_path / "falha.html").read_text(encoding="utf-8")
+    assert fila.metricas()["falhas_ia"] == 1
+    assert fila.status("inexistente") is None
+
+
+def trecho(texto: str, origem="aula.pdf", doc_id=None) -> Document:
+    return Document(page_content=texto, metadata={"source": origem, "doc_id": doc_id})
+
+
+def test_contexto_funde_vizinhos_descarta_repetidos_e_respeita_o_orcamento():
+    inicio = "O roteador consulta a tabela de rotas para escolher o próximo salto do pacote."
+    continuacao = "escolher o próximo salto do pacote. Rotas estáticas são configuradas à mão."
+    longo = "Explicação detalhada do protocolo OSPF e do algoritmo de Dijkstra. " * 40
+    documentos = [
+        trecho(continuacao, doc_id=5),  # mais relevante, mas o vizinho anterior vem depois
+        trecho(longo, origem="outra.pdf", doc_id=0),
+        trecho(inicio, doc_id=4),
+        trecho("O switch encaminha quadros pela tabela de endereços MAC.", origem="redes.pdf"),
+        trecho("O SWITCH encaminha quadros pela tabela de endereços MAC!", origem="copia.pdf"),  # PDF duplicado
+    ]
+    orcamento = contar_tokens(inicio + continuacao) + 20
+
+    escolhidos, estatisticas = empacotar_contexto(documentos, orcamento)
+
+    # Os trechos 4 e 5 viram um só, na posição do mais relevante e sem repetir a emenda
+    assert escolhidos[0].metadata["doc_ids"] == [4, 5]
+    assert escolhidos[0].page_content == inicio + " Rotas estáticas são configuradas à mão."
+    # O longo não cabe no orçamento e o menor depois dele entra no lugar
+    assert [d.metadata["source"] for d in escolhidos] == ["aula.pdf", "redes.pdf"]
+    assert estatisticas == {
+        "trechos_recuperados": 5,
+        "trechos_mesclados": 1,
+        "trechos_duplicados": 1,
+        "trechos_fora_orcamento": 1,
+        "tokens_contexto": sum(contar_tokens(d.page_content) for d in escolhidos),
+        "tokens_economizados": sum(contar_tokens(d.page_content) for d in documentos) - estatisticas["tokens_contexto"],
+    }
+
+    # O trecho mais relevante sempre entra, mesmo sozinho acima do orçamento
+    escolhidos, _ = empacotar_contexto([trecho(longo, doc_id=0)], orcamento_tokens=10)
+    assert [d.page_content for d in escolhidos] == [longo]
+
+
+def test_titulos_reconhecidos_pelo_divisor():
+    assert eh_titulo("3.2. Arquitetura de redes", isolada=False)
+    assert eh_titulo("Capítulo 4 Camada de transporte", isolada=False)
+    assert eh_titulo("ROTEAMENTO DINÂMICO", isolada=False)
+    assert eh_titulo("Percepção Rápida", isolada=True)
+    assert not eh_titulo("Percepção Rápida", isolada=False)
+    assert not eh_titulo("2. Gerado dinamicamente: a cada requisição", isolada=False)
+    assert not eh_titulo("O roteador escolhe o próximo salto.", isolada=True)
+
+
+def test_divisor_estrutural_respeita_titulos_paginas_e_tamanho():
+    frase = "O roteador consulta a tabela de rotas e escolhe o próximo salto de cada pacote."
+    paginas = [
+        Document(page_content="\n".join(["1. Roteamento", *[frase] * 12, "2. Endereçamento", frase]),
+                 metadata={"source": "aula.pdf", "page": 0}),
+        Document(page_content="\n".join([frase] * 2), metadata={"source": "aula.pdf", "page": 1}),
+        Document(page_content=frase, metadata={"source": "outra.pdf", "page": 0}),
+    ]
+    divisor = DivisorEstrutural(tokens_por_trecho=80, sobreposicao_tokens=20)
+    trechos = divisor.split_documents(paginas)
+
+    assert all(t.metadata["tokens"] <= 80 for t in trechos)
+    roteamento = [t for t in trechos if t.metadata.get("secao") == "1. Roteamento"]
+    # Trechos cheios da mesma seção repetem a última frase do anterior
+    assert len(roteamento) > 1
+    assert all(t.page_content.startswith(frase) for t in roteamento[1:])
+    # O título abre um trecho novo, sem sobreposição com a seção anterior
+    enderecamento = [t for t in trechos if t.metadata.get("secao") == "2. Endereçamento"]
+    assert enderecamento[0].page_content == "2. Endereçamento\n" + frase
+    # Páginas nunca se misturam; a seção continua na página seguinte do mesmo arquivo
+    assert [t.metadata["page"] for t in enderecamento] == [0, 1]
+    assert enderecamento[1].page_content == "\n".join([frase] * 2)
+    assert "secao" not in trechos[-1].metadata and trechos[-1].metadata["source"] == "outra.pdf"
+
+    # Linha sem quebras maior que o trecho é cortada por tokens
+    longa = DivisorEstrutural(tokens_por_trecho=30, sobreposicao_tokens=0).split_documents(
+        [Document(page_content=" ".join([frase] * 5), metadata={"source": "longa.pdf", "page": 0})]
+    )
+    assert len(longa) > 1 and all(t.metadata["tokens"] <= 30 for t in longa)
+
+
+def roteiro_chat():
+    import app
+
+    app.chat_window()
+
+
+def test_chat_roda_no_fragmento_desde_a_primeira_pergunta(monkeypatch):
+    monkeypatch.setattr(app, "responder_usuario_stream", lambda pergunta: iter(["Resposta ", f"a {pergunta}"]))
+    teste = AppTest.from_function(roteiro_chat, default_timeout=30)
+    teste.session_state["chain"] = object()
+    teste.run()
+
+    # Sessão nova: o fragmento desenha os próprios pares, sem rerun completo
+    for i in range(app.TURNOS_POR_FRAGMENTO - 1):
+        teste.chat_input[0].set_value(f"pergunta {i}?")
+        rodar_fragmento(teste)
+        assert not teste.exception
+        assert len(teste.chat_message) == 2 * (i + 1)
+        assert teste.chat_message[-1].markdown[0].value == f"Resposta a pergunta {i}?"
+        assert teste.session_state["historico_renderizado"] == 0
+
+    # O último turno do lote leva os pares para o histórico do rerun completo
+    teste.chat_input[0].set_value("pergunta final?")
+    rodar_fragmento(teste)
+    assert not teste.exception
+    assert teste.session_state["historico_renderizado"] == 2 * app.TURNOS_POR_FRAGMENTO
+    assert len(teste.chat_message) == 2 * app.TURNOS_POR_FRAGMENTO
+
+
+def roteiro_quiz():
+    import streamlit as st
+
+    import app
+
+    app.quiz_window(st.session_state["quiz"])
+
+
+def test_pergunta_sorteada_de_novo_chega_sem_resposta():
+    quiz = [Pergunta.de_dict(p) for p in perguntas_falsas(0, 2)]
+    teste = AppTest.from_function(roteiro_quiz, default_timeout=30)
+    teste.session_state["quiz"] = quiz
+    teste.session_state["matricula"] = "aluno"
+    teste.run()
+    teste.radio[0].set_value(quiz[0].opcoes[1]).run()
+    assert 0 in teste.session_state["respostas_usuario"]
+
+    # Novo quiz (como o botão "Gerar perguntas") com a mesma primeira pergunta
+    teste.session_state["quiz"] = [quiz[0], *(Pergunta.de_dict(p) for p in perguntas_falsas(5, 1))]
+    teste.session_state["quiz_id"] = 1
+    teste.session_state["respostas_usuario"] = {}
+    teste.session_state["acertos"] = 0
+    teste.run()
+    assert not teste.exception
+    assert teste.radio[0].value is None
+    assert teste.session_state["respostas_usuario"] == {}
@@ -0,0 +1,27 @@
+from utils.cache_embeddings import CacheEmbeddings
+from utils.falsos import EmbeddingsFalso
+
+
+def test_textos_repetidos_vao_ao_modelo_uma_vez(tmp_path):
+    falso = EmbeddingsFalso()
+    cache = CacheEmbeddings(falso, modelo="teste", pasta=tmp_path)
+
+    vetores = cache.embed_documents(["Rodapé  da aula", "Rodapé da aula", "Conteúdo"])
+    assert falso.textos_enviados == ["Rodapé da aula", "Conteúdo"]
+    assert vetores[0] == vetores[1] == falso.embed_query("Rodapé da aula")
+    assert (cache.acertos, cache.faltas) == (0, 2)
+
+
+def test_vetores_gravados_valem_para_outra_instancia(tmp_path):
+    CacheEmbeddings(EmbeddingsFalso(), modelo="teste", pasta=tmp_path).embed_documents(["a", "b"])
+
+    falso = EmbeddingsFalso()
+    cache = CacheEmbeddings(falso, modelo="teste", pasta=tmp_path)
+    assert cache.embed_documents(["b", "c"])[0] == falso.embed_query("b")
+    assert falso.textos_enviados == ["c"]
+    assert (cache.acertos, cache.faltas) == (1, 1)
+
+    # Outro modelo não reaproveita os vetores
+    outro = EmbeddingsFalso()
+    CacheEmbeddings(outro, modelo="outro", pasta=tmp_path).embed_documents(["a"])
+    assert outro.textos_enviados == ["a"]
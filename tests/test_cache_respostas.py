@@ -0,0 +1,69 @@
+from utils.cache_respostas import CacheRespostas, digital_documentos
+from utils.falsos import EmbeddingsFalso
+
+
+def criar_cache(**opcoes):
+    return CacheRespostas(EmbeddingsFalso(), **opcoes)
+
+
+def test_pergunta_repetida_reaproveita_resposta():
+    cache = criar_cache()
+    digital = digital_documentos(["a", "b"])
+    vetor = cache.vetorizar("O que é TCP?")
+
+    assert cache.buscar(digital, vetor) is None
+    cache.guardar(digital, ["a", "b"], vetor, "Protocolo de transporte.", latencia=2.0)
+
+    assert cache.buscar(digital, cache.vetorizar("O que é TCP?")) == "Protocolo de transporte."
+    assert cache.metricas() == {
+        "acertos": 1, "faltas": 1, "taxa_acerto": 0.5, "tempo_economizado_s": 2.0, "itens": 1
+    }
+
+
+def test_pergunta_diferente_nao_acerta():
+    cache = criar_cache()
+    digital = digital_documentos(["a"])
+    cache.guardar(digital, ["a"], cache.vetorizar("O que é TCP?"), "Protocolo de transporte.", latencia=1.0)
+
+    assert cache.buscar(digital, cache.vetorizar("O que é UDP?")) is None
+
+
+def test_digital_muda_com_os_documentos():
+    assert digital_documentos(["a", "b"]) == digital_documentos(["b", "a"])
+    assert digital_documentos(["a", "b"]) != digital_documentos(["a", "c"])
+
+    cache = criar_cache()
+    vetor = cache.vetorizar("O que é TCP?")
+    cache.guardar(digital_documentos(["a", "b"]), ["a", "b"], vetor, "Protocolo de transporte.", latencia=1.0)
+
+    # Material trocado: a mesma pergunta não reaproveita a resposta antiga
+    assert cache.buscar(digital_documentos(["a", "c"]), vetor) is None
+    assert cache.buscar(digital_documentos(["b", "a"]), vetor) == "Protocolo de transporte."
+
+
+def test_respostas_expiradas_e_excedentes_saem():
+    cache = criar_cache(ttl_s=-1)
+    digital = digital_documentos(["a"])
+    vetor = cache.vetorizar("O que é TCP?")
+    cache.guardar(digital, ["a"], vetor, "Protocolo de transporte.", latencia=1.0)
+    assert cache.buscar(digital, vetor) is None
+
+    cache = criar_cache(max_itens=1)
+    cache.guardar(digital, ["a"], vetor, "primeira", latencia=1.0)
+    cache.guardar(digital, ["a"], cache.vetorizar("O que é UDP?"), "segunda", latencia=1.0)
+    assert cache.buscar(digital, vetor) is None
+    assert cache.metricas()["itens"] == 1
+
+
+def test_invalidar_documento_descarta_so_as_respostas_que_o_usaram():
+    cache = criar_cache()
+    vetor = cache.vetorizar("O que é TCP?")
+    cache.guardar(digital_documentos(["a", "b"]), ["a", "b"], vetor, "com b", latencia=1.0)
+    cache.guardar(digital_documentos(["a", "c"]), ["a", "c"], vetor, "com c", latencia=1.0)
+
+    assert cache.invalidar_documento("b") == 1
+    assert cache.buscar(digital_documentos(["a", "b"]), vetor) is None
+    assert cache.buscar(digital_documentos(["a", "c"]), vetor) == "com c"
+    assert cache.invalidar_documento("b") == 0
+    assert cache.invalidar_documento("a") == 1
+    assert cache.metricas()["itens"] == 0
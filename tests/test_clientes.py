@@ -0,0 +1,24 @@
+from utils import clientes
+from utils.servidor_falso import iniciar_servidor_falso
+
+
+def test_limites_do_pool_valem_no_transporte():
+    pool = clientes.cliente_http("http://127.0.0.1:9/teste-limites")._transport._pool
+    assert pool._max_connections == clientes.MAX_CONEXOES
+    assert pool._max_keepalive_connections == clientes.MAX_CONEXOES_OCIOSAS
+    assert pool._keepalive_expiry == clientes.KEEPALIVE_S
+
+
+def test_metricas_mostram_o_reuso_das_conexoes():
+    servidor, url = iniciar_servidor_falso()
+    try:
+        cliente = clientes.cliente_http(url)
+        for _ in range(5):
+            cliente.post(f"{url}/embeddings", json={"input": ["texto"], "model": "teste"}).raise_for_status()
+    finally:
+        servidor.shutdown()
+
+    metricas = clientes.metricas_pool()[url]
+    assert metricas["requisicoes"] == 5
+    assert metricas["conexoes_criadas"] == 1
+    assert metricas["taxa_reuso"] == 0.8
@@ -0,0 +1,139 @@
+import threading
+
+import faiss
+import pytest
+from langchain_community.vectorstores.faiss import FAISS
+
+from utils import fabrica_indices, indice_sessao
+from utils.busca_lexica import IndiceLexico, fusao_rrf
+from utils.falsos import EmbeddingsFalso
+from utils.indice_sessao import IndiceSessao
+
+
+class EmbeddingsComApelido(EmbeddingsFalso):
+    """Vetoriza a consulta como se fosse outro texto, para fixar o primeiro lugar da busca vetorial."""
+
+    def __init__(self, apelidos: dict):
+        super().__init__()
+        self.apelidos = apelidos
+
+    def embed_query(self, text: str) -> list:
+        return super().embed_query(self.apelidos.get(text, text))
+
+
+def adicionar_arquivo(indice, nome: str, quantidade: int) -> list:
+    textos = [f"{nome}: trecho {i} sobre roteamento e endereçamento IP." for i in range(quantidade)]
+    indice.registrar(nome, f"chave-{nome}")
+    return indice.adicionar(nome, f"chave-{nome}", textos, indice.embeddings.embed_documents(textos),
+                            [{"source": nome, "doc_id": i} for i in range(quantidade)])
+
+
+def test_fusao_rrf_soma_as_posicoes_de_cada_lista():
+    # "c" é 3º numa lista e 1º na outra: passa à frente do 1º de uma lista só
+    assert fusao_rrf([["a", "b", "c"], ["c", "d"]]) == ["c", "a", "b", "d"]
+    assert fusao_rrf([]) == []
+
+
+def test_busca_hibrida_traz_o_trecho_que_so_o_bm25_encontra():
+    consulta = "Para que o OSPF usa o Dijkstra?"
+    indice = IndiceSessao(EmbeddingsComApelido({consulta: "a.pdf: trecho 3 sobre roteamento e endereçamento IP."}))
+    adicionar_arquivo(indice, "a.pdf", 30)
+    # O trecho com o termo fica num índice compartilhado (somente leitura), com o seu BM25
+    texto_ospf = "O OSPF calcula as rotas mais curtas com o algoritmo de Dijkstra."
+    compartilhado = FAISS.from_texts([texto_ospf], indice.embeddings, metadatas=[{"source": "aula.pdf", "doc_id": 0}])
+    indice.compartilhados["aula"] = compartilhado
+    indice.lexicos_compartilhados["aula"] = IndiceLexico.do_vector_store(compartilhado)
+
+    vetorial = [d.page_content for d in indice.buscar(consulta, k=2, hibrida=False)]
+    hibrida = [d.page_content for d in indice.buscar(consulta, k=2, hibrida=True)]
+    assert vetorial[0] == "a.pdf: trecho 3 sobre roteamento e endereçamento IP."
+    assert texto_ospf not in vetorial
+    assert set(hibrida) == {vetorial[0], texto_ospf}
+
+
+@pytest.mark.parametrize("tipo", ["ivf", "hnsw"])
+def test_indice_da_sessao_passa_a_aproximado_e_continua_removendo(monkeypatch, tipo):
+    monkeypatch.setattr(fabrica_indices, "LIMIAR_ANN", 300)
+    monkeypatch.setattr(fabrica_indices, "TIPO_ANN", tipo)
+    indice = IndiceSessao(EmbeddingsFalso())
+
+    adicionar_arquivo(indice, "a.pdf", 200)
+    assert fabrica_indices.indice_exato(indice.vector_store.index)
+
+    adicionar_arquivo(indice, "b.pdf", 200)
+    assert not fabrica_indices.indice_exato(indice.vector_store.index)
+    assert indice.total_trechos == 400
+
+    # Novos lotes entram no índice aproximado, sem recriá-lo
+    aproximado = indice.vector_store.index
+    adicionar_arquivo(indice, "c.pdf", 150)
+    assert indice.vector_store.index is aproximado
+
+    # Acima do limiar, a remoção recria o índice aproximado só com os vetores restantes
+    indice.remover("a.pdf")
+    assert indice.total_trechos == 350
+    assert not fabrica_indices.indice_exato(indice.vector_store.index)
+    assert set(indice.vector_store.index_to_docstore_id.values()) == set(
+        indice.arquivos["b.pdf"]["ids"] + indice.arquivos["c.pdf"]["ids"]
+    )
+    documentos = indice.buscar("b.pdf: trecho 7 sobre roteamento e endereçamento IP.", k=1, hibrida=False)
+    assert documentos[0].page_content == "b.pdf: trecho 7 sobre roteamento e endereçamento IP."
+
+    # Abaixo do limiar, volta a ser exato
+    indice.remover("b.pdf")
+    assert indice.total_trechos == 150
+    assert isinstance(faiss.downcast_index(indice.vector_store.index), faiss.IndexFlat)
+    documentos = indice.buscar("c.pdf: trecho 3 sobre roteamento e endereçamento IP.", k=1, hibrida=False)
+    assert documentos[0].page_content == "c.pdf: trecho 3 sobre roteamento e endereçamento IP."
+
+
+@pytest.mark.parametrize("tipo", ["ivf", "hnsw"])
+def test_reconstrucao_do_indice_nao_trava_buscas_nem_lotes(monkeypatch, tipo):
+    monkeypatch.setattr(fabrica_indices, "LIMIAR_ANN", 300)
+    monkeypatch.setattr(fabrica_indices, "TIPO_ANN", tipo)
+    construindo, liberar = threading.Event(), threading.Event()
+
+    def criar_indice_devagar(vetores):
+        construindo.set()
+        assert liberar.wait(10)
+        return fabrica_indices.criar_indice(vetores)
+
+    monkeypatch.setattr(indice_sessao, "criar_indice", criar_indice_devagar)
+    indice = IndiceSessao(EmbeddingsFalso())
+    adicionar_arquivo(indice, "a.pdf", 200)
+
+    # O lote que passa do limiar treina o índice aproximado em outra thread
+    crescimento = threading.Thread(target=adicionar_arquivo, args=(indice, "b.pdf", 200))
+    crescimento.start()
+    assert construindo.wait(10)
+    consulta = "a.pdf: trecho 5 sobre roteamento e endereçamento IP."
+    assert indice.buscar(consulta, k=1, hibrida=False)[0].page_content == consulta
+    adicionar_arquivo(indice, "c.pdf", 50)
+    liberar.set()
+    crescimento.join(10)
+
+    # Os vetores que chegaram durante a construção também estão no índice novo
+    assert not fabrica_indices.indice_exato(indice.vector_store.index)
+    assert indice.vector_store.index.ntotal == indice.total_trechos == 450
+    consulta = "c.pdf: trecho 7 sobre roteamento e endereçamento IP."
+    assert indice.buscar(consulta, k=1, hibrida=False)[0].page_content == consulta
+
+    # Remoção: a busca segue no índice antigo até a troca
+    construindo.clear()
+    liberar.clear()
+    remocao = threading.Thread(target=indice.remover, args=("a.pdf",))
+    remocao.start()
+    assert construindo.wait(10)
+    consulta = "b.pdf: trecho 3 sobre roteamento e endereçamento IP."
+    assert indice.buscar(consulta, k=1, hibrida=False)[0].page_content == consulta
+    adicionar_arquivo(indice, "d.pdf", 20)
+    liberar.set()
+    remocao.join(10)
+
+    assert indice.total_trechos == 270
+    assert set(indice.vector_store.index_to_docstore_id.values()) == {
+        id_trecho for nome in ("b.pdf", "c.pdf", "d.pdf") for id_trecho in indice.arquivos[nome]["ids"]
+    }
+    for nome, i in (("b.pdf", 11), ("d.pdf", 4)):
+        consulta = f"{nome}: trecho {i} sobre roteamento e endereçamento IP."
+        assert indice.buscar(consulta, k=1, hibrida=False)[0].page_content == consulta
@@ -0,0 +1,74 @@
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from utils.cache_embeddings import CacheEmbeddings
+from utils.falsos import EmbeddingsFalso
+from utils.indice_sessao import IndiceSessao
+from utils.ingestao import IngestaoIncremental
+
+
+class EmbeddingsComFalha(EmbeddingsFalso):
+    """Falha a partir da chamada informada, como uma queda da API no meio da ingestão."""
+
+    def __init__(self, falhar_na_chamada: int):
+        super().__init__()
+        self.falhar_na_chamada = falhar_na_chamada
+
+    def embed_documents(self, texts: list) -> list:
+        if self.chamadas + 1 >= self.falhar_na_chamada:
+            raise RuntimeError("API indisponível")
+        return super().embed_documents(texts)
+
+
+def paginas(nome: str, quantidade: int) -> list:
+    return [
+        Document(page_content=f"{nome}: conteúdo da página {i} sobre redes e protocolos.",
+                 metadata={"source": nome, "page": i})
+        for i in range(quantidade)
+    ]
+
+
+def ingerir(indice, chaves: dict, documentos: list, **opcoes) -> IngestaoIncremental:
+    for nome, chave in chaves.items():
+        indice.registrar(nome, chave)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    ingestao = IngestaoIncremental(iter(documentos), splitter, indice.embeddings, destino=indice, chaves=chaves,
+                                   tamanho_lote=2, **opcoes)
+    indice.ingestoes.append(ingestao.iniciar())
+    assert ingestao.concluido.wait(10)
+    return ingestao
+
+
+def test_erro_deixa_pendentes_os_arquivos_nao_concluidos():
+    indice = IndiceSessao(EmbeddingsComFalha(falhar_na_chamada=3))
+    ingestao = ingerir(indice, {"a.pdf": "ca", "b.pdf": "cb"}, paginas("a.pdf", 2) + paginas("b.pdf", 4))
+
+    assert isinstance(ingestao.erro, RuntimeError)
+    assert ingestao.arquivos_pendentes() == ["b.pdf"]
+    assert not indice.completo
+    # Os trechos parciais de b.pdf estão no índice até a próxima sincronização
+    assert len(indice.arquivos["b.pdf"]["ids"]) == 2
+
+
+def test_ingestao_com_cache_de_embeddings(tmp_path):
+    falso = EmbeddingsFalso()
+    indice = IndiceSessao(CacheEmbeddings(falso, modelo="teste", pasta=tmp_path))
+    concluidos = []
+    documentos = paginas("a.pdf", 3) + paginas("b.pdf", 2)
+    documentos.append(documentos[0].model_copy(update={"metadata": {"source": "b.pdf", "page": 2}}))
+
+    ingestao = ingerir(indice, {"a.pdf": "ca", "b.pdf": "cb"}, documentos,
+                       ao_concluir_arquivo=lambda nome, chave, vs, lexico: concluidos.append((nome, vs.index.ntotal)))
+
+    assert ingestao.erro is None and indice.completo
+    assert concluidos == [("a.pdf", 3), ("b.pdf", 3)]
+    assert indice.total_trechos == 6
+    # A página repetida em b.pdf não é vetorizada de novo
+    assert len(falso.textos_enviados) == 5
+    assert indice.buscar("a.pdf: conteúdo da página 1 sobre redes e protocolos.", k=1)[0].metadata["page"] == 1
+
+    # Outra sessão com o mesmo material não chama o modelo
+    falso_novo = EmbeddingsFalso()
+    outra = IndiceSessao(CacheEmbeddings(falso_novo, modelo="teste", pasta=tmp_path))
+    ingerir(outra, {"a.pdf": "ca"}, paginas("a.pdf", 3))
+    assert falso_novo.chamadas == 0
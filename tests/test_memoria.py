@@ -0,0 +1,39 @@
+from utils.falsos import chat_falso
+from utils.memoria import MemoriaResumida
+
+
+def conversar(memoria, turnos: int) -> None:
+    for i in range(turnos):
+        memoria.save_context({"question": f"Pergunta {i}?"}, {"answer": f"Resposta {i}."})
+
+
+def criar_memoria(**opcoes):
+    return MemoriaResumida(
+        llm=chat_falso(["resumo da conversa"] * 50), memory_key="chat_history", output_key="answer",
+        return_messages=True, **opcoes
+    )
+
+
+def test_resumo_em_lotes():
+    memoria = criar_memoria(max_token_limit=10_000, turnos_recentes=2)
+    conversar(memoria, 4)
+    assert memoria.resumos_gerados == 0
+    assert len(memoria.chat_memory.messages) == 8
+
+    # O 5º turno passa do dobro dos turnos recentes: um só resumo volta a 2 turnos
+    conversar(memoria, 1)
+    assert memoria.resumos_gerados == 1
+    assert len(memoria.chat_memory.messages) == 4
+    assert memoria.moving_summary_buffer == "resumo da conversa"
+
+    conversar(memoria, 5)
+    assert memoria.resumos_gerados == 2
+    assert len(memoria.tokens_por_turno) == 10
+
+
+def test_orcamento_de_tokens_forca_resumo():
+    memoria = criar_memoria(max_token_limit=20, turnos_recentes=4)
+    conversar(memoria, 3)
+    assert memoria.resumos_gerados >= 1
+    # O último turno sempre fica na íntegra
+    assert memoria.chat_memory.messages[-1].content == "Resposta 2."
@@ -1,9 +1,9 @@
-from openai import OpenAI
-import os
+from utils.clientes import cliente_openai
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # ou defina direto como string
+client = cliente_openai()  # cliente compartilhado (pool HTTP único por endpoint)
 
-def analisar_desempenho_ia(respostas_usuario):
+# 🧠 Gera o feedback do quiz; falhas da API sobem como exceção (a fila de relatórios tenta de novo)
+def gerar_feedback_ia(respostas_usuario):
     resumo_respostas = ""
     for idx, r in enumerate(respostas_usuario, start=1):
         status = "Correta" if r["correta"] else "Incorreta"
@@ -35,13 +35,18 @@ def analisar_desempenho_ia(respostas_usuario):
         "Agora escreva um feedback claro, didático, detalhado e com tom motivador:"
     )
 
+    response = client.chat.completions.create(
+        model="gpt-3.5-turbo-0125",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+        max_tokens=1200
+    )
+    return response.choices[0].message.content.strip()
+
+
+# Mesma análise, mas devolvendo o erro como texto (para quem não trata exceções)
+def analisar_desempenho_ia(respostas_usuario):
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=1200
-        )
-        return response.choices[0].message.content.strip()
+        return gerar_feedback_ia(respostas_usuario)
     except Exception as e:
         return f"Ocorreu um erro ao gerar o feedback com IA: {str(e)}"
@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.quiz import normalizar_pergunta
+
+# 📁 Diretório com um banco de perguntas (JSON) por documento
+PASTA_BANCOS = Path(__file__).parent.parent / "bancos_perguntas"
+# Abaixo desta quantidade o banco é reabastecido em segundo plano
+MINIMO_BANCO = int(os.getenv("MINIMO_BANCO_PERGUNTAS", "30"))
+
+
+class BancoPerguntas:
+    """
+    Bancos de perguntas de quiz em disco, um por hash de documento. Os quizzes
+    são sorteados do banco; a geração só acontece para completar um banco abaixo
+    do mínimo, com no máximo um job por documento em andamento.
+    :param gerar: Função (caminho do PDF) -> lista de perguntas novas
+    :param minimo: Quantidade de perguntas que dispensa novas gerações
+    """
+
+    def __init__(self, gerar, pasta=PASTA_BANCOS, minimo=MINIMO_BANCO, workers=2):
+        self.gerar = gerar
+        self.pasta = Path(pasta)
+        self.minimo = minimo
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="banco_perguntas")
+        self._trava = threading.Lock()
+        self._novas = threading.Condition(self._trava)  # avisa a cada gravação ou job encerrado
+        self._em_andamento = {}  # chave -> Future do reabastecimento
+
+    def _caminho(self, chave: str) -> Path:
+        return self.pasta / f"{chave}.json"
+
+    def perguntas(self, chave: str) -> list:
+        caminho = self._caminho(chave)
+        if not caminho.exists():
+            return []
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+
+    def adicionar(self, chave: str, novas: list) -> int:
+        with self._novas:
+            atuais = self.perguntas(chave)
+            vistas = {normalizar_pergunta(p["pergunta"]) for p in atuais}
+            for pergunta in novas:
+                normalizada = normalizar_pergunta(pergunta["pergunta"])
+                if normalizada and normalizada not in vistas:
+                    vistas.add(normalizada)
+                    atuais.append(pergunta)
+
+            # Grava num arquivo temporário e renomeia (nunca deixa um JSON pela metade)
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            temporario = self.pasta / f".{chave}_{uuid.uuid4().hex}.json"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(atuais, f, ensure_ascii=False)
+            os.replace(temporario, self._caminho(chave))
+            self._novas.notify_all()
+            return len(atuais)
+
+    def _reabastecer(self, chave: str, arquivo) -> None:
+        try:
+            # Algumas rodadas, caso a deduplicação descarte boa parte das perguntas
+            for _ in range(3):
+                if len(self.perguntas(chave)) >= self.minimo:
+                    break
+                self.adicionar(chave, self.gerar(arquivo))
+        finally:
+            with self._novas:
+                self._em_andamento.pop(chave, None)
+                self._novas.notify_all()
+
+    # 🔄 Agenda o reabastecimento (se preciso); devolve o job em andamento ou None
+    def reabastecer(self, chave: str, arquivo):
+        with self._trava:
+            if chave in self._em_andamento:
+                return self._em_andamento[chave]
+            if len(self.perguntas(chave)) >= self.minimo:
+                return None
+            futuro = self._executor.submit(self._reabastecer, chave, arquivo)
+            self._em_andamento[chave] = futuro
+            return futuro
+
+    # ⏳ Espera os bancos dos documentos somarem a quantidade pedida (ou os jobs
+    # deles terminarem), sem esperar o reabastecimento inteiro; devolve o total
+    def aguardar(self, chaves: list, quantidade: int, timeout=None) -> int:
+        def total():
+            return sum(len(self.perguntas(chave)) for chave in chaves)
+
+        with self._novas:
+            self._novas.wait_for(
+                lambda: total() >= quantidade or not any(chave in self._em_andamento for chave in chaves), timeout
+            )
+            return total()
+
+    # 🎲 Sorteia um quiz com as perguntas dos documentos informados, sem repetir
+    # uma pergunta que esteja em mais de um banco (ou o mesmo PDF duas vezes)
+    def sortear(self, chaves: list, quantidade: int) -> list:
+        todas = {}
+        for chave in dict.fromkeys(chaves):
+            for pergunta in self.perguntas(chave):
+                todas.setdefault(normalizar_pergunta(pergunta["pergunta"]), pergunta)
+        return random.sample(list(todas.values()), min(quantidade, len(todas)))
@@ -0,0 +1,182 @@
+import heapq
+import math
+import os
+import pickle
+import re
+import unicodedata
+import uuid
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+# ⚙️ Parâmetros do BM25 e constante da fusão por posição (RRF)
+BM25_K1 = 1.5
+BM25_B = 0.75
+CONSTANTE_RRF = 60
+
+RE_PALAVRA = re.compile(r"\w+")
+
+# 🚫 Palavras muito frequentes em português (já sem acentos), ignoradas na indexação
+STOPWORDS = frozenset("""
+a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas dele deles depois do dos e
+ela elas ele eles em entre era eram essa essas esse esses esta estao estas estava este estes eu foi foram ha
+isso isto ja la lhe lhes mais mas me mesmo meu minha muito na nao nas nem no nos nossa nosso num numa o os ou
+para pela pelas pelo pelos por qual quando que quem se sem ser seu seus sua suas so sao tambem te tem tu um
+uma umas uns voce voces vos
+""".split())
+
+# ✂️ Sufixos removidos pelo radicalizador (ordem importa: os mais longos primeiro)
+SUFIXOS_PLURAL = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ns", "m"), ("res", "r"), ("zes", "z"))
+SUFIXOS_FEMININO = (("ona", "ao"), ("ora", "or"), ("ina", "ino"), ("osa", "oso"), ("iva", "ivo"), ("ica", "ico"),
+                    ("ada", "ado"), ("ida", "ido"))
+SUFIXOS_NOME = ("amento", "imento", "izacao", "acao", "icao", "mento", "idade", "ancia", "encia", "ismo", "ista",
+                "avel", "ivel", "ador", "edor", "idor", "ante", "ente", "oso", "ivo", "ico", "ado", "ido")
+SUFIXOS_VERBO = ("ando", "endo", "indo", "aram", "eram", "iram", "ava", "iam", "ara", "era", "ira", "ar", "er",
+                 "ir", "am", "em", "ou")
+RADICAL_MINIMO = 3
+
+
+def sem_acentos(texto: str) -> str:
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+# 🌱 Radicalizador leve para português (inspirado no RSLP): plural, feminino,
+# advérbio, sufixos nominais e verbais e a vogal final. Siglas (sem vogais,
+# como "tcp" ou "dns") e termos com dígitos (portas, versões) ficam intactos
+@lru_cache(maxsize=100_000)
+def radical(palavra: str) -> str:
+    if len(palavra) <= 3 or any(c.isdigit() for c in palavra) or not any(c in "aeiou" for c in palavra):
+        return palavra
+
+    if palavra.endswith("s"):
+        for sufixo, troca in SUFIXOS_PLURAL:
+            if palavra.endswith(sufixo):
+                palavra = palavra[: -len(sufixo)] + troca
+                break
+        else:
+            if not palavra.endswith(("ss", "us", "is")):
+                palavra = palavra[:-1]
+
+    for sufixo, troca in SUFIXOS_FEMININO:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= RADICAL_MINIMO:
+            palavra = palavra[: -len(sufixo)] + troca
+            break
+
+    if palavra.endswith("mente") and len(palavra) - 5 >= RADICAL_MINIMO + 1:
+        palavra = palavra[:-5]
+
+    for sufixos in (SUFIXOS_NOME, SUFIXOS_VERBO):
+        sufixo = next((s for s in sufixos if palavra.endswith(s) and len(palavra) - len(s) >= RADICAL_MINIMO), None)
+        if sufixo:
+            palavra = palavra[: -len(sufixo)]
+            break
+
+    if palavra[-1] in "aeo" and len(palavra) > RADICAL_MINIMO:
+        palavra = palavra[:-1]
+    return palavra
+
+
+# 🔤 Termos indexados de um texto: minúsculas sem acento, sem stopwords, radicalizados
+def termos_texto(texto: str) -> Counter:
+    palavras = RE_PALAVRA.findall(sem_acentos(texto.lower()))
+    return Counter(radical(p) for p in palavras if p not in STOPWORDS and (len(p) > 1 or p.isdigit()))
+
+
+# 🔀 Fusão por posição recíproca: cada lista contribui com 1 / (constante + posição)
+def fusao_rrf(listas, constante=CONSTANTE_RRF) -> list:
+    pontos = {}
+    for lista in listas:
+        for posicao, chave in enumerate(lista, start=1):
+            pontos[chave] = pontos.get(chave, 0.0) + 1.0 / (constante + posicao)
+    return sorted(pontos, key=pontos.get, reverse=True)
+
+
+class IndiceLexico:
+    """
+    Índice invertido em memória com ranqueamento BM25, endereçado pelos mesmos
+    ids do docstore do FAISS (um trecho pode ser incluído ou removido sozinho).
+    :param k1: Saturação da frequência do termo
+    :param b: Peso da normalização pelo tamanho do trecho
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._termos = {}  # id -> {termo: frequência}
+        self._postings = {}  # termo -> {id: frequência}
+        self._tamanhos = {}  # id -> quantidade de termos do trecho
+        self._tamanho_total = 0
+
+    def __len__(self) -> int:
+        return len(self._termos)
+
+    def termos(self, id_trecho: str) -> dict:
+        return self._termos.get(id_trecho, {})
+
+    # 📥 Inclui trechos a partir do texto ou de termos já contados (ex.: vindos do cache)
+    def adicionar(self, ids: list, textos=None, termos=None) -> None:
+        termos = termos if termos is not None else [termos_texto(t) for t in textos]
+        for id_trecho, contagem in zip(ids, termos):
+            if id_trecho in self._termos:
+                self.remover([id_trecho])
+            contagem = dict(contagem)
+            self._termos[id_trecho] = contagem
+            self._tamanhos[id_trecho] = sum(contagem.values())
+            self._tamanho_total += self._tamanhos[id_trecho]
+            for termo, frequencia in contagem.items():
+                self._postings.setdefault(termo, {})[id_trecho] = frequencia
+
+    def remover(self, ids: list) -> None:
+        for id_trecho in ids:
+            contagem = self._termos.pop(id_trecho, None)
+            if contagem is None:
+                continue
+            self._tamanho_total -= self._tamanhos.pop(id_trecho)
+            for termo in contagem:
+                posting = self._postings[termo]
+                del posting[id_trecho]
+                if not posting:
+                    del self._postings[termo]
+
+    # 🔎 Devolve [(id, pontuação)] dos k trechos mais relevantes para a consulta
+    def buscar(self, consulta: str, k: int = 4) -> list:
+        total = len(self._termos)
+        if not total:
+            return []
+        media = self._tamanho_total / total
+
+        pontos = {}
+        for termo in termos_texto(consulta):
+            posting = self._postings.get(termo)
+            if not posting:
+                continue
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for id_trecho, frequencia in posting.items():
+                normalizacao = self.k1 * (1 - self.b + self.b * self._tamanhos[id_trecho] / media)
+                peso = frequencia * (self.k1 + 1) / (frequencia + normalizacao)
+                pontos[id_trecho] = pontos.get(id_trecho, 0.0) + idf * peso
+        return heapq.nlargest(k, pontos.items(), key=lambda par: par[1])
+
+    # 💾 Só os termos por trecho vão para o disco; o índice invertido é refeito ao carregar
+    def salvar(self, caminho) -> None:
+        caminho = Path(caminho)
+        temporario = caminho.with_name(f".{uuid.uuid4().hex}.tmp")
+        with open(temporario, "wb") as f:
+            pickle.dump(self._termos, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho) -> "IndiceLexico":
+        with open(caminho, "rb") as f:
+            termos = pickle.load(f)
+        lexico = cls()
+        lexico.adicionar(list(termos), termos=list(termos.values()))
+        return lexico
+
+    # 🧱 Monta o índice a partir dos trechos guardados num vector store FAISS
+    @classmethod
+    def do_vector_store(cls, vector_store) -> "IndiceLexico":
+        lexico = cls()
+        ids = list(vector_store.index_to_docstore_id.values())
+        lexico.adicionar(ids, [vector_store.docstore.search(i).page_content for i in ids])
+        return lexico
@@ -0,0 +1,172 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# 📁 Diretório onde os vetores já calculados ficam guardados
+PASTA_EMBEDDINGS = Path(__file__).parent.parent / "embeddings"
+# Quantidade máxima de textos enviados por chamada ao modelo de embeddings
+TAMANHO_LOTE = 1000
+# Consultas recentes guardadas em memória (a mesma pergunta é vetorizada pelo cache de respostas e pela busca)
+MAX_CONSULTAS = 256
+
+
+# 🧹 Normaliza espaços para que cabeçalhos/rodapés repetidos gerem a mesma chave
+def normalizar_texto(texto: str) -> str:
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def chave_texto(texto_normalizado: str, modelo: str) -> str:
+    return hashlib.sha256(f"{modelo}\0{texto_normalizado}".encode("utf-8")).hexdigest()
+
+
+class ArmazemVetores:
+    """
+    Vetores float32 gravados em sequência num único arquivo (lido via memmap),
+    com um índice SQLite que associa cada chave à sua linha no arquivo.
+    :param pasta: Diretório do armazém (um por modelo de embeddings)
+    """
+
+    def __init__(self, pasta):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.caminho_vetores = self.pasta / "vetores.f32"
+        self.caminho_vetores.touch(exist_ok=True)
+
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.pasta / "indice.sqlite"), check_same_thread=False)
+        self._conexao.execute("CREATE TABLE IF NOT EXISTS vetores (chave TEXT PRIMARY KEY, linha INTEGER NOT NULL)")
+        self._conexao.execute("CREATE TABLE IF NOT EXISTS meta (nome TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+        self._conexao.commit()
+
+        self._mapa = None
+        self.dimensao = self._ler_dimensao()
+
+    def _ler_dimensao(self):
+        linha = self._conexao.execute("SELECT valor FROM meta WHERE nome = 'dimensao'").fetchone()
+        return linha[0] if linha else None
+
+    def _linhas_gravadas(self) -> int:
+        return self.caminho_vetores.stat().st_size // (self.dimensao * 4)
+
+    def _vetores(self, linha_necessaria: int):
+        # Remapeia o arquivo só quando ele cresceu além do trecho já mapeado
+        if self._mapa is None or self._mapa.shape[0] <= linha_necessaria:
+            self._mapa = np.memmap(
+                self.caminho_vetores, dtype=np.float32, mode="r",
+                shape=(self._linhas_gravadas(), self.dimensao)
+            )
+        return self._mapa
+
+    def buscar(self, chaves: list) -> dict:
+        encontrados = {}
+        if not chaves or self.dimensao is None:
+            return encontrados
+
+        with self._trava:
+            linhas = {}
+            # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+            for inicio in range(0, len(chaves), 900):
+                bloco = chaves[inicio:inicio + 900]
+                marcadores = ",".join("?" * len(bloco))
+                linhas.update(self._conexao.execute(
+                    f"SELECT chave, linha FROM vetores WHERE chave IN ({marcadores})", bloco
+                ).fetchall())
+
+            if linhas:
+                vetores = self._vetores(max(linhas.values()))
+                for chave, linha in linhas.items():
+                    encontrados[chave] = np.array(vetores[linha])
+
+        return encontrados
+
+    def gravar(self, chaves: list, vetores) -> None:
+        if not chaves:
+            return
+        matriz = np.asarray(vetores, dtype=np.float32)
+
+        with self._trava:
+            # BEGIN IMMEDIATE serializa gravações de outros processos no mesmo armazém
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dimensao is None:
+                    self.dimensao = self._ler_dimensao() or int(matriz.shape[1])
+                    self._conexao.execute(
+                        "INSERT OR IGNORE INTO meta (nome, valor) VALUES ('dimensao', ?)", (self.dimensao,)
+                    )
+
+                primeira_linha = self._linhas_gravadas()
+                with open(self.caminho_vetores, "ab") as f:
+                    f.write(matriz.tobytes())
+                    f.flush()
+
+                self._conexao.executemany(
+                    "INSERT OR IGNORE INTO vetores (chave, linha) VALUES (?, ?)",
+                    [(chave, primeira_linha + i) for i, chave in enumerate(chaves)]
+                )
+                self._conexao.commit()
+            except Exception:
+                self._conexao.rollback()
+                raise
+
+
+class CacheEmbeddings(Embeddings):
+    """
+    Envolve um modelo de embeddings reaproveitando vetores já calculados.
+    Textos repetidos no mesmo lote são enviados uma única vez e só as
+    ausências do cache vão ao modelo, em lotes grandes.
+    :param embeddings: Modelo real (ex.: OpenAIEmbeddings)
+    :param modelo: Nome do modelo, parte da chave de cada vetor
+    """
+
+    def __init__(self, embeddings, modelo: str, pasta=PASTA_EMBEDDINGS, tamanho_lote=TAMANHO_LOTE):
+        self.embeddings = embeddings
+        self.modelo = modelo
+        self.tamanho_lote = tamanho_lote
+        self.armazem = ArmazemVetores(Path(pasta) / re.sub(r"[^\w.-]", "_", modelo))
+        self._consultas = OrderedDict()
+        self._trava_consultas = threading.Lock()
+
+        # 📊 Contadores para acompanhar o reaproveitamento
+        self.acertos = 0
+        self.faltas = 0
+        self.chamadas = 0
+
+    def embed_documents(self, texts: list) -> list:
+        normalizados = [normalizar_texto(t) for t in texts]
+        chaves = [chave_texto(t, self.modelo) for t in normalizados]
+
+        # Um texto por chave, preservando a ordem de primeira ocorrência
+        unicos = dict(zip(chaves, normalizados))
+        vetores = self.armazem.buscar(list(unicos))
+        faltando = [chave for chave in unicos if chave not in vetores]
+
+        self.acertos += len(unicos) - len(faltando)
+        self.faltas += len(faltando)
+
+        for inicio in range(0, len(faltando), self.tamanho_lote):
+            lote = faltando[inicio:inicio + self.tamanho_lote]
+            novos = self.embeddings.embed_documents([unicos[chave] for chave in lote])
+            self.chamadas += 1
+            self.armazem.gravar(lote, novos)
+            vetores.update(zip(lote, np.asarray(novos, dtype=np.float32)))
+
+        return [vetores[chave].tolist() for chave in chaves]
+
+    def embed_query(self, text: str) -> list:
+        with self._trava_consultas:
+            if text in self._consultas:
+                self._consultas.move_to_end(text)
+                return self._consultas[text]
+
+        vetor = self.embeddings.embed_query(text)
+        with self._trava_consultas:
+            self._consultas[text] = vetor
+            if len(self._consultas) > MAX_CONSULTAS:
+                self._consultas.popitem(last=False)
+        return vetor
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+import faiss
+from langchain_community.vectorstores.faiss import FAISS
+
+from utils.busca_lexica import IndiceLexico
+
+# 📁 Diretório onde os índices FAISS já construídos ficam guardados
+PASTA_INDICES = Path(__file__).parent.parent / "indices"
+# Tamanho máximo do cache em disco (MB); os índices menos usados são removidos primeiro
+LIMITE_CACHE_MB = int(os.getenv("CACHE_INDICES_MB", "512"))
+# Índice léxico (BM25) gravado ao lado do index.faiss
+ARQUIVO_LEXICO = "lexico.pkl"
+
+
+# 🔑 Hash SHA-256 do conteúdo do PDF (independe do nome do arquivo / sessão)
+def hash_arquivo(caminho) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+# 🔑 Chave do índice: hash do PDF + parâmetros usados para dividir e vetorizar
+def chave_indice(hash_pdf: str, parametros: dict) -> str:
+    texto = hash_pdf + json.dumps(parametros, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _tamanho_pasta(pasta: Path) -> int:
+    return sum(f.stat().st_size for f in pasta.iterdir() if f.is_file())
+
+
+class CacheIndices:
+    """
+    Cache em disco de índices FAISS endereçado por conteúdo, com remoção LRU.
+    :param pasta: Diretório raiz do cache
+    :param limite_mb: Tamanho máximo ocupado pelo cache
+    """
+
+    def __init__(self, pasta=PASTA_INDICES, limite_mb=LIMITE_CACHE_MB):
+        self.pasta = Path(pasta)
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self._trava = threading.Lock()
+
+    def _caminho(self, chave: str) -> Path:
+        return self.pasta / chave
+
+    def contem(self, chave: str) -> bool:
+        return (self._caminho(chave) / "index.faiss").exists()
+
+    def carregar(self, chave: str, embeddings):
+        caminho = self._caminho(chave)
+        if not (caminho / "index.faiss").exists():
+            return None
+
+        try:
+            vector_store = FAISS.load_local(
+                str(caminho),
+                embeddings,
+                allow_dangerous_deserialization=True  # só lemos índices gravados por nós
+            )
+        except Exception:
+            # Índice corrompido ou de versão incompatível: descarta e reconstrói
+            shutil.rmtree(caminho, ignore_errors=True)
+            return None
+
+        # Atualiza o "último acesso" usado pela remoção LRU
+        os.utime(caminho)
+        return vector_store
+
+    # 📌 Abre o índice mapeado em memória e somente leitura: os vetores ficam no
+    # arquivo e são compartilhados (via cache de páginas do SO) entre processos
+    def carregar_mmap(self, chave: str, embeddings):
+        caminho = self._caminho(chave)
+        if not (caminho / "index.faiss").exists():
+            return None
+
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            indice = faiss.read_index(str(caminho / "index.faiss"), flags)
+        except RuntimeError:
+            # Tipo de índice sem suporte a mmap nesta versão do faiss
+            indice = faiss.read_index(str(caminho / "index.faiss"))
+        with open(caminho / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+        os.utime(caminho)
+        return FAISS(embeddings, indice, docstore, index_to_docstore_id)
+
+    # 🔤 Índice léxico do mesmo trecho; entradas antigas, gravadas sem ele, são completadas aqui
+    def carregar_lexico(self, chave: str):
+        caminho = self._caminho(chave)
+        if not (caminho / "index.faiss").exists():
+            return None
+
+        try:
+            return IndiceLexico.carregar(caminho / ARQUIVO_LEXICO)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            (caminho / ARQUIVO_LEXICO).unlink(missing_ok=True)
+
+        with open(caminho / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        lexico = IndiceLexico()
+        ids = list(index_to_docstore_id.values())
+        lexico.adicionar(ids, [docstore.search(i).page_content for i in ids])
+        lexico.salvar(caminho / ARQUIVO_LEXICO)
+        return lexico
+
+    def salvar(self, chave: str, vector_store, lexico=None) -> None:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        destino = self._caminho(chave)
+        temporario = self.pasta / f".tmp_{chave}_{uuid.uuid4().hex}"
+
+        # Grava numa pasta temporária e renomeia, para nunca expor um índice pela metade
+        vector_store.save_local(str(temporario))
+        lexico = lexico if lexico is not None else IndiceLexico.do_vector_store(vector_store)
+        lexico.salvar(temporario / ARQUIVO_LEXICO)
+        with self._trava:
+            if destino.exists():
+                shutil.rmtree(temporario, ignore_errors=True)
+            else:
+                os.replace(temporario, destino)
+            self._remover_antigos()
+
+    def _remover_antigos(self) -> None:
+        entradas = [p for p in self.pasta.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        tamanhos = {p: _tamanho_pasta(p) for p in entradas}
+        total = sum(tamanhos.values())
+
+        # Mais antigos (menos acessados recentemente) primeiro
+        for pasta in sorted(entradas, key=lambda p: p.stat().st_mtime):
+            if total <= self.limite_bytes:
+                break
+            shutil.rmtree(pasta, ignore_errors=True)
+            total -= tamanhos[pasta]
@@ -0,0 +1,173 @@
+import mmap
+import os
+import struct
+import threading
+import uuid
+from array import array
+from functools import lru_cache
+from pathlib import Path
+
+from utils.cache_indices import hash_arquivo
+
+# 📁 Texto já extraído dos PDFs, um arquivo por hash de conteúdo
+PASTA_PAGINAS = Path(os.getenv("CACHE_PAGINAS_DIR", Path(__file__).parent.parent / "paginas"))
+# Tamanho máximo do cache em disco (MB); os arquivos menos usados são removidos primeiro
+LIMITE_PAGINAS_MB = int(os.getenv("CACHE_PAGINAS_MB", "256"))
+
+# Formato: cabeçalho (assinatura, nº de páginas), tabela com n + 1 deslocamentos (uint64)
+# e o texto UTF-8 de todas as páginas em sequência
+ASSINATURA = b"PAG1"
+CABECALHO = struct.Struct("<4sI")
+
+
+# 🔑 Hash do PDF, recalculado só quando o arquivo muda (tamanho ou data de modificação)
+def hash_pdf(caminho) -> str:
+    info = os.stat(caminho)
+    return _hash_pdf(str(caminho), info.st_size, info.st_mtime_ns)
+
+
+@lru_cache(maxsize=1024)
+def _hash_pdf(caminho: str, tamanho: int, modificado_ns: int) -> str:
+    return hash_arquivo(caminho)
+
+
+class PaginasPDF:
+    """
+    Texto das páginas de um PDF lido sob demanda de um arquivo mapeado em
+    memória: só a página pedida é decodificada.
+    :param caminho: Arquivo .pag do cache
+    """
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assinatura, total = CABECALHO.unpack_from(self._mapa)
+        if assinatura != ASSINATURA:
+            self._mapa.close()
+            raise ValueError(f"arquivo de páginas inválido: {caminho}")
+        self._visao = memoryview(self._mapa)
+        self._deslocamentos = self._visao[CABECALHO.size:CABECALHO.size + 8 * (total + 1)].cast("Q")
+        self._inicio_texto = CABECALHO.size + 8 * (total + 1)
+
+    def __len__(self) -> int:
+        return len(self._deslocamentos) - 1
+
+    def __getitem__(self, pagina: int) -> str:
+        if not 0 <= pagina < len(self):
+            raise IndexError(pagina)
+        inicio = self._inicio_texto + self._deslocamentos[pagina]
+        fim = self._inicio_texto + self._deslocamentos[pagina + 1]
+        return self._mapa[inicio:fim].decode("utf-8", "surrogatepass")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def fechar(self) -> None:
+        self._deslocamentos.release()
+        self._visao.release()
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+class CachePaginas:
+    """
+    Cache em disco do texto extraído dos PDFs, endereçado pelo hash do conteúdo,
+    com remoção LRU. Uma segunda leitura do mesmo PDF não passa pelo pypdf.
+    :param pasta: Diretório do cache
+    :param limite_mb: Tamanho máximo ocupado pelo cache
+    """
+
+    def __init__(self, pasta=PASTA_PAGINAS, limite_mb=LIMITE_PAGINAS_MB):
+        self.pasta = Path(pasta)
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self._trava = threading.Lock()
+
+    def _caminho(self, chave: str) -> Path:
+        return self.pasta / f"{chave}.pag"
+
+    def abrir(self, chave: str):
+        caminho = self._caminho(chave)
+        try:
+            paginas = PaginasPDF(caminho)
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error):
+            caminho.unlink(missing_ok=True)  # arquivo corrompido: extrai de novo
+            return None
+        os.utime(caminho)  # "último acesso" usado pela remoção LRU
+        return paginas
+
+    # 📄 Uma página de um PDF, sem decodificar as demais (None se o PDF ainda não está no cache)
+    def pagina(self, arquivo, numero: int):
+        paginas = self.abrir(hash_pdf(arquivo))
+        if paginas is None:
+            return None
+        with paginas:
+            return paginas[numero]
+
+    def salvar(self, chave: str, textos: list) -> None:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        conteudos = [t.encode("utf-8", "surrogatepass") for t in textos]
+        deslocamentos = array("Q", [0])
+        for conteudo in conteudos:
+            deslocamentos.append(deslocamentos[-1] + len(conteudo))
+
+        # Grava num temporário e renomeia, para nunca expor um arquivo pela metade
+        temporario = self.pasta / f".{uuid.uuid4().hex}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(CABECALHO.pack(ASSINATURA, len(conteudos)))
+            f.write(deslocamentos.tobytes())
+            f.writelines(conteudos)
+        os.replace(temporario, self._caminho(chave))
+        with self._trava:
+            self._remover_antigos()
+
+    def _remover_antigos(self) -> None:
+        arquivos = list(self.pasta.glob("*.pag"))
+        tamanhos = {p: p.stat().st_size for p in arquivos}
+        total = sum(tamanhos.values())
+        for arquivo in sorted(arquivos, key=lambda p: p.stat().st_mtime):
+            if total <= self.limite_bytes:
+                break
+            arquivo.unlink(missing_ok=True)
+            total -= tamanhos[arquivo]
+
+    # 🔁 Páginas (caminho, número, total, texto) dos arquivos, na ordem: as que estão no
+    # cache saem dele; as demais vêm de `extrair(pendentes)` e são guardadas ao fim de cada PDF
+    def iterar(self, arquivos: list, extrair):
+        chaves = {caminho: hash_pdf(caminho) for caminho in arquivos}
+        abertos = {}
+        for caminho in arquivos:
+            paginas = self.abrir(chaves[caminho])
+            if paginas is not None:
+                abertos[caminho] = paginas
+
+        extraidas = iter(extrair([c for c in arquivos if c not in abertos]))
+        proxima = next(extraidas, None)
+        try:
+            for caminho in arquivos:
+                if caminho in abertos:
+                    total = len(abertos[caminho])
+                    for numero, texto in enumerate(abertos[caminho]):
+                        yield caminho, numero, total, texto
+                    continue
+
+                textos = []
+                while proxima is not None and proxima[0] == caminho:
+                    textos.append(proxima[3])
+                    yield proxima
+                    proxima = next(extraidas, None)
+                self.salvar(chaves[caminho], textos)
+        finally:
+            for paginas in abertos.values():
+                paginas.fechar()
+
+
+@lru_cache(maxsize=1)
+def cache_paginas() -> CachePaginas:
+    return CachePaginas()
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# 🔑 Impressão digital do conjunto de documentos consultado pela sessão
+def digital_documentos(chaves_documentos) -> str:
+    return hashlib.sha256("\n".join(sorted(chaves_documentos)).encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    """
+    Cache semântico de respostas, compartilhado entre sessões: uma pergunta
+    parecida (similaridade de cosseno acima do limiar) sobre o mesmo conjunto
+    de documentos reaproveita a resposta já gerada.
+    :param embeddings: Modelo usado para vetorizar as perguntas
+    :param limiar: Similaridade mínima para considerar as perguntas equivalentes
+    :param ttl_s: Validade de cada resposta, em segundos
+    :param max_itens: Quantidade máxima de respostas guardadas (remoção LRU)
+    """
+
+    def __init__(self, embeddings, limiar=0.95, ttl_s=24 * 3600, max_itens=2000):
+        self.embeddings = embeddings
+        self.limiar = limiar
+        self.ttl_s = ttl_s
+        self.max_itens = max_itens
+
+        self._trava = threading.Lock()
+        self._itens = OrderedDict()  # id -> dados da resposta, do menos ao mais recente
+        self._por_digital = {}  # digital -> ids das respostas daquele conjunto de documentos
+        self._por_documento = {}  # chave do documento -> ids das respostas que o consultaram
+        self._proximo_id = 0
+
+        # 📊 Contadores
+        self.acertos = 0
+        self.faltas = 0
+        self.tempo_economizado = 0.0
+
+    def vetorizar(self, pergunta: str) -> np.ndarray:
+        vetor = np.asarray(self.embeddings.embed_query(pergunta), dtype=np.float32)
+        return vetor / (np.linalg.norm(vetor) or 1.0)
+
+    def buscar(self, digital: str, vetor: np.ndarray):
+        agora = time.time()
+        with self._trava:
+            ids = [i for i in self._por_digital.get(digital, []) if agora - self._itens[i]["criado_em"] <= self.ttl_s]
+            if ids:
+                similaridades = np.stack([self._itens[i]["vetor"] for i in ids]) @ vetor
+                melhor = int(np.argmax(similaridades))
+                if similaridades[melhor] >= self.limiar:
+                    item = self._itens[ids[melhor]]
+                    self._itens.move_to_end(ids[melhor])
+                    self.acertos += 1
+                    self.tempo_economizado += item["latencia"]
+                    return item["resposta"]
+
+            self.faltas += 1
+            return None
+
+    def guardar(self, digital: str, documentos, vetor: np.ndarray, resposta: str, latencia: float) -> None:
+        with self._trava:
+            id_item = self._proximo_id
+            self._proximo_id += 1
+            self._itens[id_item] = {
+                "digital": digital,
+                "documentos": frozenset(documentos),
+                "vetor": vetor,
+                "resposta": resposta,
+                "latencia": latencia,
+                "criado_em": time.time(),
+            }
+            self._por_digital.setdefault(digital, []).append(id_item)
+            for chave in self._itens[id_item]["documentos"]:
+                self._por_documento.setdefault(chave, set()).add(id_item)
+            self._remover_excedentes()
+
+    def _remover(self, id_item) -> None:
+        item = self._itens.pop(id_item)
+        ids = self._por_digital[item["digital"]]
+        ids.remove(id_item)
+        if not ids:
+            del self._por_digital[item["digital"]]
+        for chave in item["documentos"]:
+            dependentes = self._por_documento[chave]
+            dependentes.discard(id_item)
+            if not dependentes:
+                del self._por_documento[chave]
+
+    def _remover_excedentes(self) -> None:
+        agora = time.time()
+        for id_item in [i for i, item in self._itens.items() if agora - item["criado_em"] > self.ttl_s]:
+            self._remover(id_item)
+        while len(self._itens) > self.max_itens:
+            self._remover(next(iter(self._itens)))
+
+    # 🗑️ Descarta as respostas que consultaram o documento (ex.: arquivo trocado ou removido)
+    def invalidar_documento(self, chave_documento: str) -> int:
+        with self._trava:
+            ids = list(self._por_documento.get(chave_documento, ()))
+            for id_item in ids:
+                self._remover(id_item)
+            return len(ids)
+
+    def metricas(self) -> dict:
+        consultas = self.acertos + self.faltas
+        return {
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "tempo_economizado_s": self.tempo_economizado,
+            "itens": len(self._itens),
+        }
@@ -0,0 +1,132 @@
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from utils.relatorio import PASTA_RELATORIOS
+
+# 📁 Banco do catálogo (fora de relatorioQuiz/, que é servido pelo flask_server)
+CAMINHO_CATALOGO = Path(os.getenv(
+    "CATALOGO_RELATORIOS", Path(__file__).parent.parent / "catalogo_relatorios.sqlite"
+))
+# Ordenações aceitas pela busca
+ORDENACOES = {
+    "recentes": "data_hora DESC, nome",
+    "antigos": "data_hora ASC, nome",
+    "matricula": "matricula_busca ASC, data_hora DESC",
+    "arquivo": "arquivo_busca ASC, data_hora DESC",
+}
+# {matricula}_{arquivo}_relatorio_{AAAA-MM-DD_HH-MM-SS}.html
+RE_NOME = re.compile(r"^(?P<prefixo>.+)_relatorio_(?P<data_hora>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.html$")
+
+
+# 🔎 Extrai matrícula, PDF e data do nome do arquivo (para relatórios gravados sem o gancho)
+def interpretar_nome(nome: str):
+    casamento = RE_NOME.match(nome)
+    if not casamento:
+        return None
+    matricula, _, arquivo = casamento.group("prefixo").partition("_")
+    return matricula, arquivo, casamento.group("data_hora")
+
+
+def _intervalo_prefixo(prefixo: str) -> tuple:
+    prefixo = prefixo.lower()
+    return prefixo, prefixo + "\U0010ffff"
+
+
+class CatalogoRelatorios:
+    """
+    Catálogo SQLite dos relatórios do quiz, indexado por matrícula, PDF de origem
+    e data. É alimentado pelo gancho da fila de relatórios e reconciliado com a
+    pasta (sincronizar) quando o servidor sobe.
+    :param caminho: Arquivo do banco SQLite
+    :param pasta: Diretório dos relatórios HTML
+    """
+
+    def __init__(self, caminho=CAMINHO_CATALOGO, pasta=PASTA_RELATORIOS):
+        self.pasta = Path(pasta)
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(str(caminho), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")  # leituras do Flask não bloqueiam a gravação do Streamlit
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS relatorios (
+                nome TEXT PRIMARY KEY,
+                matricula TEXT NOT NULL,
+                matricula_busca TEXT NOT NULL,
+                arquivo TEXT NOT NULL,
+                arquivo_busca TEXT NOT NULL,
+                data_hora TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_matricula ON relatorios (matricula_busca, data_hora);
+            CREATE INDEX IF NOT EXISTS idx_arquivo ON relatorios (arquivo_busca, data_hora);
+            CREATE INDEX IF NOT EXISTS idx_data_hora ON relatorios (data_hora);
+        """)
+        self._conexao.commit()
+
+    def _gravar(self, linhas: list) -> None:
+        with self._trava:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                self._conexao.executemany(
+                    "INSERT OR REPLACE INTO relatorios VALUES (?, ?, ?, ?, ?, ?)",
+                    [(nome, m, m.lower(), a, a.lower(), d) for nome, m, a, d in linhas]
+                )
+                self._conexao.commit()
+            except Exception:
+                self._conexao.rollback()
+                raise
+
+    # 📥 Gancho chamado após gravar um relatório
+    def registrar(self, nome: str, matricula: str = None, arquivo: str = None, data_hora: str = None) -> None:
+        if matricula is None or arquivo is None or data_hora is None:
+            campos = interpretar_nome(nome)
+            if campos is None:
+                return
+            matricula, arquivo, data_hora = campos
+        self._gravar([(nome, matricula, arquivo, data_hora)])
+
+    # 🔄 Reconcilia o catálogo com os arquivos da pasta (inclui os novos, remove os apagados)
+    def sincronizar(self) -> int:
+        nomes = {e.name for e in os.scandir(self.pasta) if e.is_file() and e.name.endswith(".html")} \
+            if self.pasta.exists() else set()
+        with self._trava:
+            catalogados = {linha[0] for linha in self._conexao.execute("SELECT nome FROM relatorios")}
+
+        novos = [(nome, *campos) for nome in nomes - catalogados if (campos := interpretar_nome(nome))]
+        if novos:
+            self._gravar(novos)
+
+        removidos = catalogados - nomes
+        if removidos:
+            with self._trava:
+                self._conexao.executemany("DELETE FROM relatorios WHERE nome = ?", [(n,) for n in removidos])
+                self._conexao.commit()
+        return len(novos) + len(removidos)
+
+    def buscar(self, prefixo: str = "", pagina: int = 1, por_pagina: int = 20, ordem: str = "recentes") -> tuple:
+        """
+        Busca por prefixo da matrícula ou do nome do PDF (sem diferenciar maiúsculas).
+        :return: (lista de dicionários da página, total de relatórios encontrados)
+        """
+        ordenacao = ORDENACOES.get(ordem, ORDENACOES["recentes"])
+        pagina = max(1, pagina)
+
+        if prefixo:
+            inicio, fim = _intervalo_prefixo(prefixo)
+            # Dois intervalos nos índices (matrícula OU arquivo), sem varrer a tabela
+            filtro = "WHERE (matricula_busca >= ? AND matricula_busca < ?) OR (arquivo_busca >= ? AND arquivo_busca < ?)"
+            parametros = [inicio, fim, inicio, fim]
+        else:
+            filtro, parametros = "", []
+
+        with self._trava:
+            total = self._conexao.execute(f"SELECT COUNT(*) FROM relatorios {filtro}", parametros).fetchone()[0]
+            linhas = self._conexao.execute(
+                f"SELECT nome, matricula, arquivo, data_hora FROM relatorios {filtro} "
+                f"ORDER BY {ordenacao} LIMIT ? OFFSET ?",
+                parametros + [por_pagina, (pagina - 1) * por_pagina]
+            ).fetchall()
+
+        itens = [{"nome": n, "matricula": m, "arquivo": a, "data_hora": d} for n, m, a, d in linhas]
+        return itens, total
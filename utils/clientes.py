@@ -0,0 +1,120 @@
+import os
+import threading
+import weakref
+
+import httpx
+from langchain_openai.chat_models import ChatOpenAI
+from langchain_openai.embeddings import OpenAIEmbeddings
+from openai import OpenAI
+
+# ⚙️ Configuração do pool HTTP compartilhado com a API da OpenAI (ou servidor compatível)
+MAX_CONEXOES = int(os.getenv("OPENAI_MAX_CONEXOES", "20"))
+MAX_CONEXOES_OCIOSAS = int(os.getenv("OPENAI_MAX_CONEXOES_OCIOSAS", "10"))
+KEEPALIVE_S = float(os.getenv("OPENAI_KEEPALIVE_S", "60"))
+TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "120"))
+TIMEOUT_CONEXAO_S = float(os.getenv("OPENAI_TIMEOUT_CONEXAO_S", "10"))
+
+
+def url_base() -> str:
+    return os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+
+class TransporteMedido(httpx.HTTPTransport):
+    """Transporte HTTP que conta requisições e conexões abertas, para medir o reuso do pool."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._trava = threading.Lock()
+        self._conexoes_vistas = weakref.WeakSet()
+        self.requisicoes = 0
+        self.conexoes_criadas = 0
+
+    def handle_request(self, request):
+        resposta = super().handle_request(request)
+        with self._trava:
+            self.requisicoes += 1
+            for conexao in self._pool.connections:
+                if conexao not in self._conexoes_vistas:
+                    self._conexoes_vistas.add(conexao)
+                    self.conexoes_criadas += 1
+        return resposta
+
+
+_trava = threading.RLock()
+_clientes_http = {}  # url base -> httpx.Client
+_instancias = {}  # (tipo, url, modelo, opções) -> cliente de modelo
+
+
+# 🔌 Um cliente HTTP (com pool keep-alive) por endpoint, compartilhado pelo processo todo
+def cliente_http(url: str = None) -> httpx.Client:
+    url = url or url_base()
+    with _trava:
+        if url not in _clientes_http:
+            limites = httpx.Limits(
+                max_connections=MAX_CONEXOES,
+                max_keepalive_connections=MAX_CONEXOES_OCIOSAS,
+                keepalive_expiry=KEEPALIVE_S
+            )
+            # Com transport=, o httpx ignora o limits= do Client: os limites vão no transporte
+            _clientes_http[url] = httpx.Client(
+                transport=TransporteMedido(limits=limites),
+                timeout=httpx.Timeout(TIMEOUT_S, connect=TIMEOUT_CONEXAO_S)
+            )
+        return _clientes_http[url]
+
+
+def _instancia(chave, criar):
+    with _trava:
+        if chave not in _instancias:
+            _instancias[chave] = criar()
+        return _instancias[chave]
+
+
+def cliente_openai() -> OpenAI:
+    url = url_base()
+    return _instancia(
+        ("openai", url),
+        lambda: OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=url, http_client=cliente_http(url))
+    )
+
+
+def chat_openai(modelo: str, **opcoes) -> ChatOpenAI:
+    url = url_base()
+    return _instancia(
+        ("chat", url, modelo, tuple(sorted(opcoes.items()))),
+        lambda: ChatOpenAI(
+            model=modelo,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=url,
+            http_client=cliente_http(url),
+            **opcoes
+        )
+    )
+
+
+def embeddings_openai(modelo: str) -> OpenAIEmbeddings:
+    url = url_base()
+    return _instancia(
+        ("embeddings", url, modelo),
+        lambda: OpenAIEmbeddings(
+            model=modelo,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=url,
+            http_client=cliente_http(url)
+        )
+    )
+
+
+# 📊 Reuso do pool por endpoint: quanto mais perto de 1, menos handshakes TLS
+def metricas_pool() -> dict:
+    metricas = {}
+    with _trava:
+        for url, cliente in _clientes_http.items():
+            transporte = cliente._transport
+            requisicoes = transporte.requisicoes
+            metricas[url] = {
+                "requisicoes": requisicoes,
+                "conexoes_criadas": transporte.conexoes_criadas,
+                "taxa_reuso": (1 - transporte.conexoes_criadas / requisicoes) if requisicoes else 0.0,
+            }
+    return metricas
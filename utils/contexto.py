@@ -0,0 +1,116 @@
+import hashlib
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+
+from utils.tokens import contar_tokens
+
+# 🔁 Similaridade de Jaccard estimada (MinHash) a partir da qual um trecho é quase repetido
+LIMIAR_DUPLICADO = 0.8
+PERMUTACOES_MINHASH = 64
+TAMANHO_SHINGLE = 3  # palavras por shingle
+SOBREPOSICAO_MAXIMA = 400  # caracteres procurados na emenda de trechos vizinhos
+
+RE_PALAVRA = re.compile(r"\w+")
+_PRIMO = np.uint64((1 << 61) - 1)
+_aleatorio = np.random.default_rng(2024)
+_A = _aleatorio.integers(1, 1 << 61, PERMUTACOES_MINHASH, dtype=np.uint64)
+_B = _aleatorio.integers(0, 1 << 61, PERMUTACOES_MINHASH, dtype=np.uint64)
+
+
+# ✍️ Assinatura MinHash dos shingles de palavras do texto
+def assinatura(texto: str) -> np.ndarray:
+    palavras = RE_PALAVRA.findall(texto.lower())
+    shingles = {" ".join(palavras[i:i + TAMANHO_SHINGLE]) for i in range(max(1, len(palavras) - TAMANHO_SHINGLE + 1))}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    ) % _PRIMO
+    # Uma permutação (a·x + b) por linha; o mínimo de cada uma forma a assinatura
+    return ((hashes[None, :] * _A[:, None] + _B[:, None]) % _PRIMO).min(axis=1)
+
+
+def similaridade(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+# 🧵 Junta o texto de dois trechos vizinhos sem repetir a sobreposição do splitter
+def emendar(anterior: str, seguinte: str) -> str:
+    for tamanho in range(min(len(anterior), len(seguinte), SOBREPOSICAO_MAXIMA), 0, -1):
+        if anterior.endswith(seguinte[:tamanho]):
+            return anterior + seguinte[tamanho:]
+    return anterior + "\n" + seguinte
+
+
+# 🔗 Funde trechos consecutivos do mesmo arquivo (doc_id seguido) num só documento,
+# na posição do trecho mais bem ranqueado do grupo
+def mesclar_vizinhos(documentos: list) -> list:
+    posicao = {id(d): i for i, d in enumerate(documentos)}
+    por_origem = {}
+    for documento in documentos:
+        if documento.metadata.get("doc_id") is None:
+            por_origem[id(documento)] = [documento]
+        else:
+            por_origem.setdefault(documento.metadata.get("source"), []).append(documento)
+
+    grupos = []
+    for trechos in por_origem.values():
+        trechos.sort(key=lambda d: d.metadata.get("doc_id", 0))
+        atual = [trechos[0]]
+        for trecho in trechos[1:]:
+            if trecho.metadata["doc_id"] == atual[-1].metadata["doc_id"]:
+                continue  # mesmo trecho vindo de duas buscas
+            if trecho.metadata["doc_id"] == atual[-1].metadata["doc_id"] + 1:
+                atual.append(trecho)
+            else:
+                grupos.append(atual)
+                atual = [trecho]
+        grupos.append(atual)
+
+    grupos.sort(key=lambda grupo: min(posicao[id(d)] for d in grupo))
+    mesclados = []
+    for grupo in grupos:
+        if len(grupo) == 1:
+            mesclados.append(grupo[0])
+            continue
+        texto = grupo[0].page_content
+        for trecho in grupo[1:]:
+            texto = emendar(texto, trecho.page_content)
+        metadados = dict(grupo[0].metadata, doc_ids=[d.metadata["doc_id"] for d in grupo])
+        mesclados.append(Document(page_content=texto, metadata=metadados))
+    return mesclados
+
+
+# 📦 Monta o contexto do prompt: funde vizinhos, descarta quase repetidos e preenche
+# o orçamento de tokens na ordem de relevância (pula o que não cabe e tenta o próximo).
+# Devolve (documentos, estatísticas com os tokens economizados)
+def empacotar_contexto(documentos: list, orcamento_tokens: int, limiar_duplicado=LIMIAR_DUPLICADO) -> tuple:
+    tokens_originais = sum(contar_tokens(d.page_content) for d in documentos)
+    mesclados = mesclar_vizinhos(documentos)
+
+    unicos, assinaturas = [], []
+    for documento in mesclados:
+        atual = assinatura(documento.page_content)
+        if any(similaridade(atual, outra) >= limiar_duplicado for outra in assinaturas):
+            continue
+        unicos.append(documento)
+        assinaturas.append(atual)
+
+    escolhidos, usados = [], 0
+    for documento in unicos:
+        tokens = contar_tokens(documento.page_content)
+        # O trecho mais relevante sempre entra, mesmo sozinho acima do orçamento
+        if escolhidos and usados + tokens > orcamento_tokens:
+            continue
+        escolhidos.append(documento)
+        usados += tokens
+
+    return escolhidos, {
+        "trechos_recuperados": len(documentos),
+        "trechos_mesclados": len(documentos) - len(mesclados),
+        "trechos_duplicados": len(mesclados) - len(unicos),
+        "trechos_fora_orcamento": len(unicos) - len(escolhidos),
+        "tokens_contexto": usados,
+        "tokens_economizados": tokens_originais - usados,
+    }
@@ -0,0 +1,106 @@
+import re
+
+from langchain_core.documents import Document
+
+from utils.tokens import contar_tokens, dividir_tokens
+
+# 📏 Tamanho dos trechos e sobreposição entre trechos seguidos, em tokens
+TOKENS_POR_TRECHO = 256
+SOBREPOSICAO_TOKENS = 32
+PALAVRAS_TITULO = 10  # títulos são linhas curtas
+
+# 🏷️ Títulos: "3.2. Arquitetura", "Capítulo 2 ...", linhas em maiúsculas ou linhas curtas isoladas
+RE_TITULO_NUMERADO = re.compile(r"^\d+(\.\d+)*\.?\s+[A-ZÀ-Ý]")
+RE_TITULO_PALAVRA = re.compile(r"^(cap[íi]tulo|unidade|se[çc][ãa]o|aula|m[óo]dulo|parte)\b", re.IGNORECASE)
+
+
+def eh_titulo(linha: str, isolada: bool) -> bool:
+    palavras = linha.split()
+    if not palavras or len(palavras) > PALAVRAS_TITULO or linha[-1] in ".,;:" or not linha[0].isalnum():
+        return False
+    if RE_TITULO_NUMERADO.match(linha) or RE_TITULO_PALAVRA.match(linha):
+        return ":" not in linha  # "2. Gerado dinamicamente: ..." é item de lista
+    letras = [c for c in linha if c.isalpha()]
+    if len(letras) >= 4 and all(c.isupper() for c in letras):
+        return True
+    # Linha curta começando em maiúscula, precedida de linha em branco (como "Percepção Rápida")
+    return isolada and linha[0].isupper() and len(palavras) <= 5
+
+
+class DivisorEstrutural:
+    """
+    Divide as páginas em trechos medidos em tokens, sem atravessar páginas nem
+    títulos (salvo com pouco texto antes do título), e guarda a página e a seção
+    de cada trecho nos metadados. Cada linha é tokenizada uma única vez.
+    Lembra a seção atual de cada arquivo entre uma página e outra.
+    :param tokens_por_trecho: Tamanho máximo de cada trecho
+    :param sobreposicao_tokens: Tokens finais de um trecho repetidos no início do seguinte
+    """
+
+    def __init__(self, tokens_por_trecho=TOKENS_POR_TRECHO, sobreposicao_tokens=SOBREPOSICAO_TOKENS):
+        self.tokens_por_trecho = tokens_por_trecho
+        self.sobreposicao_tokens = sobreposicao_tokens
+        self._secoes = {}  # source -> título da seção em andamento
+
+    # Mesma interface do RecursiveCharacterTextSplitter usada pelo backend e pela ingestão
+    def split_documents(self, documentos: list) -> list:
+        trechos = []
+        for documento in documentos:
+            trechos.extend(self._dividir_pagina(documento))
+        return trechos
+
+    def _unidades(self, linha: str):
+        tokens = contar_tokens(linha) + 1  # + quebra de linha
+        if tokens <= self.tokens_por_trecho:
+            yield linha, tokens
+            return
+        for pedaco in dividir_tokens(linha, self.tokens_por_trecho - 1):
+            yield pedaco, contar_tokens(pedaco) + 1
+
+    def _dividir_pagina(self, documento) -> list:
+        origem = documento.metadata.get("source")
+        secao = self._secoes.get(origem)
+        trechos = []
+        linhas, tokens = [], 0  # linhas do trecho em montagem (texto, tokens) e total
+
+        def fechar(sobreposicao: bool):
+            nonlocal linhas, tokens
+            if linhas:
+                metadados = dict(documento.metadata, tokens=tokens)
+                if secao:
+                    metadados["secao"] = secao
+                trechos.append(Document(page_content="\n".join(t for t, _ in linhas), metadata=metadados))
+            # Repete as últimas linhas que cabem na sobreposição (nunca depois de um título)
+            mantidas, total = [], 0
+            for texto, n in reversed(linhas if sobreposicao else []):
+                if total + n > self.sobreposicao_tokens:
+                    break
+                mantidas.insert(0, (texto, n))
+                total += n
+            linhas, tokens = mantidas, total
+
+        isolada = True
+        for linha in documento.page_content.split("\n"):
+            linha = linha.strip()
+            if not linha:
+                isolada = True
+                continue
+            if eh_titulo(linha, isolada):
+                # Pouco texto antes do título (ex.: títulos seguidos) segue junto com a nova seção
+                if tokens >= self.tokens_por_trecho // 4:
+                    fechar(sobreposicao=False)
+                secao = linha
+            for texto, n in self._unidades(linha):
+                if linhas and tokens + n > self.tokens_por_trecho:
+                    fechar(sobreposicao=True)
+                    # A sobreposição nunca pode, sozinha, estourar o trecho
+                    if tokens + n > self.tokens_por_trecho:
+                        linhas, tokens = [], 0
+                linhas.append((texto, n))
+                tokens += n
+            isolada = False
+
+        # Fim da página: o trecho fecha aqui, sem sobreposição com a página seguinte
+        fechar(sobreposicao=False)
+        self._secoes[origem] = secao
+        return trechos
@@ -0,0 +1,83 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+# Quantidade de páginas que cada processo extrai por tarefa
+PAGINAS_POR_TAREFA = 20
+
+_pool = None
+_workers_pool = 0
+
+
+# ⚙️ Pool de processos reaproveitado entre chamadas (criar processos custa caro)
+def _obter_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _workers_pool
+    if _pool is None or _workers_pool != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        # "spawn" evita herdar as threads do Streamlit num fork
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _workers_pool = workers
+    return _pool
+
+
+def _extrair_intervalo(caminho: str, inicio: int, fim: int) -> list:
+    leitor = PdfReader(caminho)
+    return [leitor.pages[i].extract_text() for i in range(inicio, fim)]
+
+
+def _documento(caminho: str, pagina: int, total: int, texto: str) -> Document:
+    return Document(page_content=texto, metadata={"source": caminho, "page": pagina, "total_pages": total})
+
+
+# 📄 Gera as páginas dos PDFs em ordem (arquivo por arquivo, página por página).
+# Com cache, PDFs já extraídos antes são lidos do cache de páginas, sem o pypdf
+def iterar_paginas(arquivos, workers: int = 1, cache: bool = True):
+    arquivos = [str(Path(a)) for a in arquivos]
+    if cache:
+        # Import tardio: os processos do pool importam este módulo e não precisam do cache
+        from utils.cache_paginas import cache_paginas
+        paginas = cache_paginas().iterar(arquivos, lambda pendentes: _extrair_paginas(pendentes, workers))
+    else:
+        paginas = _extrair_paginas(arquivos, workers)
+    for caminho, numero, total, texto in paginas:
+        yield _documento(caminho, numero, total, texto)
+
+
+# 📄 Extrai com o pypdf as páginas (caminho, número, total, texto), em ordem
+def _extrair_paginas(arquivos: list, workers: int):
+    if workers <= 1:
+        for caminho in arquivos:
+            leitor = PdfReader(caminho)
+            total = len(leitor.pages)
+            for i, pagina in enumerate(leitor.pages):
+                yield caminho, i, total, pagina.extract_text()
+        return
+
+    # Divide cada arquivo em intervalos de páginas e distribui entre os processos
+    tarefas = []
+    for caminho in arquivos:
+        total = len(PdfReader(caminho).pages)
+        for inicio in range(0, total, PAGINAS_POR_TAREFA):
+            tarefas.append((caminho, inicio, min(inicio + PAGINAS_POR_TAREFA, total), total))
+
+    if len(tarefas) <= 1:
+        yield from _extrair_paginas(arquivos, workers=1)
+        return
+
+    pool = _obter_pool(workers)
+    # map devolve os resultados na ordem das tarefas, preservando a ordem das páginas
+    resultados = pool.map(
+        _extrair_intervalo,
+        [t[0] for t in tarefas], [t[1] for t in tarefas], [t[2] for t in tarefas]
+    )
+    for (caminho, inicio, _, total), textos in zip(tarefas, resultados):
+        for deslocamento, texto in enumerate(textos):
+            yield caminho, inicio + deslocamento, total, texto
+
+
+def extrair_documentos(arquivos, workers: int = 1, cache: bool = True) -> list:
+    return list(iterar_paginas(arquivos, workers, cache))
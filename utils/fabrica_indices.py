@@ -0,0 +1,145 @@
+import math
+import os
+
+import faiss
+import numpy as np
+
+# 🏭 Escolha do índice FAISS pelo tamanho da coleção: busca exata (Flat) abaixo do
+# limiar, aproximada (IVF ou HNSW) acima dele, com quantização opcional dos vetores
+LIMIAR_ANN = int(os.getenv("LIMIAR_ANN", "50000"))
+TIPO_ANN = os.getenv("TIPO_ANN", "ivf")  # "ivf" ou "hnsw"
+QUANTIZACAO_ANN = os.getenv("QUANTIZACAO_ANN", "")  # "", "sq8" (4x menor) ou "pq" (16x menor)
+# Recall@k mínimo buscado no ajuste automático de nprobe / efSearch
+RECALL_ALVO_ANN = float(os.getenv("RECALL_ALVO_ANN", "0.95"))
+VIZINHOS_HNSW = 32
+TREINO_POR_LISTA = 64  # vetores de treino por lista invertida do IVF
+CONSULTAS_AJUSTE = 100
+K_AJUSTE = 10
+
+
+def _subquantizadores(dimensao: int) -> int:
+    # 1 byte por subvetor de 4 dimensões (16x menor que float32); o número precisa dividir a dimensão
+    m = max(1, dimensao // 4)
+    while dimensao % m:
+        m -= 1
+    return m
+
+
+# 📐 Descrição do index_factory do FAISS para n vetores de uma dimensão
+def descricao_indice(total: int, dimensao: int, tipo=None, quantizacao=None, limiar=None) -> str:
+    tipo = TIPO_ANN if tipo is None else tipo
+    quantizacao = QUANTIZACAO_ANN if quantizacao is None else quantizacao
+    limiar = LIMIAR_ANN if limiar is None else limiar
+    if total < limiar:
+        return "Flat"
+
+    codificacao = {"": "Flat", "sq8": "SQ8", "pq": f"PQ{_subquantizadores(dimensao)}"}[quantizacao]
+    if tipo == "hnsw":
+        return f"HNSW{VIZINHOS_HNSW}" if codificacao == "Flat" else f"HNSW{VIZINHOS_HNSW},{codificacao}"
+    listas = min(65536, max(16, int(4 * math.sqrt(total))))
+    return f"IVF{listas},{codificacao}"
+
+
+# 🎯 Aumenta nprobe (IVF) ou efSearch (HNSW) até atingir o recall alvo, ou até o
+# recall parar de subir (com quantização o alvo pode ser inalcançável). As consultas
+# são vetores da coleção deslocados, em direção aleatória, pela distância até o vizinho
+# mais próximo (uma pergunta nunca é idêntica a um trecho). Devolve o valor escolhido
+def ajustar_busca(indice, vetores: np.ndarray, recall_alvo=RECALL_ALVO_ANN, k=K_AJUSTE, consultas=CONSULTAS_AJUSTE):
+    ivf = faiss.try_extract_index_ivf(indice)
+    hnsw = getattr(faiss.downcast_index(indice), "hnsw", None)
+    if ivf is None and hnsw is None:
+        return None
+
+    aleatorio = np.random.default_rng(0)
+    amostra = vetores[aleatorio.choice(len(vetores), size=min(consultas, len(vetores)), replace=False)]
+    distancias, _ = faiss.knn(amostra, vetores, 2)
+    direcoes = aleatorio.standard_normal(amostra.shape).astype(np.float32)
+    direcoes /= np.linalg.norm(direcoes, axis=1, keepdims=True)
+    amostra = amostra + direcoes * np.sqrt(np.maximum(distancias[:, 1:], 0))
+    k = min(k, len(vetores))
+    _, exatos = faiss.knn(amostra, vetores, k)
+
+    valores = [2 ** i for i in range(17)]
+    if ivf is not None:
+        valores = [v for v in valores if v < ivf.nlist] + [ivf.nlist]
+    else:
+        valores = [v for v in valores if v >= k] or [k]
+
+    anterior = None
+    for valor in valores:
+        _definir_parametro(ivf, hnsw, valor)
+        _, encontrados = indice.search(amostra, k)
+        recall = np.mean([len(set(e) & set(x)) / k for e, x in zip(encontrados, exatos)])
+        if recall >= recall_alvo:
+            return valor
+        if anterior is not None and recall - anterior[1] < 0.005:
+            _definir_parametro(ivf, hnsw, anterior[0])
+            return anterior[0]
+        anterior = (valor, recall)
+    return valor
+
+
+def _definir_parametro(ivf, hnsw, valor: int) -> None:
+    if ivf is not None:
+        ivf.nprobe = valor
+    else:
+        hnsw.efSearch = valor
+
+
+# 🧱 Cria, treina, preenche e ajusta o índice adequado para os vetores
+def criar_indice(vetores, tipo=None, quantizacao=None, limiar=None):
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    total, dimensao = vetores.shape
+    indice = faiss.index_factory(dimensao, descricao_indice(total, dimensao, tipo, quantizacao, limiar), faiss.METRIC_L2)
+
+    if not indice.is_trained:
+        ivf = faiss.try_extract_index_ivf(indice)
+        tamanho_treino = ivf.nlist * TREINO_POR_LISTA if ivf is not None else total
+        treino = vetores[np.random.default_rng(0).choice(total, size=min(total, tamanho_treino), replace=False)]
+        indice.train(treino)
+    indice.add(vetores)
+
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is not None:
+        # Permite reconstruct() (usado ao copiar o índice para o índice da sessão)
+        ivf.make_direct_map()
+    ajustar_busca(indice, vetores)
+    return indice
+
+
+def indice_exato(indice) -> bool:
+    return isinstance(faiss.downcast_index(indice), faiss.IndexFlat)
+
+
+# 📈 Índice exato que passou do limiar: deve dar lugar a um aproximado
+def precisa_otimizar(indice, limiar=None) -> bool:
+    return indice.ntotal >= (LIMIAR_ANN if limiar is None else limiar) and indice_exato(indice)
+
+
+# 🔁 Troca o índice exato de um vector store que cresceu além do limiar por um
+# aproximado com os mesmos vetores, na mesma ordem (os ids do docstore continuam
+# valendo). Índices já aproximados seguem como estão e recebem os novos vetores
+def otimizar_vector_store(vector_store, limiar=None):
+    if not precisa_otimizar(vector_store.index, limiar):
+        return vector_store
+    vetores = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+    vector_store.index = criar_indice(vetores, limiar=limiar)
+    return vector_store
+
+
+# 🗑️ Posições (em ordem) e vetores que ficam no índice sem os ids do docstore
+# informados; com eles o índice é recriado, já que o HNSW não remove vetores e o
+# IVF remove sem renumerar as posições usadas pelo docstore
+def vetores_restantes(vector_store, removidos: set) -> tuple:
+    posicoes = [p for p, id_trecho in sorted(vector_store.index_to_docstore_id.items()) if id_trecho not in removidos]
+    if not posicoes:
+        return posicoes, np.empty((0, vector_store.index.d), dtype=np.float32)
+    vetores = vector_store.index.reconstruct_batch(np.array(posicoes, dtype=np.int64))
+    return posicoes, vetores.reshape(len(posicoes), vector_store.index.d)
+
+
+# ➕ Passa para o índice novo os vetores que o antigo recebeu a partir da posição
+# informada (lotes adicionados enquanto o novo era construído)
+def completar_indice(novo, antigo, inicio: int) -> None:
+    if antigo.ntotal > inicio:
+        novo.add(antigo.reconstruct_n(inicio, antigo.ntotal - inicio))
@@ -0,0 +1,37 @@
+import hashlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# 🧪 Implementações falsas e determinísticas para testar sem acessar a OpenAI
+
+
+class EmbeddingsFalso(Embeddings):
+    """
+    Gera vetores determinísticos a partir do hash do texto e registra as chamadas.
+    :param dimensao: Tamanho dos vetores gerados
+    """
+
+    def __init__(self, dimensao=64):
+        self.dimensao = dimensao
+        self.textos_enviados = []
+        self.chamadas = 0
+
+    def _vetor(self, texto: str) -> list:
+        semente = int.from_bytes(hashlib.sha256(texto.encode("utf-8")).digest()[:8], "little")
+        vetor = np.random.default_rng(semente).standard_normal(self.dimensao)
+        return (vetor / np.linalg.norm(vetor)).astype(np.float32).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        self.chamadas += 1
+        self.textos_enviados.extend(texts)
+        return [self._vetor(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._vetor(text)
+
+
+# 💬 Modelo de chat falso que entrega as respostas caractere a caractere (streaming)
+def chat_falso(respostas: list, atraso_por_token: float = 0.0) -> FakeListChatModel:
+    return FakeListChatModel(responses=respostas, sleep=atraso_por_token or None)
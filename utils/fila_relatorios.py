@@ -0,0 +1,153 @@
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.relatorio import PASTA_RELATORIOS, gerar_relatorio, salvar_relatorio
+
+# ⚙️ Workers e novas tentativas da geração de relatórios
+WORKERS_RELATORIOS = int(os.getenv("WORKERS_RELATORIOS", "2"))
+TENTATIVAS_FEEDBACK = int(os.getenv("TENTATIVAS_FEEDBACK", "3"))
+ESPERA_BASE_S = float(os.getenv("ESPERA_BASE_FEEDBACK_S", "1.0"))
+# Quantidade de jobs concluídos usados nas métricas de latência
+JANELA_METRICAS = 200
+# Tempo que o estado de um job terminado fica disponível para consulta
+VALIDADE_JOBS_S = 3600
+
+
+def _percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+class FilaRelatorios:
+    """
+    Fila de geração dos relatórios do quiz: o Streamlit recebe um id de job na hora
+    e um pool de workers chama o modelo e grava o HTML em segundo plano.
+    :param gerar_feedback: Função (respostas) -> texto do feedback; exceções disparam novas tentativas
+    :param tentativas: Chamadas ao modelo antes de gravar o relatório com a mensagem de erro
+    :param espera_base_s: Espera antes da 2ª tentativa; dobra a cada falha (com jitter)
+    :param ao_salvar: Gancho (nome, matricula, arquivo, data_hora) chamado após gravar cada relatório
+    """
+
+    def __init__(self, gerar_feedback, pasta=PASTA_RELATORIOS, workers=WORKERS_RELATORIOS,
+                 tentativas=TENTATIVAS_FEEDBACK, espera_base_s=ESPERA_BASE_S, ao_salvar=None):
+        self.gerar_feedback = gerar_feedback
+        self.pasta = pasta
+        self.ao_salvar = ao_salvar
+        self.tentativas = tentativas
+        self.espera_base_s = espera_base_s
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="relatorios")
+        self._trava = threading.Lock()
+        self._jobs = {}  # id -> estado do job
+
+        # 📊 Contadores e janelas de tempo dos últimos jobs
+        self.concluidos = 0
+        self.falhas_ia = 0
+        self.novas_tentativas = 0
+        self._esperas = deque(maxlen=JANELA_METRICAS)  # fila -> início
+        self._latencias = deque(maxlen=JANELA_METRICAS)  # fila -> relatório gravado
+
+    # 📥 Enfileira o relatório e devolve o id do job imediatamente
+    def enviar(self, nome: str, data_hora: str, matricula: str, arquivo: str, acertos: int, respostas_usuario: list) -> str:
+        id_job = uuid.uuid4().hex
+        with self._trava:
+            self._remover_antigos()
+            self._jobs[id_job] = {
+                "estado": "na_fila",
+                "nome": nome,
+                "tentativas": 0,
+                "erro": None,
+                "enviado_em": time.time(),
+            }
+        # Cópia das respostas: o job não pode depender do session_state
+        self._executor.submit(
+            self._executar, id_job, data_hora, matricula, arquivo, acertos, [dict(r) for r in respostas_usuario]
+        )
+        return id_job
+
+    def _feedback(self, id_job: str, respostas_usuario: list) -> str:
+        for tentativa in range(1, self.tentativas + 1):
+            with self._trava:
+                self._jobs[id_job]["tentativas"] = tentativa
+            try:
+                feedback = self.gerar_feedback(respostas_usuario)
+                with self._trava:
+                    self._jobs[id_job]["erro"] = None
+                return feedback
+            except Exception as e:
+                logging.warning(f"Feedback do relatório falhou (tentativa {tentativa}/{self.tentativas}): {e}")
+                with self._trava:
+                    self._jobs[id_job]["erro"] = str(e)
+                if tentativa == self.tentativas:
+                    with self._trava:
+                        self.falhas_ia += 1
+                    return f"Ocorreu um erro ao gerar o feedback com IA: {str(e)}"
+                with self._trava:
+                    self.novas_tentativas += 1
+                time.sleep(self.espera_base_s * 2 ** (tentativa - 1) * random.uniform(0.5, 1.5))
+
+    def _executar(self, id_job, data_hora, matricula, arquivo, acertos, respostas_usuario) -> None:
+        with self._trava:
+            job = self._jobs[id_job]
+            job["estado"] = "gerando"
+            job["iniciado_em"] = time.time()
+            self._esperas.append(job["iniciado_em"] - job["enviado_em"])
+
+        estado, erro = "concluido", None
+        try:
+            feedback_ia = self._feedback(id_job, respostas_usuario)
+            # HTML gerado pelo template direto para o arquivo (e variantes comprimidas)
+            partes = gerar_relatorio(data_hora, matricula, acertos, feedback_ia, respostas_usuario)
+            salvar_relatorio(job["nome"], partes, self.pasta)
+        except Exception as e:
+            logging.exception("Falha ao gravar o relatório do quiz")
+            estado, erro = "falhou", str(e)
+        else:
+            if self.ao_salvar:
+                try:
+                    self.ao_salvar(job["nome"], matricula, arquivo, data_hora)
+                except Exception:
+                    # O relatório já está em disco; o catálogo se corrige ao sincronizar
+                    logging.exception("Falha ao catalogar o relatório do quiz")
+
+        with self._trava:
+            job["estado"] = estado
+            job["erro"] = erro or job["erro"]
+            job["concluido_em"] = time.time()
+            self._latencias.append(job["concluido_em"] - job["enviado_em"])
+            if estado == "concluido":
+                self.concluidos += 1
+
+    # 🧹 Esquece os jobs terminados há mais de VALIDADE_JOBS_S (o relatório continua em disco)
+    def _remover_antigos(self) -> None:
+        limite = time.time() - VALIDADE_JOBS_S
+        for id_job in [i for i, job in self._jobs.items() if job.get("concluido_em", limite) < limite]:
+            del self._jobs[id_job]
+
+    # 🔎 Estado do job: na_fila, gerando, concluido ou falhou (None se o id não existe)
+    def status(self, id_job: str):
+        with self._trava:
+            job = self._jobs.get(id_job)
+            return dict(job) if job else None
+
+    def metricas(self) -> dict:
+        with self._trava:
+            estados = [job["estado"] for job in self._jobs.values()]
+            esperas, latencias = list(self._esperas), list(self._latencias)
+            return {
+                "na_fila": estados.count("na_fila"),
+                "em_execucao": estados.count("gerando"),
+                "concluidos": self.concluidos,
+                "falhas_ia": self.falhas_ia,
+                "novas_tentativas": self.novas_tentativas,
+                "espera_p50_s": _percentil(esperas, 50),
+                "latencia_p50_s": _percentil(latencias, 50),
+                "latencia_p95_s": _percentil(latencias, 95),
+            }
@@ -0,0 +1,185 @@
+import os
+import threading
+
+from langchain_community.vectorstores.faiss import FAISS
+
+from utils.busca_lexica import IndiceLexico, fusao_rrf
+from utils.fabrica_indices import completar_indice, criar_indice, indice_exato, precisa_otimizar, vetores_restantes
+
+# 🔀 Busca híbrida (FAISS + BM25 fundidos por RRF); 0 volta à busca só por vetores
+BUSCA_HIBRIDA = os.getenv("BUSCA_HIBRIDA", "1") != "0"
+# Candidatos pedidos a cada lista antes da fusão
+CANDIDATOS_HIBRIDA = int(os.getenv("CANDIDATOS_HIBRIDA", "20"))
+
+
+def _documentos_lexicos(lexico, vector_store, consulta: str, k: int) -> list:
+    return [vector_store.docstore.search(id_trecho) for id_trecho, _ in lexico.buscar(consulta, k)]
+
+
+class IndiceSessao:
+    """
+    Índice FAISS de uma sessão que sabe quais trechos pertencem a cada PDF,
+    permitindo incluir ou remover um arquivo sem reconstruir o restante.
+    Cada trecho também entra num índice léxico (BM25) com o mesmo id.
+    :param embeddings: Modelo de embeddings usado nas consultas
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.vector_store = None
+        self.trava = threading.Lock()
+        self._reconstrucao = threading.Lock()  # uma troca de índice (crescimento ou remoção) por vez
+        self.arquivos = {}  # nome do arquivo -> {"chave": hash do índice, "ids": ids no docstore}
+        self.compartilhados = {}  # chave -> índice somente leitura compartilhado entre sessões
+        self.lexico = IndiceLexico()
+        self.lexicos_compartilhados = {}  # chave -> IndiceLexico do índice compartilhado
+        self.ingestoes = []  # ingestões em segundo plano (uma por upload) ainda não conferidas
+
+    def registrar(self, nome: str, chave: str) -> None:
+        self.arquivos[nome] = {"chave": chave, "ids": []}
+
+    def adicionar(self, nome: str, chave: str, textos: list, vetores: list, metadados: list, termos=None) -> list:
+        with self.trava:
+            info = self.arquivos.get(nome)
+            # Arquivo removido (ou trocado) enquanto ainda era indexado: descarta o lote
+            if info is None or info["chave"] != chave:
+                return []
+
+            pares = list(zip(textos, vetores))
+            if self.vector_store is None:
+                self.vector_store = FAISS.from_embeddings(pares, self.embeddings, metadatas=metadados)
+                ids = list(self.vector_store.index_to_docstore_id.values())
+            else:
+                ids = self.vector_store.add_embeddings(pares, metadatas=metadados)
+            self.lexico.adicionar(ids, textos, termos)
+            info["ids"].extend(ids)
+        # Ao passar do limiar, a busca exata dá lugar a um índice aproximado (IVF/HNSW)
+        self._otimizar()
+        return ids
+
+    # 🔁 O índice aproximado é treinado fora da trava, com uma cópia dos vetores: as
+    # buscas e os lotes seguintes continuam no índice exato, e só a troca trava
+    def _otimizar(self) -> None:
+        if not self._reconstrucao.acquire(blocking=False):
+            return  # outra troca em andamento; o próximo lote confere de novo
+        try:
+            with self.trava:
+                antigo = self.vector_store.index
+                if not precisa_otimizar(antigo):
+                    return
+                total = antigo.ntotal
+                vetores = antigo.reconstruct_n(0, total)
+            novo = criar_indice(vetores)
+            with self.trava:
+                completar_indice(novo, antigo, total)
+                self.vector_store.index = novo
+        finally:
+            self._reconstrucao.release()
+
+    # 📥 Copia os vetores (e os termos do índice léxico, se houver) de um índice
+    # já pronto (ex.: do cache) sem vetorizar nem tokenizar de novo
+    def adicionar_indice(self, nome: str, chave: str, indice, lexico=None) -> list:
+        total = indice.index.ntotal
+        if total == 0:
+            return []
+        ids = [indice.index_to_docstore_id[i] for i in range(total)]
+        documentos = [indice.docstore.search(i) for i in ids]
+        vetores = indice.index.reconstruct_n(0, total)
+        return self.adicionar(
+            nome, chave,
+            [d.page_content for d in documentos],
+            list(vetores),
+            [dict(d.metadata) for d in documentos],
+            termos=[lexico.termos(i) for i in ids] if lexico is not None else None
+        )
+
+    # 🗑️ Remove do índice apenas os vetores do arquivo informado. O índice exato
+    # usa o delete do LangChain; o aproximado é recriado fora da trava com os
+    # vetores restantes e trocado junto com o docstore, sem bloquear as buscas
+    def remover(self, nome: str) -> None:
+        with self._reconstrucao:
+            with self.trava:
+                info = self.arquivos.pop(nome, None)
+                if not info or not info["ids"] or self.vector_store is None:
+                    return
+                if indice_exato(self.vector_store.index):
+                    self.vector_store.delete(info["ids"])
+                    self.lexico.remover(info["ids"])
+                    return
+                antigo = self.vector_store.index
+                total = antigo.ntotal
+                posicoes, vetores = vetores_restantes(self.vector_store, set(info["ids"]))
+
+            novo = criar_indice(vetores)
+            with self.trava:
+                # Lotes de outros arquivos que chegaram durante a reconstrução vêm no fim
+                completar_indice(novo, antigo, total)
+                posicoes += range(total, antigo.ntotal)
+                mapa = self.vector_store.index_to_docstore_id
+                self.vector_store.index_to_docstore_id = {i: mapa[p] for i, p in enumerate(posicoes)}
+                self.vector_store.docstore.delete(info["ids"])
+                self.vector_store.index = novo
+                self.lexico.remover(info["ids"])
+
+    def buscar(self, consulta: str, k: int = 4, hibrida: bool = BUSCA_HIBRIDA) -> list:
+        if self.vazio:
+            return []
+        candidatos = max(k, CANDIDATOS_HIBRIDA) if hibrida else k
+        # A pergunta é vetorizada fora da trava para não bloquear a ingestão
+        vetor = self.embeddings.embed_query(consulta)
+
+        resultados = []
+        lexicos = []  # por índice léxico: trechos do mais ao menos relevante pelo BM25
+        if self.vector_store is not None:
+            with self.trava:
+                resultados.extend(self.vector_store.similarity_search_with_score_by_vector(vetor, k=candidatos))
+                if hibrida:
+                    lexicos.append(_documentos_lexicos(self.lexico, self.vector_store, consulta, candidatos))
+        # Índices compartilhados são somente leitura: a busca dispensa a trava
+        for chave, compartilhado in self.compartilhados.items():
+            resultados.extend(compartilhado.similarity_search_with_score_by_vector(vetor, k=candidatos))
+            if hibrida and chave in self.lexicos_compartilhados:
+                lexicos.append(_documentos_lexicos(self.lexicos_compartilhados[chave], compartilhado, consulta, candidatos))
+
+        # Menor distância primeiro, juntando os trechos da sessão e dos compartilhados
+        resultados.sort(key=lambda par: par[1])
+        if not hibrida:
+            return [documento for documento, _ in resultados[:k]]
+
+        # 🔀 Funde a lista vetorial com as listas do BM25 pela posição de cada trecho
+        documentos = {}
+        listas = []
+        for lista in [[documento for documento, _ in resultados]] + lexicos:
+            documentos.update((documento.id, documento) for documento in lista)
+            listas.append([documento.id for documento in lista])
+        return [documentos[id_trecho] for id_trecho in fusao_rrf(listas)[:k]]
+
+    # 🔑 Chaves (hash de conteúdo) de todos os documentos consultados pela sessão
+    def chaves_documentos(self) -> list:
+        return [info["chave"] for info in self.arquivos.values()] + list(self.compartilhados)
+
+    @property
+    def vazio(self) -> bool:
+        return self.vector_store is None and not self.compartilhados
+
+    # ✅ Todas as ingestões terminadas sem erro: o índice já contém todo o material da sessão
+    @property
+    def completo(self) -> bool:
+        return all(i.concluido.is_set() and i.erro is None for i in self.ingestoes)
+
+    @property
+    def indexando(self) -> bool:
+        return any(not i.concluido.is_set() for i in self.ingestoes)
+
+    @property
+    def erro_ingestao(self):
+        return next((i.erro for i in self.ingestoes if i.erro is not None), None)
+
+    @property
+    def paginas_indexadas(self) -> int:
+        return sum(i.paginas_indexadas for i in self.ingestoes)
+
+    @property
+    def total_trechos(self) -> int:
+        total = 0 if self.vector_store is None else self.vector_store.index.ntotal
+        return total + sum(c.index.ntotal for c in self.compartilhados.values())
@@ -0,0 +1,158 @@
+import threading
+from pathlib import Path
+from typing import Any
+
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_core.retrievers import BaseRetriever
+
+from utils.busca_lexica import IndiceLexico, termos_texto
+from utils.fabrica_indices import otimizar_vector_store
+
+# Trechos vetorizados por chamada; limita a memória usada durante a ingestão
+TAMANHO_LOTE_INGESTAO = 64
+# Páginas indexadas antes de liberar o chat para o aluno
+PAGINAS_INICIAIS = 10
+
+
+# ✂️ Divide as páginas conforme chegam, numerando os trechos de cada arquivo
+def iterar_trechos(paginas, splitter):
+    contadores = {}
+    for pagina in paginas:
+        for trecho in splitter.split_documents([pagina]):
+            origem = Path(trecho.metadata.get("source", "Desconhecido")).name
+            trecho.metadata["source"] = origem
+            trecho.metadata["doc_id"] = contadores.get(origem, 0)
+            contadores[origem] = trecho.metadata["doc_id"] + 1
+            yield trecho
+
+
+def em_lotes(iteravel, tamanho: int):
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _adicionar(vector_store, embeddings, textos, vetores, metadados) -> tuple:
+    if vector_store is None:
+        vector_store = FAISS.from_embeddings(list(zip(textos, vetores)), embeddings, metadatas=metadados)
+        return vector_store, list(vector_store.index_to_docstore_id.values())
+    return vector_store, vector_store.add_embeddings(list(zip(textos, vetores)), metadatas=metadados)
+
+
+class IngestaoIncremental:
+    """
+    Extrai, divide, vetoriza e indexa os PDFs em segundo plano, lote a lote.
+    O índice de destino pode ser consultado enquanto cresce.
+    :param paginas: Gerador de páginas (Document) na ordem dos arquivos
+    :param splitter: Divisor de texto usado em cada página
+    :param embeddings: Modelo de embeddings
+    :param destino: IndiceSessao que recebe os trechos
+    :param chaves: Nome de cada arquivo a indexar -> chave do seu índice no cache
+    :param ao_concluir_arquivo: Chamado com (nome, chave, índice FAISS e índice léxico só daquele arquivo)
+    """
+
+    def __init__(self, paginas, splitter, embeddings, destino, chaves: dict, ao_concluir_arquivo=None,
+                 paginas_iniciais=PAGINAS_INICIAIS, tamanho_lote=TAMANHO_LOTE_INGESTAO):
+        self.paginas = paginas
+        self.splitter = splitter
+        self.embeddings = embeddings
+        self.destino = destino
+        self.chaves = chaves
+        self.ao_concluir_arquivo = ao_concluir_arquivo
+        self.paginas_iniciais = paginas_iniciais
+        self.tamanho_lote = tamanho_lote
+
+        self.pronto = threading.Event()
+        self.concluido = threading.Event()
+        self.paginas_indexadas = 0
+        self.erro = None
+        self.arquivos_concluidos = set()
+
+        self._arquivo_atual = None
+        self._indice_arquivo = None
+        self._lexico_arquivo = None
+        self._paginas_vistas = set()
+
+    def iniciar(self):
+        threading.Thread(target=self._executar, daemon=True).start()
+        return self
+
+    def aguardar_pronto(self, timeout=None) -> bool:
+        return self.pronto.wait(timeout)
+
+    # 📄 Arquivos que não chegaram ao fim da indexação (ex.: interrompida por um erro)
+    def arquivos_pendentes(self) -> list:
+        return [nome for nome in self.chaves if nome not in self.arquivos_concluidos]
+
+    def _fechar_arquivo(self):
+        if self._arquivo_atual is not None:
+            self.arquivos_concluidos.add(self._arquivo_atual)
+        if self._arquivo_atual is not None and self._indice_arquivo is not None and self.ao_concluir_arquivo:
+            # O índice do arquivo vai para o cache já aproximado se passou do limiar
+            otimizar_vector_store(self._indice_arquivo)
+            self.ao_concluir_arquivo(
+                self._arquivo_atual, self.chaves[self._arquivo_atual], self._indice_arquivo, self._lexico_arquivo
+            )
+        self._arquivo_atual = None
+        self._indice_arquivo = None
+        self._lexico_arquivo = None
+
+    def _executar(self):
+        try:
+            for lote in em_lotes(iterar_trechos(self.paginas, self.splitter), self.tamanho_lote):
+                textos = [t.page_content for t in lote]
+                metadados = [t.metadata for t in lote]
+                vetores = self.embeddings.embed_documents(textos)
+                # Termos do BM25 contados uma vez, para o índice da sessão e o do arquivo
+                termos = [termos_texto(t) for t in textos]
+
+                # Agrupa o lote por arquivo: cada grupo entra no índice da sessão e
+                # num índice só do arquivo, guardado no cache ao final de cada PDF
+                inicio = 0
+                while inicio < len(lote):
+                    origem = metadados[inicio]["source"]
+                    fim = inicio
+                    while fim < len(lote) and metadados[fim]["source"] == origem:
+                        self._paginas_vistas.add((origem, metadados[fim].get("page")))
+                        fim += 1
+
+                    self.destino.adicionar(
+                        origem, self.chaves[origem],
+                        textos[inicio:fim], vetores[inicio:fim], metadados[inicio:fim], termos[inicio:fim]
+                    )
+                    if origem != self._arquivo_atual:
+                        self._fechar_arquivo()
+                        self._arquivo_atual = origem
+                        self._lexico_arquivo = IndiceLexico()
+                    self._indice_arquivo, ids = _adicionar(
+                        self._indice_arquivo, self.embeddings,
+                        textos[inicio:fim], vetores[inicio:fim], metadados[inicio:fim]
+                    )
+                    self._lexico_arquivo.adicionar(ids, termos=termos[inicio:fim])
+                    inicio = fim
+
+                self.paginas_indexadas = len(self._paginas_vistas)
+                if self.paginas_indexadas >= self.paginas_iniciais:
+                    self.pronto.set()
+
+            self._fechar_arquivo()
+        except Exception as e:
+            self.erro = e
+        finally:
+            self.concluido.set()
+            self.pronto.set()
+
+
+class RetrieverIncremental(BaseRetriever):
+    """Busca no IndiceSessao, mesmo enquanto ele ainda recebe trechos."""
+
+    indice: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.indice.buscar(query, k=self.k)
@@ -0,0 +1,44 @@
+from langchain.memory import ConversationSummaryBufferMemory
+
+from utils.tokens import contar_tokens, contar_tokens_mensagens
+
+
+class MemoriaResumida(ConversationSummaryBufferMemory):
+    """
+    Memória do chat com orçamento de tokens: mantém os últimos turnos na íntegra
+    e acumula os turnos mais antigos num resumo. O resumo é atualizado em lotes
+    (quando o histórico passa do dobro dos turnos recentes ou do orçamento), e não
+    a cada turno, para poupar chamadas ao modelo.
+    :param max_token_limit: Orçamento de tokens para resumo + turnos recentes
+    :param turnos_recentes: Turnos (pergunta + resposta) mantidos na íntegra após cada resumo
+    """
+
+    turnos_recentes: int = 4
+    # 📊 Tokens do histórico após cada turno (resumo + mensagens recentes)
+    tokens_por_turno: list = []
+    # Chamadas ao modelo feitas para atualizar o resumo
+    resumos_gerados: int = 0
+
+    def tokens_historico(self) -> int:
+        return contar_tokens(self.moving_summary_buffer) + contar_tokens_mensagens(self.chat_memory.messages)
+
+    def prune(self) -> None:
+        buffer = self.chat_memory.messages
+        tamanhos = [contar_tokens_mensagens([m]) for m in buffer]
+        total = sum(tamanhos) + contar_tokens(self.moving_summary_buffer)
+
+        removidas = []
+        # Resume em lotes: só quando o histórico passa do dobro dos turnos recentes (ou do
+        # orçamento), removendo turnos inteiros (2 mensagens) do início até voltar a eles,
+        # sempre preservando o último turno
+        if len(buffer) > 4 * self.turnos_recentes or total > self.max_token_limit:
+            while len(buffer) > 2 and (len(buffer) > 2 * self.turnos_recentes or total > self.max_token_limit):
+                for _ in range(2):
+                    removidas.append(buffer.pop(0))
+                    total -= tamanhos.pop(0)
+
+        if removidas:
+            self.moving_summary_buffer = self.predict_new_summary(removidas, self.moving_summary_buffer)
+            self.resumos_gerados += 1
+
+        self.tokens_por_turno.append(self.tokens_historico())
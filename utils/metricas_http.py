@@ -0,0 +1,88 @@
+import math
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# ⏱️ Limites superiores (ms) dos baldes do histograma de latência; o último recebe o resto
+LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, math.inf)
+# Diretório compartilhado pelos workers (definido pelo gunicorn.conf.py); vazio = só em memória
+PASTA_METRICAS = os.getenv("METRICAS_HTTP_DIR", "")
+
+
+class HistogramaLatencia:
+    """
+    Histograma de latência por rota. Com vários processos (workers do gunicorn),
+    cada processo grava seus contadores num arquivo próprio mapeado em memória,
+    e a leitura soma os arquivos de todos os workers.
+    :param rotas: Nomes das rotas medidas (as demais caem em "outras")
+    :param pasta: Diretório dos arquivos por processo; vazio mantém os contadores só em memória
+    """
+
+    def __init__(self, rotas: list, pasta=PASTA_METRICAS):
+        self.rotas = list(rotas) + ["outras"]
+        self._linha = {rota: i for i, rota in enumerate(self.rotas)}
+        self.pasta = Path(pasta) if pasta else None
+        self._trava = threading.Lock()
+        self._pid = None
+        self._contadores = None
+
+    def _forma(self) -> tuple:
+        # Por rota: um contador por balde + soma das latências em microssegundos
+        return len(self.rotas), len(LIMITES_MS) + 1
+
+    def _meus_contadores(self) -> np.ndarray:
+        # Recria após um fork: cada worker escreve só no próprio arquivo
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            if self.pasta is None:
+                self._contadores = np.zeros(self._forma(), dtype=np.int64)
+            else:
+                self.pasta.mkdir(parents=True, exist_ok=True)
+                self._contadores = np.memmap(
+                    self.pasta / f"{self._pid}.hist", dtype=np.int64, mode="w+", shape=self._forma()
+                )
+        return self._contadores
+
+    def observar(self, rota: str, segundos: float) -> None:
+        linha = self._linha.get(rota, len(self.rotas) - 1)
+        balde = next(i for i, limite in enumerate(LIMITES_MS) if segundos * 1000 <= limite)
+        with self._trava:
+            contadores = self._meus_contadores()
+            contadores[linha, balde] += 1
+            contadores[linha, -1] += int(segundos * 1e6)
+
+    def _somar(self) -> np.ndarray:
+        with self._trava:
+            total = np.array(self._meus_contadores())
+        if self.pasta is not None:
+            for arquivo in self.pasta.glob("*.hist"):
+                if arquivo.name != f"{os.getpid()}.hist":
+                    total += np.fromfile(arquivo, dtype=np.int64).reshape(self._forma())
+        return total
+
+    def resumo(self) -> dict:
+        total = self._somar()
+        resumo = {}
+        for rota, contadores in zip(self.rotas, total):
+            baldes, soma_us = contadores[:-1], int(contadores[-1])
+            quantidade = int(baldes.sum())
+            if not quantidade:
+                continue
+            acumulado = np.cumsum(baldes)
+
+            def percentil(p):
+                # Limite superior do balde que contém o percentil
+                limite = LIMITES_MS[int(np.searchsorted(acumulado, math.ceil(p / 100 * quantidade)))]
+                return None if math.isinf(limite) else limite
+
+            resumo[rota] = {
+                "requisicoes": quantidade,
+                "media_ms": soma_us / quantidade / 1000,
+                "p50_ms": percentil(50),
+                "p95_ms": percentil(95),
+                "p99_ms": percentil(99),
+                "baldes": {("+inf" if math.isinf(limite) else str(limite)): int(n) for limite, n in zip(LIMITES_MS, acumulado)},
+            }
+        return resumo
@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+# ⚙️ Limite de gerações simultâneas de perguntas (compartilhado pelo processo)
+MAX_GERACOES_PARALELAS = int(os.getenv("MAX_GERACOES_PARALELAS", "4"))
+_executor = ThreadPoolExecutor(max_workers=MAX_GERACOES_PARALELAS, thread_name_prefix="quiz")
+
+
+# 🔑 Forma canônica do enunciado, usada para detectar perguntas repetidas
+def normalizar_pergunta(texto: str) -> str:
+    texto = "".join(c for c in unicodedata.normalize("NFD", texto.lower()) if unicodedata.category(c) != "Mn")
+    return " ".join(re.findall(r"\w+", texto))
+
+
+# 📋 Pergunta já interpretada (estrutura compacta guardada na sessão do quiz)
+@dataclass(frozen=True, slots=True)
+class Pergunta:
+    texto: str
+    opcoes: list  # ["A) ...", "B) ...", "C) ...", "D) ..."] (lista: o st.radio converte tuplas bem mais devagar)
+    resposta: str  # letra da opção correta
+    explicacao: str
+
+    @property
+    def texto_resposta(self) -> str:
+        return self.opcoes["ABCD".index(self.resposta)][3:].strip()
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Pergunta":
+        return cls(dados["pergunta"], list(dados["opcoes"]), dados["resposta"], dados["explicacao"])
+
+    def para_dict(self) -> dict:
+        return {"pergunta": self.texto, "opcoes": list(self.opcoes), "resposta": self.resposta, "explicacao": self.explicacao}
+
+
+def _pergunta_valida(item) -> dict:
+    if not isinstance(item, dict):
+        return None
+    pergunta = str(item.get("pergunta", "")).strip()
+    opcoes = item.get("opcoes")
+    resposta = str(item.get("resposta", "")).strip().upper()[:1]
+    if not pergunta or not isinstance(opcoes, list) or len(opcoes) != 4 or not resposta or resposta not in "ABCD":
+        return None
+
+    # Garante o prefixo "A) ", "B) "... usado na exibição e na correção
+    opcoes = [
+        texto if re.match(rf"^{letra}\)", texto) else f"{letra}) {texto}"
+        for letra, texto in zip("ABCD", (str(o).strip() for o in opcoes))
+    ]
+    return {
+        "pergunta": pergunta,
+        "opcoes": opcoes,
+        "resposta": resposta,
+        "explicacao": str(item.get("explicacao", "")).strip(),
+    }
+
+
+# 🧩 Lê a saída JSON de uma geração ({"perguntas": [...]}); itens malformados são descartados
+def ler_perguntas_json(texto: str) -> list:
+    texto = re.sub(r"^```(?:json)?|```$", "", texto.strip()).strip()
+    try:
+        dados = json.loads(texto)
+    except json.JSONDecodeError:
+        return []
+
+    itens = dados.get("perguntas", []) if isinstance(dados, dict) else dados
+    if not isinstance(itens, list):
+        return []
+    return [p for p in map(_pergunta_valida, itens) if p]
+
+
+# ⚡ Gera as perguntas em paralelo, uma geração por trecho, e junta os resultados parciais
+def gerar_em_paralelo(trechos: list, gerar_trecho, qtd_perguntas: int, por_trecho: int = 1) -> list:
+    """
+    :param trechos: Textos base; cada um vira uma geração independente
+    :param gerar_trecho: Função (texto, quantidade) -> lista de perguntas
+    :param qtd_perguntas: Quantidade máxima de perguntas devolvidas
+    :param por_trecho: Perguntas pedidas em cada geração
+    """
+    futuros = [_executor.submit(gerar_trecho, trecho, por_trecho) for trecho in trechos]
+
+    perguntas, vistas = [], set()
+    for futuro in as_completed(futuros):
+        try:
+            novas = futuro.result()
+        except Exception as e:
+            # Uma geração com falha não derruba as demais
+            logging.warning(f"Falha ao gerar perguntas de um trecho: {e}")
+            continue
+        for pergunta in novas:
+            normalizada = normalizar_pergunta(pergunta["pergunta"])
+            if normalizada and normalizada not in vistas:
+                vistas.add(normalizada)
+                perguntas.append(pergunta)
+    return perguntas[:qtd_perguntas]
@@ -0,0 +1,38 @@
+import re
+import unicodedata
+
+# Palavras que apontam para algo dito antes na conversa
+REFERENCIAS = {
+    "isso", "isto", "aquilo", "disso", "disto", "daquilo", "nisso", "nisto",
+    "ele", "ela", "eles", "elas", "dele", "dela", "deles", "delas", "nele", "nela",
+    "esse", "essa", "esses", "essas", "desse", "dessa", "nesse", "nessa",
+    "aquele", "aquela", "aqueles", "aquelas", "daquele", "daquela",
+    "mesmo", "mesma", "anterior", "acima", "ultimo", "ultima", "outro", "outra", "outros", "outras",
+}
+# Começos típicos de continuação ("e o TCP?", "mas por quê?", "continue")
+INICIOS_CONTINUACAO = {"e", "mas", "entao", "tambem", "continue", "continua", "prossiga", "mais", "so", "ok"}
+# Pedidos que só fazem sentido com o histórico
+EXPRESSOES_CONTINUACAO = ("explique melhor", "de novo", "mais detalhes", "outro exemplo", "nao entendi", "como assim")
+# Perguntas com até este número de palavras costumam depender do contexto
+MAX_PALAVRAS_CURTA = 3
+
+
+def _sem_acentos(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn")
+
+
+# 🔎 Decide, sem chamar o modelo, se a pergunta precisa ser reescrita com o histórico
+def precisa_reformular(pergunta: str, historico: str) -> bool:
+    if not historico:
+        return False
+
+    texto = _sem_acentos(pergunta.lower())
+    palavras = re.findall(r"\w+", texto)
+
+    if len(palavras) <= MAX_PALAVRAS_CURTA:
+        return True
+    if palavras[0] in INICIOS_CONTINUACAO:
+        return True
+    if any(expressao in texto for expressao in EXPRESSOES_CONTINUACAO):
+        return True
+    return any(palavra in REFERENCIAS for palavra in palavras)
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+import uuid
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+try:
+    import brotli  # opcional: sem ele, só a variante gzip é gerada
+except ImportError:
+    brotli = None
+
+# 📁 Diretório dos relatórios do quiz (servidos pelo flask_server)
+PASTA_RELATORIOS = Path(os.getenv("RELATORIOS_DIR", Path(__file__).parent.parent / "relatorioQuiz"))
+# Templates e CSS compartilhados com as páginas do flask_server
+PASTA_TEMPLATES = Path(__file__).parent.parent / "flask_server" / "templates"
+PASTA_ESTATICOS = Path(__file__).parent.parent / "flask_server" / "static"
+# Codificações pré-comprimidas gravadas ao lado de cada relatório (Content-Encoding -> extensão)
+EXTENSOES_COMPRIMIDAS = {"br": ".br", "gzip": ".gz"}
+# Caracteres acumulados antes de cada gravação no arquivo
+TAMANHO_BLOCO = 64 * 1024
+
+
+def nome_relatorio(matricula: str, arquivo: str, data_hora: str) -> str:
+    return f"{matricula}_{arquivo}_relatorio_{data_hora}.html"
+
+
+# 🧩 Templates compilados uma vez por processo (compartilhados com as páginas do flask_server)
+_ambiente = Environment(
+    loader=FileSystemLoader(PASTA_TEMPLATES),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+)
+
+
+# 🎨 URL do CSS compartilhado, versionada pelo conteúdo (pode ficar em cache por tempo indeterminado)
+@lru_cache(maxsize=1)
+def url_css() -> str:
+    versao = hashlib.sha256((PASTA_ESTATICOS / "estilo.css").read_bytes()).hexdigest()[:12]
+    return f"/static/estilo.css?v={versao}"
+
+
+def template(nome: str):
+    return _ambiente.get_template(nome)
+
+
+# 📝 Gera o HTML do relatório do quiz em partes (o conteúdo é escapado pelo template)
+def gerar_relatorio(data_hora: str, matricula: str, acertos: int, feedback_ia: str, respostas_usuario: list):
+    return template("relatorio.html").generate(
+        url_css=url_css(),
+        data_hora=data_hora,
+        matricula=matricula,
+        acertos=acertos,
+        paragrafos=feedback_ia.split("\n\n"),
+        respostas_usuario=respostas_usuario,
+    )
+
+
+def montar_relatorio(data_hora: str, matricula: str, acertos: int, feedback_ia: str, respostas_usuario: list) -> str:
+    return "".join(gerar_relatorio(data_hora, matricula, acertos, feedback_ia, respostas_usuario))
+
+
+def _temporario(pasta: Path) -> Path:
+    return pasta / f".{uuid.uuid4().hex}.tmp"
+
+
+def _gravar_atomico(caminho: Path, conteudo: bytes) -> None:
+    temporario = _temporario(caminho.parent)
+    with open(temporario, "wb") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+# 🗜️ Codificações disponíveis neste ambiente
+def codificacoes() -> dict:
+    return {c: e for c, e in EXTENSOES_COMPRIMIDAS.items() if c != "br" or brotli is not None}
+
+
+def _comprimir(codificacao: str, conteudo: bytes) -> bytes:
+    if codificacao == "br":
+        return brotli.compress(conteudo, quality=11)
+    return gzip.compress(conteudo, compresslevel=9, mtime=0)
+
+
+# Grava as variantes comprimidas que faltam (relatórios não mudam depois de gravados)
+def comprimir_relatorio(caminho) -> None:
+    caminho = Path(caminho)
+    conteudo = None
+    for codificacao, extensao in codificacoes().items():
+        variante = caminho.with_name(caminho.name + extensao)
+        if not variante.exists():
+            conteudo = caminho.read_bytes() if conteudo is None else conteudo
+            _gravar_atomico(variante, _comprimir(codificacao, conteudo))
+
+
+# 💾 Grava o relatório (texto ou partes geradas pelo template) junto das variantes comprimidas,
+# sem montar o HTML inteiro em memória. Tudo vai para temporários renomeados no fim, variantes
+# primeiro: o servidor nunca lê um HTML pela metade e, quando ele aparece, as variantes já existem.
+def salvar_relatorio(nome: str, html_content, pasta=PASTA_RELATORIOS) -> Path:
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    partes = [html_content] if isinstance(html_content, str) else html_content
+
+    temporarios = {}  # extensão -> caminho temporário
+    try:
+        _gravar_partes(pasta, partes, temporarios)
+    except BaseException:
+        for temporario in temporarios.values():
+            temporario.unlink(missing_ok=True)
+        raise
+
+    for extensao in sorted(temporarios, key=lambda e: e == ""):
+        os.replace(temporarios[extensao], pasta / (nome + extensao))
+    return pasta / nome
+
+
+def _gravar_partes(pasta: Path, partes, temporarios: dict) -> None:
+    with ExitStack() as pilha:
+        arquivo = pilha.enter_context(open(temporarios.setdefault("", _temporario(pasta)), "wb"))
+        saidas = [arquivo.write]
+        for codificacao, extensao in codificacoes().items():
+            destino = pilha.enter_context(open(temporarios.setdefault(extensao, _temporario(pasta)), "wb"))
+            if codificacao == "br":
+                compressor = brotli.Compressor(quality=11)
+                saidas.append(lambda dados, c=compressor, d=destino: d.write(c.process(dados)))
+                pilha.callback(lambda c=compressor, d=destino: d.write(c.finish()))
+            else:
+                compressor = pilha.enter_context(gzip.GzipFile(fileobj=destino, mode="wb", compresslevel=9, mtime=0))
+                saidas.append(compressor.write)
+
+        # O template gera pedaços pequenos: junta em blocos antes de gravar e comprimir
+        bloco, tamanho = [], 0
+        for parte in partes:
+            bloco.append(parte)
+            tamanho += len(parte)
+            if tamanho >= TAMANHO_BLOCO:
+                _descarregar(bloco, saidas)
+                bloco, tamanho = [], 0
+        _descarregar(bloco, saidas)
+
+
+def _descarregar(bloco: list, saidas: list) -> None:
+    dados = "".join(bloco).encode("utf-8")
+    for escrever in saidas:
+        escrever(dados)
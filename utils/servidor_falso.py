@@ -0,0 +1,125 @@
+"""
+Servidor HTTP local compatível com a API da OpenAI (chat e embeddings),
+para testar e medir o app sem acessar a OpenAI.
+
+Uso: python -m utils.servidor_falso [porta] [atraso_em_segundos]
+     OPENAI_BASE_URL=http://127.0.0.1:<porta>/v1 streamlit run app.py
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.falsos import EmbeddingsFalso
+
+
+def responder_padrao(mensagens: list) -> str:
+    return "Resposta de teste do servidor local."
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # mantém a conexão aberta (keep-alive)
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _enviar_json(self, dados: dict, status=200):
+        corpo = json.dumps(dados).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _enviar_stream(self, conteudo: str, modelo: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def evento(dados):
+            linha = f"data: {dados}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(linha):X}\r\n".encode() + linha + b"\r\n")
+            self.wfile.flush()
+
+        palavras = conteudo.split(" ")
+        for i, palavra in enumerate(palavras):
+            time.sleep(self.server.atraso_por_caractere * len(palavra))
+            pedaco = palavra if i == 0 else " " + palavra
+            evento(json.dumps({
+                "id": "falso", "object": "chat.completion.chunk", "created": int(time.time()), "model": modelo,
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": pedaco}, "finish_reason": None}],
+            }))
+        evento(json.dumps({
+            "id": "falso", "object": "chat.completion.chunk", "created": int(time.time()), "model": modelo,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }))
+        evento("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+        servidor = self.server
+        time.sleep(servidor.atraso)
+
+        with servidor.trava:
+            servidor.requisicoes += 1
+
+        if self.path.endswith("/chat/completions"):
+            conteudo = servidor.responder(pedido.get("messages", []))
+            modelo = pedido.get("model", "falso")
+            if pedido.get("stream"):
+                return self._enviar_stream(conteudo, modelo)
+
+            time.sleep(servidor.atraso_por_caractere * len(conteudo))
+            return self._enviar_json({
+                "id": "falso", "object": "chat.completion", "created": int(time.time()), "model": modelo,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": conteudo}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        if self.path.endswith("/embeddings"):
+            entradas = pedido.get("input", [])
+            entradas = entradas if isinstance(entradas, list) else [entradas]
+            # Entradas podem vir como texto ou como lista de tokens
+            vetores = servidor.embeddings.embed_documents([json.dumps(e) for e in entradas])
+            return self._enviar_json({
+                "object": "list", "model": pedido.get("model", "falso"),
+                "data": [{"object": "embedding", "index": i, "embedding": v} for i, v in enumerate(vetores)],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+
+        self._enviar_json({"error": {"message": f"Rota não suportada: {self.path}"}}, status=404)
+
+
+def iniciar_servidor_falso(porta=0, atraso=0.0, atraso_por_caractere=0.0, responder=None, dimensao=1536):
+    """
+    Sobe o servidor numa thread e retorna (servidor, url_base).
+    :param atraso: Espera fixa antes de cada resposta (simula a latência da rede/fila)
+    :param atraso_por_caractere: Espera proporcional ao tamanho da resposta (simula a geração)
+    :param responder: Função que recebe as mensagens do chat e devolve o texto da resposta
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), _Manipulador)
+    servidor.daemon_threads = True
+    servidor.atraso = atraso
+    servidor.atraso_por_caractere = atraso_por_caractere
+    servidor.responder = responder or responder_padrao
+    servidor.embeddings = EmbeddingsFalso(dimensao)
+    servidor.trava = threading.Lock()
+    servidor.requisicoes = 0
+
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else 8001
+    atraso = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    servidor, url = iniciar_servidor_falso(porta, atraso)
+    print(f"Servidor falso da OpenAI em {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
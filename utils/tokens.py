@@ -0,0 +1,37 @@
+from functools import lru_cache
+
+import tiktoken
+
+# Codificação usada pelos modelos gpt-3.5/gpt-4 e pelos embeddings ada-002
+CODIFICACAO = "cl100k_base"
+
+
+@lru_cache(maxsize=1)
+def _codificador():
+    try:
+        return tiktoken.get_encoding(CODIFICACAO)
+    except Exception:
+        # Sem acesso ao arquivo da codificação (ex.: ambiente offline): usa estimativa
+        return None
+
+
+# 🔢 Conta tokens como o modelo conta; sem tiktoken disponível, estima ~4 caracteres por token
+def contar_tokens(texto: str) -> int:
+    codificador = _codificador()
+    if codificador is None:
+        return (len(texto) + 3) // 4
+    return len(codificador.encode(texto, disallowed_special=()))
+
+
+def contar_tokens_mensagens(mensagens) -> int:
+    # 4 tokens de formatação por mensagem, como no formato de chat da OpenAI
+    return sum(contar_tokens(m.content) + 4 for m in mensagens)
+
+
+# ✂️ Corta o texto em pedaços de no máximo `tamanho` tokens (sem tiktoken, ~4 caracteres por token)
+def dividir_tokens(texto: str, tamanho: int) -> list:
+    codificador = _codificador()
+    if codificador is None:
+        return [texto[i:i + 4 * tamanho] for i in range(0, len(texto), 4 * tamanho)]
+    ids = codificador.encode(texto, disallowed_special=())
+    return [codificador.decode(ids[i:i + tamanho]) for i in range(0, len(ids), tamanho)]